@@ -0,0 +1,252 @@
+import collections
+import csv
+import queue
+import sqlite3
+import threading
+import time
+
+import storage
+import weather_history
+
+AdvisorJob = collections.namedtuple(
+    "AdvisorJob", "farmer_name city soil_ph soil_moisture temperature rainfall",
+    defaults=(None, None, None, None, None)
+)
+AdvisorPlan = collections.namedtuple(
+    "AdvisorPlan", "job prompt ranked soil_ph soil_moisture temperature rainfall sustainability_score condition fallback"
+)
+AdvisorResult = collections.namedtuple(
+    "AdvisorResult", "job suggestion cached sustainability_score record_id seconds error"
+)
+
+UNKNOWN_WEATHER = ("Unknown", "Error fetching weather")
+TOP_K = 3  # Ranked crops the LLM is asked to explain
+
+
+def weather_is_known(weather):
+    return bool(weather) and weather.get("condition") not in UNKNOWN_WEATHER
+
+
+# 🌱 Pick the most sustainable crop row grown near the farmer's conditions
+# Soil values come from the job when the farmer supplied them; the temperature falls
+# back to the live weather for the farmer's city.
+def select_crop_row(crop_index, job, weather=None):
+    temperature = job.temperature
+    if temperature is None and weather_is_known(weather):
+        temperature = weather["temp"]
+    candidates = crop_index.top_k(
+        k=1, soil_ph=job.soil_ph, soil_moisture=job.soil_moisture,
+        temperature=temperature, rainfall=job.rainfall
+    )
+    return candidates[0] if candidates else crop_index.best_row()
+
+
+# 🧮 Rank every crop for the farmer's soil and the live weather (see crop_scoring)
+def rank_crops(crop_scorer, job, weather=None, k=TOP_K):
+    temperature = job.temperature
+    if temperature is None and weather_is_known(weather):
+        temperature = weather["temp"]
+    return crop_scorer.rank(job.soil_ph, job.soil_moisture, temperature, job.rainfall, k=k)
+
+
+# The ranking is already decided, so the LLM only has to explain it
+def build_prompt(farmer_name, soil_ph, soil_moisture, temperature, rainfall, ranked, trend=None):
+    crops = ", ".join(f"{i}. {c['crop']} (sustainability {c['sustainability']})" for i, c in enumerate(ranked, 1))
+    prompt = (f"Explain briefly to {farmer_name} why these crops are recommended, in this order: {crops}. "
+              f"Conditions: Soil pH: {soil_ph}, Moisture: {soil_moisture}, Temperature: {temperature}°C, Rainfall: {rainfall}mm.")
+    if trend:
+        prompt += f" Recent weather ({weather_history.format_summary(trend)})."
+    return prompt
+
+
+def fallback_suggestion(crops):
+    return f"Based on your conditions, consider these crops: {', '.join(crops)}."
+
+
+# 🌡️ The city's weather trend over completed days (None without history)
+# It goes into the prompt, so it stays the same between readings and the LLM cache and
+# the advisor's "nothing changed" check keep working.
+def weather_trend(app, city, days=7):
+    if not city:
+        return None
+    try:
+        return weather_history.completed_days_summary(app.db.reader(), city, days)
+    except sqlite3.Error as e:
+        print("⚠️ Weather History Error:", e)
+        return None
+
+
+# 📝 Rank crops for one job and build the prompt that asks TinyLlama to explain them
+def prepare(app, job, weather=None):
+    row = select_crop_row(app.crop_index, job, weather)
+    ranked = rank_crops(app.crop_scorer, job, weather)
+    soil_ph = row["Soil_pH"] if job.soil_ph is None else job.soil_ph
+    soil_moisture = row["Soil_Moisture"] if job.soil_moisture is None else job.soil_moisture
+    temperature = row["Temperature_C"] if job.temperature is None else job.temperature
+    rainfall = row["Rainfall_mm"] if job.rainfall is None else job.rainfall
+    trend = weather_trend(app, job.city)
+    return AdvisorPlan(
+        job, build_prompt(job.farmer_name, soil_ph, soil_moisture, temperature, rainfall, ranked, trend), ranked,
+        soil_ph, soil_moisture, temperature, rainfall,
+        ranked[0]["sustainability"] if ranked else row["Sustainability_Score"],
+        weather["condition"] if weather_is_known(weather) else "Unknown",
+        fallback_suggestion([c["crop"] for c in ranked] or [row["Crop_Type"]]),
+    )
+
+
+# 🧾 Row values ready for storage.insert_recommendation
+def plan_values(plan, suggestion):
+    return (plan.job.farmer_name, suggestion, plan.soil_ph, plan.soil_moisture, plan.temperature, plan.rainfall,
+            plan.sustainability_score, plan.condition, 0)
+
+
+# 👨‍🌾 Ask TinyLlama (through the shared cache) to explain the ranked crops for one job
+# Returns the row values, the prompt and whether the answer came from the cache.
+def generate(app, job, weather=None):
+    plan = prepare(app, job, weather)
+    cached = False
+    try:
+        response = app.llm.chat(plan.prompt)
+        suggestion, cached = response.text, response.cached
+    except Exception as ollama_error:
+        print(f"⚠️ Ollama AI Error: {ollama_error}")
+        suggestion = plan.fallback
+    return plan_values(plan, suggestion), plan.prompt, cached
+
+
+# 💾 Generate and store one recommendation
+def recommend(app, job, weather=None):
+    start = time.perf_counter()
+    try:
+        values, _, cached = generate(app, job, weather)
+        record_id = app.db.write(storage.insert_recommendation, values, app.crop_vocabulary)
+        return AdvisorResult(job, values[1], cached, values[6], record_id, time.perf_counter() - start, None)
+    except Exception as e:
+        return AdvisorResult(job, None, False, None, None, time.perf_counter() - start, e)
+
+
+# 🏭 Bounded worker pool that serves many farmers at once
+# submit() blocks once `queue_size` jobs are waiting (backpressure), `concurrency`
+# workers run LLM calls in parallel against the local ollama server, and every
+# result is stored and passed to on_result as soon as it completes.
+class AdvisorEngine:
+    def __init__(self, app, concurrency=4, queue_size=100, on_result=None, weather_lookup=None):
+        self.app = app
+        self.concurrency = concurrency
+        self.on_result = on_result
+        self.weather_lookup = weather_lookup
+        self._jobs = queue.Queue(maxsize=queue_size)
+        self._workers = []
+        self._pending = 0
+        self._pending_lock = threading.Condition()
+
+    def start(self):
+        for i in range(self.concurrency):
+            worker = threading.Thread(target=self._work, name=f"advisor-{i}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+        return self
+
+    def submit(self, job, timeout=None):
+        with self._pending_lock:
+            self._pending += 1
+        try:
+            self._jobs.put(job, timeout=timeout)
+        except queue.Full:
+            self._finish_one()
+            raise
+
+    def queue_depth(self):
+        return self._jobs.qsize()
+
+    def _finish_one(self):
+        with self._pending_lock:
+            self._pending -= 1
+            self._pending_lock.notify_all()
+
+    def _work(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                break
+            weather = None
+            if self.weather_lookup and job.city:
+                try:
+                    weather = self.weather_lookup(job.city)
+                except Exception as e:
+                    print("⚠️ Weather API Error:", e)
+            result = recommend(self.app, job, weather)
+            try:
+                if self.on_result:
+                    self.on_result(result)
+            except Exception as e:
+                print("⚠️ Advisor Result Error:", e)
+            finally:
+                self._finish_one()
+
+    # ⏳ Wait until every submitted job has produced a result
+    def join(self, timeout=None):
+        with self._pending_lock:
+            return self._pending_lock.wait_for(lambda: self._pending == 0, timeout)
+
+    def close(self, wait=True):
+        if wait:
+            self.join()
+        for _ in self._workers:
+            self._jobs.put(None)
+        for worker in self._workers:
+            worker.join()
+        self._workers = []
+
+
+# 📄 Stream jobs from a CSV of farmers
+# Only farmer_name is required; city, soil_ph, soil_moisture, temperature and rainfall
+# are optional. Headers are matched case-insensitively ("Farmer Name" works too).
+def read_farmer_jobs(path):
+    def number(value):
+        try:
+            return float(value) if value not in (None, "") else None
+        except ValueError:
+            return None
+
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f)
+        for raw in reader:
+            row = {
+                key.strip().lower().replace(" ", "_"): (value or "").strip()
+                for key, value in raw.items() if isinstance(key, str)
+            }
+            farmer_name = row.get("farmer_name") or row.get("name")
+            if not farmer_name:
+                continue
+            yield AdvisorJob(
+                farmer_name, row.get("city") or None, number(row.get("soil_ph")),
+                number(row.get("soil_moisture")), number(row.get("temperature")), number(row.get("rainfall"))
+            )
+
+
+# 🖥️ Headless bulk run over a CSV of farmers
+def run_bulk(app, csv_path, concurrency=4, weather_lookup=None):
+    counts = collections.Counter()
+    counts_lock = threading.Lock()
+
+    def report(result):
+        with counts_lock:
+            counts["failed" if result.error is not None else "cached" if result.cached else "generated"] += 1
+        if result.error is not None:
+            print(f"⚠️ {result.job.farmer_name}: {result.error}")
+            return
+        print(f"👨‍🌾 {result.job.farmer_name} (#{result.record_id}, {result.seconds:.2f}s): {result.suggestion[:80]}")
+
+    start = time.perf_counter()
+    engine = AdvisorEngine(app, concurrency=concurrency, queue_size=concurrency * 4,
+                           on_result=report, weather_lookup=weather_lookup).start()
+    for job in read_farmer_jobs(csv_path):
+        engine.submit(job)
+    engine.close()
+    elapsed = time.perf_counter() - start
+    total = sum(counts.values())
+    print(f"✅ {total} farmers in {elapsed:.1f}s ({total / elapsed if elapsed else 0:.1f} farmers/s): "
+          f"{counts['generated']} generated, {counts['cached']} cached, {counts['failed']} failed")
+    print(app.llm.format_stats())
+    return counts
@@ -1,257 +1,329 @@
-import requests
+import time
+STARTUP_T0 = time.perf_counter()
+
+import argparse
 import sqlite3
-import pandas as pd
-import ollama
+import subprocess
+import sys
 import threading
-import time
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from PIL import Image, ImageTk
-import io
 import os
 from datetime import datetime
+import storage
+import exporter
+import metrics
+import weather_history
+from llm_service import LLMCancelled
+import advisor_engine
+from advisor_engine import AdvisorJob
+from event_bus import EventBus, UiPump
+from recommendation_list import RecommendationList, RecommendationPages, IMAGE_SIZE, SUGGESTION_CHARS
+from app_context import (AppContext, app, canonical_crop, base_path, WEATHER_API_KEY, WEATHER_FIXTURES, WEATHER_URL,
+                         MARKET_INTERVAL, FARMER_DATASET, MARKET_DATASET, FALLBACK_DATA_DIR, DB_PATH, LLM_CACHE_PATH,
+                         LLM_CONCURRENCY)
 
-# 🌦 WeatherAPI Configuration
-WEATHER_API_KEY = "YOUR_API_KEY"
 DEFAULT_CITY = "CITY"  # Default location
 
-# 🌱 Load CSV Datasets (Farmer Advisor & Market Researcher)
-try:
-    base_path = os.path.dirname(os.path.abspath(__file__))
-except NameError:
-    base_path = os.getcwd()
-
-farmer_data_path = os.path.join(base_path, "farmer_advisor_dataset.xlsx")
-market_data_path = os.path.join(base_path, "market_researcher_dataset.xlsx")
-
-# Check if files exist, if not use the original paths
-if not os.path.exists(farmer_data_path):
-    farmer_data_path = r"C:\Users\suman\OneDrive\Desktop\farmer_advisor_dataset.xlsx"
-if not os.path.exists(market_data_path):
-    market_data_path = r"C:\Users\suman\OneDrive\Desktop\market_researcher_dataset.xlsx"
-
-farmer_data = pd.read_excel(farmer_data_path)
-market_data = pd.read_excel(market_data_path)
-
-# 📂 SQLite Database Setup (Thread-Safe)
-conn = sqlite3.connect("agriculture_ai.db", check_same_thread=False)
-cursor = conn.cursor()
-cursor.execute('''
-    CREATE TABLE IF NOT EXISTS farmer_recommendations (
-        id INTEGER PRIMARY KEY,
-        farmer_name TEXT,
-        suggested_crop TEXT,
-        soil_ph REAL,
-        soil_moisture REAL,
-        temperature REAL,
-        rainfall REAL,
-        sustainability_score REAL,
-        weather_condition TEXT,
-        market_price REAL,
-        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-    )
-''')
-conn.commit()
+# ⏱️ Agent schedule: polls only look for changes, the agents run when something changed
+WEATHER_INTERVAL = float(os.environ.get("AGRI_WEATHER_INTERVAL", 60))  # Seconds between weather polls
+WEATHER_TEMP_THRESHOLD = 1.0  # °C change that counts as new weather for the advisor
+ADVISOR_DEBOUNCE = 1.0  # Seconds to let related changes settle before asking the LLM again
+MARKET_DEBOUNCE = 5.0  # Seconds to batch saved recommendations before backfilling prices
+
+# Keep the old module-level names working for code that imports this module as a library
+# The app's frames sit on read-only memory maps of the dataset cache, so the old
+# farmer_data/market_data names hand out a writable copy, made once per loaded frame.
+_writable_frames = {}
+
+def __getattr__(name):
+    if name in ("farmer_data", "market_data"):
+        frame = getattr(app, name)
+        source, writable = _writable_frames.get(name, (None, None))
+        if source is not frame:
+            writable = frame.copy()
+            _writable_frames[name] = (frame, writable)
+        return writable
+    if name in ("crop_index", "db"):
+        return getattr(app, name)
+    if name == "conn":
+        return app.db.reader()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # Global variables for UI
 weather_data_global = {"temp": 0, "condition": "Unknown", "humidity": 0, "wind": 0}
+weather_trend_global = None  # weather_history.summary() for the current city
 recommendations_global = []
 market_data_global = []
+market_chart = None
 current_farmer_name = ""
 current_city = DEFAULT_CITY
+last_advice = None
+streaming_pieces = []  # Suggestion text received so far while TinyLlama is generating
+advisor_cancel = threading.Event()
+bus = None  # EventBus driving the agents
+ui = None  # UiPump; background threads post UI updates here instead of touching Tk
 
-# 🔄 Function to ensure thread-safe database transactions
+# 🔄 Function to ensure thread-safe database transactions (runs on the writer thread)
 def execute_db_query(query, params=()):
     try:
-        cursor.execute(query, params)
-        conn.commit()
-        return cursor.lastrowid
+        return app.db.execute(query, params)
     except sqlite3.Error as e:
         print("⚠️ Database Error:", e)
         return None
 
-# 🌦 Weather Agent (Fetches real-time weather data)
-def weather_agent():
-    global weather_data_global, current_city
-    while True:
-        try:
-            city = current_city  # Use the current city from UI
-            response = requests.get(f"https://api.weatherapi.com/v1/current.json?key={WEATHER_API_KEY}&q={city}")
-            weather_data = response.json()
-            
-            weather_data_global = {
-                "temp": weather_data["current"]["temp_c"],
-                "condition": weather_data["current"]["condition"]["text"],
-                "humidity": weather_data["current"]["humidity"],
-                "wind": weather_data["current"]["wind_kph"]
-            }
-            
-            print(f"🌦 Weather Update: {weather_data_global['temp']}°C, {weather_data_global['condition']}")
-            
-            # Update UI with weather data
-            if 'update_weather_ui' in globals():
-                root.after(0, update_weather_ui)
-
-        except Exception as e:
-            print("⚠️ Weather API Error:", e)
-            weather_data_global = {"temp": 0, "condition": "Error fetching weather", "humidity": 0, "wind": 0}
-        
-        time.sleep(60)  # Fetch weather every 60 seconds
+# 💾 Save a recommendation together with the crops parsed from its suggestion
+def save_recommendation(values):
+    try:
+        return app.db.write(storage.insert_recommendation, values, app.crop_vocabulary)
+    except sqlite3.Error as e:
+        print("⚠️ Database Error:", e)
+        return None
 
-# 👨‍🌾 Farmer Advisor Agent (Suggests best crops using TinyLlama)
-def farmer_advisor_agent():
-    global recommendations_global, current_farmer_name
-    while True:
-        try:
-            if current_farmer_name:  # Only run if farmer name is provided
-                # Get optimal crop recommendation based on dataset
-                best_crop_row = farmer_data.sort_values("Sustainability_Score", ascending=False).iloc[0]
-                best_crop = best_crop_row["Crop_Type"]
-                soil_ph = best_crop_row["Soil_pH"]
-                soil_moisture = best_crop_row["Soil_Moisture"]
-                temperature = best_crop_row["Temperature_C"]
-                rainfall = best_crop_row["Rainfall_mm"]
-                sustainability_score = best_crop_row["Sustainability_Score"]
-
-                # AI Model Query using TinyLlama
-                user_input = f"Suggest 5 crops for {current_farmer_name} based on: Soil pH: {soil_ph}, Moisture: {soil_moisture}, Temperature: {temperature}°C, Rainfall: {rainfall}mm."
-                
-                try:
-                    response = ollama.chat(model="tinyllama", messages=[{"role": "user", "content": user_input}])
-                    ai_suggestion = response["message"]["content"]
-                except Exception as ollama_error:
-                    print(f"⚠️ Ollama AI Error: {ollama_error}")
-                    ai_suggestion = f"Based on your conditions, consider these crops: {best_crop}, Rice, Wheat, Millet, and Sorghum."
-                
-                print(f"👨‍🌾 Farmer Advisor Suggestion for {current_farmer_name}: {ai_suggestion}")
-
-                # Save AI suggestion to SQLite
-                record_id = execute_db_query(
-                    "INSERT INTO farmer_recommendations (farmer_name, suggested_crop, soil_ph, soil_moisture, temperature, rainfall, sustainability_score, weather_condition, market_price) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
-                    (current_farmer_name, ai_suggestion, soil_ph, soil_moisture, temperature, rainfall, sustainability_score, weather_data_global["condition"], 0)
-                )
-                
-                # Update recommendations global
-                recommendations_global = [(record_id, current_farmer_name, ai_suggestion, sustainability_score)]
-                
-                # Update UI with recommendations
-                if 'update_recommendations_ui' in globals():
-                    root.after(0, update_recommendations_ui)
+# 🌦 Weather Agent (runs on each poll and when a farmer is submitted)
+def weather_agent(events):
+    global weather_data_global
+    submitted = events.get("farmer.submitted")
+    city = current_city  # Use the current city from UI
+    previous = weather_data_global
+    try:
+        weather = dict(app.weather.get(city))
+        record_weather(city, weather)
+    except Exception as e:
+        print("⚠️ Weather API Error:", e)
+        weather = {"temp": 0, "condition": "Error fetching weather", "humidity": 0, "wind": 0}
+        if submitted:
+            ui.post(set_status, f"Error fetching weather for {city}. Using default data.")
+    
+    if weather != previous:
+        weather_data_global = weather
+        print(f"🌦 Weather Update: {weather['temp']}°C, {weather['condition']}")
+        ui.post(update_weather_ui)
+    
+    # Only a new condition or a real temperature move is worth a new recommendation
+    if weather["condition"] != previous["condition"] or abs(weather["temp"] - previous["temp"]) >= WEATHER_TEMP_THRESHOLD:
+        bus.publish("weather.changed", weather)
+    if submitted:
+        bus.publish("farmer.ready", submitted)
 
-        except Exception as e:
-            print("⚠️ Farmer Advisor Error:", e)
+# 🗓️ Keep the reading in the city's weather history and refresh the trend shown in the UI
+def record_weather(city, weather):
+    global weather_trend_global
+    try:
+        app.db.write(weather_history.record_sample, city, weather)
+        trend = weather_history.summary(app.db.reader(), city)
+    except sqlite3.Error as e:
+        print("⚠️ Weather History Error:", e)
+        return
+    if trend != weather_trend_global:
+        weather_trend_global = trend
+        ui.post(update_weather_ui)
 
-        time.sleep(30)  # Runs every 30 seconds
+# 👨‍🌾 Farmer Advisor Agent (runs when the farmer, the weather or the market changed)
+# The answer is streamed into the recommendations panel as TinyLlama generates it and
+# saved only once it is complete; the Cancel button stops it.
+def farmer_advisor_agent(events):
+    global recommendations_global, last_advice, streaming_pieces
+    farmer_name, city = current_farmer_name, current_city
+    if not farmer_name:  # Only run if farmer name is provided
+        return
+    submitted = "farmer.ready" in events
+    try:
+        # Crops ranked for the current conditions, explained by TinyLlama
+        start = time.perf_counter()
+        plan = advisor_engine.prepare(app, AdvisorJob(farmer_name, city), weather_data_global)
+        
+        # Same farmer, same conditions: the answer on screen is still current
+        if not submitted and last_advice == (farmer_name, plan.prompt):
+            return
+        
+        advisor_cancel.clear()
+        streaming_pieces = []
+        first_token = None
+        ui.post(set_generating, True)
+        try:
+            for piece in app.llm.stream(plan.prompt, cancel=advisor_cancel):
+                if first_token is None:
+                    first_token = time.perf_counter() - start
+                    ui.post(set_status, f"Generating for {farmer_name}... (first token in {first_token * 1000:.0f} ms)")
+                streaming_pieces.append(piece)
+                ui.post(update_streaming_ui, farmer_name)
+            ai_suggestion = "".join(streaming_pieces)
+            last_advice = (farmer_name, plan.prompt)
+        except LLMCancelled:
+            print(f"⏹️ Recommendation for {farmer_name} cancelled")
+            ui.post(update_recommendations_ui)
+            ui.post(set_status, "Generation cancelled.")
+            return
+        except Exception as ollama_error:
+            print(f"⚠️ Ollama AI Error: {ollama_error}")
+            ai_suggestion = plan.fallback
+            last_advice = None
+        finally:
+            ui.post(set_generating, False)
+        
+        total = time.perf_counter() - start
+        timing = f"first token in {first_token * 1000:.0f} ms, done in {total:.1f}s" if first_token is not None else f"done in {total:.1f}s"
+        print(f"👨‍🌾 Farmer Advisor Suggestion for {farmer_name} ({timing}): {ai_suggestion}")
+        print(app.llm.format_stats())
+        
+        # Save AI suggestion to SQLite
+        values = advisor_engine.plan_values(plan, ai_suggestion)
+        record_id = save_recommendation(values)
+        
+        # Update recommendations global and the UI
+        recommendations_global = [(record_id, farmer_name, ai_suggestion, plan.sustainability_score)]
+        ui.post(update_recommendations_ui)
+        if submitted:
+            ui.post(set_status, f"Recommendations generated for {farmer_name}! ({timing})")
+        bus.publish("recommendation.saved", record_id)
+    except Exception as e:
+        print("⚠️ Farmer Advisor Error:", e)
+        if submitted:
+            ui.post(set_status, "Error generating recommendations. Please try again.")
 
-# 📊 Market Researcher Agent (Analyzes profitable crops)
-def market_researcher_agent():
+# 📊 Market Researcher Agent (runs on each market check and after new recommendations)
+def market_researcher_agent(events):
     global market_data_global
-    while True:
+    # Top 5 products by latest price, served from the precomputed market aggregates
+    if "market.tick" in events:
+        app.refresh_market()
+    top_crops = app.market.top_k(5)
+    prices_changed = top_crops != market_data_global
+    
+    if prices_changed:
+        market_data_global = top_crops
+        print(f"📊 Market Research: Top crop is {market_data_global[0][0]} at ₹{market_data_global[0][1]}/ton")
+        ui.post(update_market_ui)
+        bus.publish("market.changed", top_crops)
+    
+    # Update database with market prices in one indexed, set-based transaction,
+    # but only when prices moved or new recommendations were saved
+    if prices_changed or "recommendation.saved" in events:
         try:
-            # Find top 5 profitable crops based on market trends
-            top_crops = market_data.sort_values("Market_Price_per_ton", ascending=False).head(5)
-            
-            market_data_global = []
-            for _, row in top_crops.iterrows():
-                product = row["Product"]
-                price = row["Market_Price_per_ton"]
-                market_data_global.append((product, price))
-                
-                # Update database with market price if crop exists
-                execute_db_query("UPDATE farmer_recommendations SET market_price = ? WHERE suggested_crop LIKE ?", 
-                               (price, f"%{product}%"))
-            
-            print(f"📊 Market Research: Top crop is {market_data_global[0][0]} at ₹{market_data_global[0][1]}/ton")
-            
-            # Update UI with market data
-            if 'update_market_ui' in globals():
-                root.after(0, update_market_ui)
-
-        except Exception as e:
-            print("⚠️ Market Research Error:", e)
+            app.db.write(storage.index_pending_recommendations, app.crop_vocabulary)
+            app.db.write(storage.backfill_market_prices, market_data_global)
+        except sqlite3.Error as e:
+            print("⚠️ Database Error:", e)
 
-        time.sleep(60)  # Runs every 60 seconds
+# 📣 Wire the agents to their events and start the scheduler
+def start_agents():
+    global bus
+    bus = EventBus()
+    bus.subscribe(weather_agent, "weather.tick", "farmer.submitted")
+    bus.subscribe(farmer_advisor_agent, "farmer.ready", "weather.changed", "market.changed", debounce=ADVISOR_DEBOUNCE)
+    bus.subscribe(market_researcher_agent, "market.tick", "recommendation.saved", debounce=MARKET_DEBOUNCE)
+    bus.every(WEATHER_INTERVAL, "weather.tick")
+    bus.every(MARKET_INTERVAL, "market.tick")
+    return bus.start()
 
 # 🖼️ Create a function to get crop placeholder image
-def get_crop_placeholder(crop_name="Generic"):
-    # Create a simple colored placeholder with crop name
-    fig, ax = plt.subplots(figsize=(3, 3))
-    ax.text(0.5, 0.5, f"{crop_name}", fontsize=20, ha='center', va='center')
-    ax.set_facecolor('#e0f0e0')  # Light green background
-    ax.axis('off')
-    
-    # Convert to image
-    buf = io.BytesIO()
-    fig.savefig(buf, format='png')
-    buf.seek(0)
-    img = Image.open(buf)
-    plt.close(fig)
-    
-    return ImageTk.PhotoImage(img)
+def get_crop_placeholder(crop_name="Generic", size=IMAGE_SIZE):
+    return app.crop_images.get_photo(crop_name, size)
+
+# 🌾 Card image for a saved recommendation: its first mentioned crop
+def recommendation_photo(row):
+    crops = storage.parse_crops(row[2], app.crop_vocabulary)
+    return get_crop_placeholder(crops[0] if crops else "Generic")
 
 # 📊 Create Chart for Top Profitable Crops
 def create_profitability_chart(frame):
-    global market_chart_canvas
-    
-    # Create matplotlib figure
-    fig, ax = plt.subplots(figsize=(8, 4))
-    fig.patch.set_facecolor('#f0f0f0')
-    
-    # Initial empty chart
-    crops = [item[0] for item in market_data_global] if market_data_global else ["No Data"]
-    prices = [item[1] for item in market_data_global] if market_data_global else [0]
+    global market_chart
     
-    bars = ax.bar(crops, prices, color='#4CAF50')
-    ax.set_ylabel('Price (₹/ton)')
-    ax.set_title('Top 5 Most Profitable Crops')
-    plt.xticks(rotation=45, ha='right')
-    plt.tight_layout()
+    # Replace the loading placeholder with a chart that is created once and updated in place
+    for widget in frame.winfo_children():
+        widget.destroy()
+    market_chart = app.charting.MarketChart(app.charting.FigureCanvasTkAgg, master=frame)
+    market_chart.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+    market_chart.update(market_data_global)
     
-    # Create canvas
-    canvas = FigureCanvasTkAgg(fig, master=frame)
-    canvas_widget = canvas.get_tk_widget()
-    canvas_widget.pack(fill=tk.BOTH, expand=True)
-    
-    return canvas
+    return market_chart
 
-# 📤 Export recommendations to Excel
+# 📤 Export recommendations (streamed in chunks on a background thread)
 def export_to_excel():
-    try:
-        # Query all recommendations from database
-        cursor.execute("""
-            SELECT farmer_name, suggested_crop, soil_ph, soil_moisture, temperature, 
-                   rainfall, sustainability_score, weather_condition, market_price
-            FROM farmer_recommendations
-        """)
-        
-        data = cursor.fetchall()
-        
-        if not data:
-            messagebox.showinfo("Export Info", "No data available to export.")
+    dialog = tk.Toplevel(root)
+    dialog.title("Export Recommendations")
+    dialog.configure(bg="white", padx=15, pady=15)
+    dialog.transient(root)
+    
+    # Optional filters, applied inside the SQL query
+    entries = {}
+    for row, (key, label) in enumerate((("farmer", "Farmer Name:"), ("since", "From (YYYY-MM-DD):"),
+                                        ("until", "To (YYYY-MM-DD):"), ("crop", "Crop:"))):
+        tk.Label(dialog, text=label, bg="white").grid(row=row, column=0, sticky=tk.W, pady=2)
+        entries[key] = tk.Entry(dialog, font=("Graphik", 10), width=28)
+        entries[key].grid(row=row, column=1, pady=2)
+    
+    progress_bar = ttk.Progressbar(dialog, mode="determinate", maximum=1)
+    progress_bar.grid(row=4, column=0, columnspan=2, sticky="ew", pady=(10, 5))
+    progress_label = tk.Label(dialog, text="Leave filters empty to export everything", bg="white")
+    progress_label.grid(row=5, column=0, columnspan=2, sticky=tk.W)
+    
+    cancel_event = threading.Event()
+    
+    def on_progress(done, total):
+        def show():
+            progress_bar.config(maximum=max(total, 1), value=done)
+            progress_label.config(text=f"Exported {done:,} of {total:,} rows")
+        ui.post(show)
+    
+    # Counting a large filtered history can take a while, so it happens here too, not on the Tk thread
+    def run_export(file_path, filters):
+        try:
+            ui.post(lambda: progress_label.config(text="Counting matching rows..."))
+            total = exporter.count_rows(app.db.reader(), filters)
+            if total == 0:
+                def nothing_to_export():
+                    export_button.config(state=tk.NORMAL)
+                    progress_label.config(text="Leave filters empty to export everything")
+                    messagebox.showinfo("Export Info", "No data available to export.", parent=dialog)
+                ui.post(nothing_to_export)
+                return
+            count = exporter.export(app.db.reader(), file_path, filters, progress=on_progress, cancel=cancel_event,
+                                    total=total)
+            ui.post(lambda: (dialog.destroy(), messagebox.showinfo("Export Success", f"{count:,} rows exported successfully to {file_path}")))
+        except exporter.ExportCancelled:
+            ui.post(dialog.destroy)
+        except Exception as e:
+            ui.post(lambda: (dialog.destroy(), messagebox.showerror("Export Error", f"Failed to export data: {str(e)}")))
+        finally:
+            app.db.release_reader()
+    
+    def start_export():
+        try:
+            filters = exporter.ExportFilters(
+                entries["farmer"].get().strip() or None, entries["since"].get().strip() or None,
+                entries["until"].get().strip() or None, canonical_crop(entries["crop"].get())
+            )
+        except Exception as e:
+            messagebox.showerror("Export Error", f"Failed to export data: {str(e)}", parent=dialog)
             return
-            
-        # Create DataFrame
-        columns = ["Farmer Name", "Suggested Crops", "Soil pH", "Soil Moisture", 
-                   "Temperature (°C)", "Rainfall (mm)", "Sustainability Score", 
-                   "Weather Condition", "Market Price (₹/ton)"]
-        
-        df = pd.DataFrame(data, columns=columns)
         
         # Ask for save location
         file_path = filedialog.asksaveasfilename(
+            parent=dialog,
             defaultextension=".xlsx",
-            filetypes=[("Excel files", "*.xlsx"), ("All files", "*.*")],
+            filetypes=[("Excel files", "*.xlsx"), ("CSV files", "*.csv"), ("Parquet files", "*.parquet"),
+                       ("Gzipped JSON Lines", "*.jsonl.gz"), ("All files", "*.*")],
             title="Save Recommendations"
         )
-        
-        if file_path:
-            df.to_excel(file_path, index=False)
-            messagebox.showinfo("Export Success", f"Data exported successfully to {file_path}")
-    
-    except Exception as e:
-        messagebox.showerror("Export Error", f"Failed to export data: {str(e)}")
+        if not file_path:
+            return
+        export_button.config(state=tk.DISABLED)
+        threading.Thread(target=run_export, args=(file_path, filters), daemon=True).start()
+    
+    def cancel():
+        cancel_event.set()
+        if export_button["state"] != tk.DISABLED:
+            dialog.destroy()
+    
+    button_frame = tk.Frame(dialog, bg="white")
+    button_frame.grid(row=6, column=0, columnspan=2, sticky="ew", pady=(10, 0))
+    export_button = tk.Button(button_frame, text="Export...", command=start_export,
+                              bg="#2196F3", fg="white", padx=10, pady=3, font=("Graphik", 10, "bold"))
+    export_button.pack(side=tk.LEFT)
+    tk.Button(button_frame, text="Cancel", command=cancel, padx=10, pady=3).pack(side=tk.RIGHT)
+    dialog.protocol("WM_DELETE_WINDOW", cancel)
 
 # 🔄 Update Weather UI function
 def update_weather_ui():
@@ -260,38 +332,37 @@ def update_weather_ui():
         weather_condition_label.config(text=f"{weather_data_global['condition']}")
         weather_humidity_label.config(text=f"Humidity: {weather_data_global['humidity']}%")
         weather_wind_label.config(text=f"Wind: {weather_data_global['wind']} km/h")
+        if weather_trend_global:
+            weather_trend_label.config(text=weather_history.format_summary(weather_trend_global))
     except Exception as e:
         print(f"Error updating weather UI: {e}")
 
-# 🔄 Update Recommendations UI function
+# 🔄 Update Recommendations UI function (history is paged from SQLite by the list)
 def update_recommendations_ui():
     try:
-        # Clear existing recommendations
-        for widget in recommendations_frame.winfo_children():
-            widget.destroy()
-            
-        # Create new recommendations display
-        if recommendations_global:
-            for rec_id, farmer, suggestion, score in recommendations_global:
-                recommendation_text = f"Farmer: {farmer}\nSuggestion: {suggestion}\nSustainability Score: {score}"
-                rec_label = tk.Label(recommendations_frame, text=recommendation_text, 
-                                    font=("Graphik", 10), bg='white', padx=10, pady=10,
-                                    wraplength=300, justify="left", relief="ridge", bd=1)
-                rec_label.pack(fill=tk.X, padx=10, pady=5)
-                
-                # Extract first crop from suggestion for image
-                first_crop = suggestion.split(",")[0].split(":")[-1].strip()
-                if ":" not in first_crop:
-                    first_crop = first_crop.split(" ")[-1]
-                
-                # Create image placeholder
-                img = get_crop_placeholder(first_crop)
-                img_label = tk.Label(recommendations_frame, image=img, bg='white')
-                img_label.image = img  # Keep reference
-                img_label.pack(padx=10, pady=5)
+        recommendations_list.set_pending(None)
+        recommendations_list.refresh()
     except Exception as e:
         print(f"Error updating recommendations UI: {e}")
 
+# 🌊 Show the suggestion received so far (called at most once per UI frame)
+def update_streaming_ui(farmer_name):
+    try:
+        text = "".join(streaming_pieces)
+        if len(text) > SUGGESTION_CHARS:  # Keep the newest words in view
+            text = "…" + text[-SUGGESTION_CHARS:]
+        recommendations_list.set_pending(f"Farmer: {farmer_name}\nSuggestion: {text}▌")
+    except Exception as e:
+        print(f"Error updating streaming UI: {e}")
+
+def set_generating(active):
+    cancel_button.config(state=tk.NORMAL if active else tk.DISABLED)
+
+# ⏹️ Stop the recommendation TinyLlama is generating
+def cancel_generation():
+    advisor_cancel.set()
+    status_label.config(text="Cancelling...")
+
 # 🔄 Update Market UI function
 def update_market_ui():
     try:
@@ -301,28 +372,12 @@ def update_market_ui():
                 market_tree.item(market_tree.get_children()[i], values=(crop, f"₹{price}/ton"))
             else:
                 market_tree.insert("", "end", values=(crop, f"₹{price}/ton"))
-                
-        # Update chart
-        if hasattr(update_market_ui, 'chart_canvas'):
-            update_market_ui.chart_canvas.get_tk_widget().destroy()
-            
-        fig, ax = plt.subplots(figsize=(8, 4))
-        fig.patch.set_facecolor('#f0f0f0')
-        
-        crops = [item[0] for item in market_data_global]
-        prices = [item[1] for item in market_data_global]
-        
-        bars = ax.bar(crops, prices, color='#4CAF50')
-        ax.set_ylabel('Price (₹/ton)')
-        ax.set_title('Top 5 Most Profitable Crops')
-        plt.xticks(rotation=45, ha='right')
-        plt.tight_layout()
-        
-        canvas = FigureCanvasTkAgg(fig, master=chart_frame)
-        canvas_widget = canvas.get_tk_widget()
-        canvas_widget.pack(fill=tk.BOTH, expand=True)
-        update_market_ui.chart_canvas = canvas
-        canvas.draw()
+        for item in market_tree.get_children()[len(market_data_global):]:
+            market_tree.delete(item)
+
+        # Update chart bars in place (the background loader creates it once matplotlib is imported)
+        if market_chart is not None:
+            market_chart.update(market_data_global)
     except Exception as e:
         print(f"Error updating market UI: {e}")
 
@@ -346,72 +401,17 @@ def submit_farmer_info():
     # Update UI
     status_label.config(text=f"Processing recommendations for {farmer_name} in {city}...")
     
-    # Trigger immediate weather update
-    try:
-        response = requests.get(f"https://api.weatherapi.com/v1/current.json?key={WEATHER_API_KEY}&q={city}")
-        weather_data = response.json()
-        
-        weather_data_global.update({
-            "temp": weather_data["current"]["temp_c"],
-            "condition": weather_data["current"]["condition"]["text"],
-            "humidity": weather_data["current"]["humidity"],
-            "wind": weather_data["current"]["wind_kph"]
-        })
-        
-        update_weather_ui()
-    except Exception as e:
-        print(f"Error updating weather: {e}")
-        status_label.config(text=f"Error fetching weather for {city}. Using default data.")
-    
-    # Call farmer advisor manually
-    threading.Thread(target=run_advisor_once).start()
-
-# Run advisor once immediately
-def run_advisor_once():
-    try:
-        # Get optimal crop recommendation based on dataset
-        best_crop_row = farmer_data.sort_values("Sustainability_Score", ascending=False).iloc[0]
-        best_crop = best_crop_row["Crop_Type"]
-        soil_ph = best_crop_row["Soil_pH"]
-        soil_moisture = best_crop_row["Soil_Moisture"]
-        temperature = best_crop_row["Temperature_C"]
-        rainfall = best_crop_row["Rainfall_mm"]
-        sustainability_score = best_crop_row["Sustainability_Score"]
-
-        # AI Model Query using TinyLlama
-        user_input = f"Suggest 5 crops for {current_farmer_name} based on: Soil pH: {soil_ph}, Moisture: {soil_moisture}, Temperature: {temperature}°C, Rainfall: {rainfall}mm."
-        
-        try:
-            response = ollama.chat(model="tinyllama", messages=[{"role": "user", "content": user_input}])
-            ai_suggestion = response["message"]["content"]
-        except Exception as ollama_error:
-            print(f"⚠️ Ollama AI Error: {ollama_error}")
-            ai_suggestion = f"Based on your conditions, consider these crops: {best_crop}, Rice, Wheat, Millet, and Sorghum."
-        
-        print(f"👨‍🌾 Farmer Advisor Suggestion for {current_farmer_name}: {ai_suggestion}")
+    # The weather agent fetches the farmer's weather, then the advisor runs
+    bus.publish("farmer.submitted", (farmer_name, city))
 
-        # Save AI suggestion to SQLite
-        record_id = execute_db_query(
-            "INSERT INTO farmer_recommendations (farmer_name, suggested_crop, soil_ph, soil_moisture, temperature, rainfall, sustainability_score, weather_condition, market_price) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
-            (current_farmer_name, ai_suggestion, soil_ph, soil_moisture, temperature, rainfall, sustainability_score, weather_data_global["condition"], 0)
-        )
-        
-        # Update recommendations global
-        global recommendations_global
-        recommendations_global = [(record_id, current_farmer_name, ai_suggestion, sustainability_score)]
-        
-        # Update UI with recommendations
-        root.after(0, update_recommendations_ui)
-        root.after(0, lambda: status_label.config(text=f"Recommendations generated for {current_farmer_name}!"))
-    except Exception as e:
-        print(f"Error in run_advisor_once: {e}")
-        root.after(0, lambda: status_label.config(text=f"Error generating recommendations. Please try again."))
+def set_status(text):
+    status_label.config(text=text)
 
 # 🎨 Create the user interface
 def create_ui():
     global root, farmer_name_entry, city_entry, weather_temp_label, weather_condition_label
-    global weather_humidity_label, weather_wind_label, recommendations_frame, status_label
-    global market_tree, chart_frame, market_chart_canvas
+    global weather_humidity_label, weather_wind_label, weather_trend_label, recommendations_list, status_label
+    global market_tree, chart_frame, loading_progress, cancel_button
     
     # Create main window
     root = tk.Tk()
@@ -456,11 +456,19 @@ def create_ui():
     
     submit_button = tk.Button(input_frame, text="Get Recommendations", command=submit_farmer_info, 
                               bg="#4CAF50", fg="white", padx=10, pady=5, font=("Graphik", 10, "bold"))
-    submit_button.pack(fill=tk.X, pady=10)
+    submit_button.pack(fill=tk.X, pady=(10, 0))
+    
+    cancel_button = tk.Button(input_frame, text="Cancel", command=cancel_generation, state=tk.DISABLED,
+                              padx=10, pady=2, font=("Graphik", 10))
+    cancel_button.pack(fill=tk.X, pady=(5, 10))
     
     status_label = tk.Label(input_frame, text="Enter farmer information to start", bg="white", wraplength=250)
     status_label.pack(fill=tk.X, pady=5)
     
+    # Progress bar shown while datasets load in the background
+    loading_progress = ttk.Progressbar(input_frame, mode="determinate", maximum=1)
+    loading_progress.pack(fill=tk.X, pady=(0, 5))
+    
     # Weather section
     weather_frame = tk.LabelFrame(left_frame, text="🌦️ Weather Information", bg="white", padx=10, pady=10, font=("Graphik", 12, "bold"))
     weather_frame.pack(fill=tk.X, pady=(0, 10))
@@ -477,6 +485,10 @@ def create_ui():
     weather_wind_label = tk.Label(weather_frame, text="Wind: -- km/h", bg="white")
     weather_wind_label.pack(anchor=tk.W)
     
+    weather_trend_label = tk.Label(weather_frame, text="Collecting weather history...", bg="white", fg="#666",
+                                   justify="left", wraplength=250)
+    weather_trend_label.pack(anchor=tk.W, pady=(10, 0))
+    
     # Create middle column - Recommendations
     middle_frame = tk.Frame(content_frame, bg="#f0f0f0", width=350)
     middle_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=10)
@@ -485,23 +497,10 @@ def create_ui():
     recommendations_label_frame = tk.LabelFrame(middle_frame, text="🤖 AI Crop Recommendations", bg="white", padx=10, pady=10, font=("Graphik", 12, "bold"))
     recommendations_label_frame.pack(fill=tk.BOTH, expand=True)
     
-    # Scrollable frame for recommendations
-    recommendations_canvas = tk.Canvas(recommendations_label_frame, bg="white")
-    scrollbar = ttk.Scrollbar(recommendations_label_frame, orient="vertical", command=recommendations_canvas.yview)
-    scrollable_frame = tk.Frame(recommendations_canvas, bg="white")
-    
-    scrollable_frame.bind(
-        "<Configure>",
-        lambda e: recommendations_canvas.configure(scrollregion=recommendations_canvas.bbox("all"))
-    )
-    
-    recommendations_canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
-    recommendations_canvas.configure(yscrollcommand=scrollbar.set)
-    
-    recommendations_canvas.pack(side="left", fill="both", expand=True)
-    scrollbar.pack(side="right", fill="y")
-    
-    recommendations_frame = scrollable_frame
+    # Virtualized history of recommendations, paged lazily from SQLite
+    recommendation_pages = RecommendationPages(lambda: app.db.reader(), on_loaded=lambda: ui.post(recommendations_list.redraw))
+    recommendations_list = RecommendationList(recommendations_label_frame, recommendation_pages, photo_for=recommendation_photo)
+    recommendations_list.pack(fill="both", expand=True)
     
     # Export button
     export_button = tk.Button(middle_frame, text="📄 Export to Excel", command=export_to_excel, 
@@ -534,8 +533,8 @@ def create_ui():
     chart_frame = tk.Frame(market_frame, bg="white", padx=10, pady=10)
     chart_frame.pack(fill=tk.BOTH, expand=True)
     
-    # Create initial chart
-    update_market_ui.chart_canvas = create_profitability_chart(chart_frame)
+    # The chart is created once matplotlib has loaded in the background
+    tk.Label(chart_frame, text="Loading chart...", fg="#555555", bg="white").pack(expand=True)
     
     # Create footer
     footer_frame = tk.Frame(root, bg="#f0f0f0", padx=20, pady=10)
@@ -551,23 +550,152 @@ def create_ui():
     
     return root
 
+# ⏳ Show background loading progress
+def show_loading_progress(step, total, label):
+    try:
+        loading_progress.config(maximum=total, value=step)
+        if step < total:
+            status_label.config(text=f"{label}...")
+            return
+        loading_progress.pack_forget()
+        status_label.config(text="Enter farmer information to start")
+        if market_chart is None:
+            create_profitability_chart(chart_frame)
+        recommendations_list.refresh()
+    except Exception as e:
+        print(f"Error updating loading progress: {e}")
+
+# 📦 Load datasets, database, matplotlib and ollama off the UI thread
+def load_resources_in_background():
+    def progress(step, total, label):
+        ui.post(show_loading_progress, step, total, label)
+    try:
+        start = time.perf_counter()
+        app.preload(progress)
+        print(f"📦 Background resources ready in {time.perf_counter() - start:.2f}s")
+    except Exception as e:
+        print("⚠️ Startup Load Error:", e)
+        ui.post(set_status, f"Error loading data: {e}")
+
+# ⏱️ `python -X importtime`-style report of what importing this module costs
+def print_startup_report(top=10):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import agri_code"],
+        capture_output=True, text=True, cwd=app.base_path
+    )
+    # Children are listed before their parent, one level of indentation deeper
+    children, module_us, imports = [], 0, []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        if depth == 1:
+            children.append((int(cumulative_us), name.strip()))
+        elif depth == 0:
+            if name.strip() == "agri_code":
+                module_us, imports = int(cumulative_us), children
+            children = []
+    imports.sort(reverse=True)
+    print(f"⏱️ import agri_code: {module_us / 1000:.1f} ms")
+    for us, name in imports[:top]:
+        print(f"   {us / 1000:8.1f} ms  {name}")
+
+    # Time what used to happen at import and now happens in the background
+    timings = []
+    def progress(step, total, label):
+        timings.append((time.perf_counter(), label))
+    app.preload(progress)
+    print("⏳ Deferred to background loading:")
+    for (start, label), (end, _) in zip(timings, timings[1:]):
+        print(f"   {(end - start) * 1000:8.1f} ms  {label}")
+    print(f"   {(timings[-1][0] - timings[0][0]) * 1000:8.1f} ms  total")
+
 # 🚀 Start the application
-if __name__ == "__main__":
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Agriculture AI Advisor")
+    parser.add_argument("--startup-report", action="store_true",
+                        help="print import and deferred-load timings instead of starting the UI")
+    parser.add_argument("--farmers", metavar="CSV",
+                        help="generate recommendations for every farmer in CSV without starting the UI")
+    parser.add_argument("--concurrency", type=int, default=4,
+                        help="parallel LLM requests for --farmers (default: 4)")
+    parser.add_argument("--export", metavar="PATH",
+                        help="export recommendations to .xlsx, .csv, .parquet or .jsonl.gz without starting the UI")
+    parser.add_argument("--farmer", help="only export this farmer's recommendations")
+    parser.add_argument("--since", metavar="YYYY-MM-DD", help="only export recommendations from this date")
+    parser.add_argument("--until", metavar="YYYY-MM-DD", help="only export recommendations up to this date")
+    parser.add_argument("--crop", help="only export recommendations mentioning this crop")
+    parser.add_argument("--compact", action="store_true",
+                        help="migrate and VACUUM the database (close the app first), then exit")
+    parser.add_argument("--metrics-port", type=int, metavar="PORT",
+                        help="serve Prometheus metrics on http://127.0.0.1:PORT/metrics")
+    parser.add_argument("--metrics-log", metavar="PATH", help="append a JSON metrics snapshot to PATH every minute")
+    parser.add_argument("--profile", action="store_true",
+                        help="sample stacks and allocations, and print a profile report on exit")
+    args = parser.parse_args(argv)
+
+    if args.metrics_port:
+        metrics.serve(args.metrics_port)
+    if args.metrics_log:
+        metrics.log_periodically(args.metrics_log)
+    profiler = metrics.Profiler().start() if args.profile else None
+    try:
+        run_app(args)
+    finally:
+        if profiler is not None:
+            profiler.stop()
+            print(profiler.report())
+        if metrics.enabled and not args.metrics_port:
+            print(metrics.prometheus_text())
+
+# 🏃 Run the mode selected on the command line (the desktop UI by default)
+def run_app(args):
+    if args.startup_report:
+        print_startup_report()
+        app.close()
+        return
+
+    if args.compact:
+        before, after = storage.compact(app.db_path)
+        print(f"🧹 {app.db_path}: {before / 1e6:.1f} MB -> {after / 1e6:.1f} MB")
+        return
+
+    if args.export:
+        filters = exporter.ExportFilters(args.farmer, args.since, args.until, canonical_crop(args.crop))
+        count = exporter.export(app.db.reader(), args.export, filters,
+                                progress=lambda done, total: print(f"📤 {done:,}/{total:,} rows", end="\r"))
+        print(f"\n📤 Exported {count:,} rows to {args.export}")
+        app.close()
+        return
+
+    if args.farmers:
+        app.llm_concurrency = args.concurrency
+        weather_lookup = app.weather.get if app.weather.configured else None
+        advisor_engine.run_bulk(app, args.farmers, concurrency=args.concurrency, weather_lookup=weather_lookup)
+        app.close()
+        return
+
     # Create UI
-    root = create_ui()
+    global ui
+    create_ui()
+    ui = UiPump(root).start()
+    root.after(0, lambda: print(f"🪟 Window ready in {(time.perf_counter() - STARTUP_T0) * 1000:.0f} ms"))
     
-    # Start agents in separate threads
-    weather_thread = threading.Thread(target=weather_agent, daemon=True)
-    farmer_thread = threading.Thread(target=farmer_advisor_agent, daemon=True)
-    market_thread = threading.Thread(target=market_researcher_agent, daemon=True)
+    # Load data in the background while the window paints
+    loader_thread = threading.Thread(target=load_resources_in_background, daemon=True)
     
-    # Start all threads
-    weather_thread.start()
-    farmer_thread.start()
-    market_thread.start()
+    loader_thread.start()
+    
+    # Start the agents; they run when their inputs change
+    start_agents()
     
     # Start UI main loop
     root.mainloop()
     
-    # Close database connection when app closes
-    conn.close()
+    # Stop the agents, then close the database connection
+    bus.close()
+    app.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+import os
+import threading
+import types
+
+import storage
+from llm_service import LLMService
+from weather_service import WeatherService, WEATHER_API_URL
+
+# 🌦 WeatherAPI Configuration
+WEATHER_API_KEY = "YOUR_API_KEY"
+WEATHER_FIXTURES = os.environ.get("AGRI_WEATHER_FIXTURES")  # JSON of canned responses for offline runs
+WEATHER_URL = os.environ.get("AGRI_WEATHER_URL", WEATHER_API_URL)  # e.g. the stand-in from benchmarks.py --serve-stubs
+
+# 📈 How often the desktop app and the server look for a changed market dataset
+MARKET_INTERVAL = float(os.environ.get("AGRI_MARKET_INTERVAL", 60))  # Seconds between market dataset checks
+
+# 🌱 Dataset and database locations
+try:
+    base_path = os.path.dirname(os.path.abspath(__file__))
+except NameError:
+    base_path = os.getcwd()
+
+FARMER_DATASET = "farmer_advisor_dataset.xlsx"
+MARKET_DATASET = "market_researcher_dataset.xlsx"
+FALLBACK_DATA_DIR = r"C:\Users\suman\OneDrive\Desktop"
+DB_PATH = "agriculture_ai.db"
+LLM_CACHE_PATH = "llm_cache.db"
+LLM_CONCURRENCY = int(os.environ.get("AGRI_LLM_CONCURRENCY", 2))  # Generations sent to ollama at once
+
+# 🧰 Application context: every heavy resource is created on first use
+# Importing this module only pulls in the standard library (no Tkinter, so the
+# headless server can use it too); pandas, the
+# datasets, the SQLite connection, matplotlib and ollama are loaded when first needed
+# (or ahead of time by preload() on a background thread).
+class AppContext:
+    def __init__(self, base_path=base_path, db_path=DB_PATH, llm_concurrency=LLM_CONCURRENCY):
+        self.base_path = base_path
+        self.db_path = db_path
+        self.llm_concurrency = llm_concurrency
+        self.load_reports = []
+        self._resources = {}
+        self._locks = {}
+        self._market_mtime = None
+
+    def _get(self, name, factory):
+        value = self._resources.get(name)
+        if value is None:
+            with self._locks.setdefault(name, threading.Lock()):
+                value = self._resources.get(name)
+                if value is None:
+                    value = factory()
+                    self._resources[name] = value
+        return value
+
+    def is_loaded(self, name):
+        return name in self._resources
+
+    def dataset_path(self, file_name):
+        path = os.path.join(self.base_path, file_name)
+        # Check if files exist, if not use the original paths
+        if not os.path.exists(path):
+            path = os.path.join(FALLBACK_DATA_DIR, file_name)
+        return path
+
+    # 📦 Load through the columnar cache so only the first start parses the workbooks
+    def _load_dataset(self, file_name):
+        from data_cache import load_dataset, format_report
+        frame, report = load_dataset(self.dataset_path(file_name))
+        self.load_reports.append(report)
+        print(format_report(report))
+        return frame
+
+    @property
+    def farmer_data(self):
+        return self._get("farmer_data", lambda: self._load_dataset(FARMER_DATASET))
+
+    @property
+    def market_data(self):
+        return self._get("market_data", lambda: self._load_dataset(MARKET_DATASET))
+
+    # 📈 Per-product market aggregates (latest price, rolling mean, volatility, demand vs supply)
+    @property
+    def market(self):
+        def build():
+            from market_analytics import MarketAnalytics
+            self._market_mtime = self._dataset_mtime(MARKET_DATASET)
+            return MarketAnalytics(self.market_data)
+        return self._get("market", build)
+
+    def _dataset_mtime(self, file_name):
+        try:
+            return os.stat(self.dataset_path(file_name)).st_mtime
+        except OSError:
+            return None
+
+    # 🧮 Crop scorer combining growing conditions, sustainability and market prices
+    @property
+    def crop_scorer(self):
+        def build():
+            from crop_scoring import CropScorer
+            return CropScorer(self.farmer_data, prices=self.market.summary()["latest_price"].to_dict())
+        return self._get("crop_scorer", build)
+
+    # 🔁 Fold new market rows into the aggregates when the dataset file changes on disk
+    def refresh_market(self):
+        market = self.market
+        mtime = self._dataset_mtime(MARKET_DATASET)
+        if mtime is None or mtime == self._market_mtime:
+            return False
+        self._market_mtime = mtime
+        frame = self._load_dataset(MARKET_DATASET)
+        self._resources["market_data"] = frame
+        changed = market.extend(frame)
+        if changed and self.is_loaded("crop_scorer"):
+            self.crop_scorer.set_prices(market.summary()["latest_price"].to_dict())
+        return changed
+
+    # 🗂️ Crop candidate index, built once instead of sorting the dataset on every tick
+    @property
+    def crop_index(self):
+        def build():
+            from crop_index import CropIndex
+            return CropIndex(self.farmer_data)
+        return self._get("crop_index", build)
+
+    # 🔤 Known crop names, used to parse crops out of LLM suggestions
+    @property
+    def crop_vocabulary(self):
+        def collect():
+            names = (set(self.farmer_data["Crop_Type"].dropna().astype(str))
+                     | set(self.market_data["Product"].dropna().astype(str)))
+            return tuple(sorted(name for name in names if name.strip()))
+        return self._get("crop_vocabulary", collect)
+
+    # 📂 SQLite Database Setup (WAL, per-thread readers, single group-commit writer)
+    @property
+    def db(self):
+        return self._get("db", lambda: storage.Database(self.db_path))
+
+    # 📊 matplotlib with the Tk backend, imported only when a chart is drawn
+    @property
+    def charting(self):
+        def load():
+            import matplotlib
+            matplotlib.use("TkAgg")
+            from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+            from market_chart import MarketChart
+            return types.SimpleNamespace(FigureCanvasTkAgg=FigureCanvasTkAgg, MarketChart=MarketChart)
+        return self._get("charting", load)
+
+    # 🤖 Ollama client for TinyLlama
+    @property
+    def ollama(self):
+        def connect():
+            import ollama
+            return ollama.Client()
+        return self._get("ollama", connect)
+
+    # 💬 Cached, request-coalescing front end for TinyLlama
+    @property
+    def llm(self):
+        return self._get("llm", lambda: LLMService(lambda: self.ollama, model="tinyllama", cache_path=LLM_CACHE_PATH,
+                                                   max_concurrency=self.llm_concurrency))
+
+    # 🌍 Pooled, cached WeatherAPI client shared by every thread
+    @property
+    def weather(self):
+        return self._get("weather", lambda: WeatherService(WEATHER_API_KEY, base_url=WEATHER_URL,
+                                                            fixtures=WEATHER_FIXTURES))
+
+    # 🖼️ Crop image tiles, drawn once per (crop, size) and cached in memory and on disk
+    @property
+    def crop_images(self):
+        def load():
+            from crop_images import CropImageService
+            return CropImageService(asset_dir=os.path.join(self.base_path, "crop_images"),
+                                    cache_dir=os.path.join(self.base_path, ".agri_cache", "crop_images"))
+        return self._get("crop_images", load)
+
+    # ⏳ Load everything ahead of first use, reporting progress as (step, total, label)
+    def preload(self, progress=None):
+        steps = [
+            ("Loading farmer dataset", lambda: self.farmer_data),
+            ("Loading market dataset", lambda: self.market_data),
+            ("Analyzing market", lambda: self.market),
+            ("Indexing crops", lambda: self.crop_index),
+            ("Scoring crops", lambda: self.crop_scorer),
+            ("Opening database", lambda: self.db),
+            ("Loading charts", lambda: self.charting),
+            ("Loading crop images", lambda: self.crop_images),
+            ("Connecting to Ollama", lambda: self.llm),
+        ]
+        for step, (label, load) in enumerate(steps):
+            if progress:
+                progress(step, len(steps), label)
+            load()
+        if progress:
+            progress(len(steps), len(steps), "Ready")
+
+    def close(self):
+        weather = self._resources.pop("weather", None)
+        if weather is not None:
+            weather.close()
+        llm = self._resources.pop("llm", None)
+        if llm is not None:
+            llm.close()
+        db = self._resources.pop("db", None)
+        if db is not None:
+            db.close()
+
+
+app = AppContext()
+
+# 🔤 Match a typed crop name to the name stored in recommendation_crops
+def canonical_crop(crop):
+    if not crop:
+        return None
+    matches = [name for name in app.crop_vocabulary if name.lower() == crop.strip().lower()]
+    return matches[0] if matches else crop.strip()
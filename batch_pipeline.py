@@ -0,0 +1,299 @@
+import argparse
+import hashlib
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import advisor_engine
+import storage
+
+CHUNK_ROWS = 20000  # Plots read, scored and handed to the LLM pool at a time
+WRITE_BATCH = 500  # Results stored (with their checkpoints) per SQLite transaction
+CONDITION_COLUMNS = ("soil_ph", "soil_moisture", "temperature", "rainfall")  # Same order as INDEX_FEATURES
+TOP_K = advisor_engine.TOP_K
+
+_scorer = None  # CropScorer of each worker process, set by _init_worker
+
+
+def _init_worker(scorer):
+    global _scorer
+    _scorer = scorer
+
+
+# 🧮 Rank plots [start, stop) of the current chunk (runs in a worker process)
+# Conditions are read from, and crop codes/scores written to, memory-mapped scratch
+# files shared with the parent, so plot data is never pickled or copied per worker.
+def _score_slice(scratch, rows, k, start, stop):
+    conditions = np.memmap(scratch["conditions"], dtype=np.float64, mode="r", shape=(rows, 4))
+    codes = np.memmap(scratch["codes"], dtype=np.int64, mode="r+", shape=(rows, k))
+    scores = np.memmap(scratch["scores"], dtype=np.float64, mode="r+", shape=(rows, k))
+    codes[start:stop], scores[start:stop] = _scorer.rank_many(conditions[start:stop], k)
+    codes.flush()
+    scores.flush()
+    return stop - start
+
+
+def _normalize(frame):
+    frame.columns = [str(name).strip().lower().replace(" ", "_") for name in frame.columns]
+    if "farmer_name" not in frame.columns and "name" in frame.columns:
+        frame = frame.rename(columns={"name": "farmer_name"})
+    if "farmer_name" not in frame.columns:
+        raise ValueError("The plots file needs a farmer_name (or name) column")
+    for column in CONDITION_COLUMNS:
+        frame[column] = pd.to_numeric(frame[column], errors="coerce") if column in frame.columns else np.nan
+    if "city" not in frame.columns:
+        frame["city"] = None
+    # One spelling of each city for the weather lookup and the rows that use it
+    frame["city"] = [(city.strip() or None) if isinstance(city, str) else None for city in frame["city"]]
+    return frame
+
+
+# 📄 Stream plots from CSV or Parquet as (index of the first plot, frame) chunks
+# Columns are matched like advisor_engine.read_farmer_jobs; an optional plot_id is
+# added to the farmer name. A plot's index is its row number in the file.
+def read_plots(path, chunk_rows=CHUNK_ROWS):
+    if path.lower().endswith(".parquet"):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Reading Parquet plots needs pyarrow (pip install pyarrow)")
+        chunks = (batch.to_pandas() for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows))
+    else:
+        chunks = pd.read_csv(path, chunksize=chunk_rows, encoding="utf-8-sig", skipinitialspace=True)
+    first = 0
+    for frame in chunks:
+        yield first, _normalize(frame)
+        first += len(frame)
+
+
+# 🔖 Runs are identified by the input file, so re-running the same file resumes it
+def run_id_for(path):
+    stat = os.stat(path)
+    digest = hashlib.sha1(f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}".encode("utf-8")).hexdigest()
+    return f"{os.path.basename(path)}:{digest[:12]}"
+
+
+def _start_run(conn, run_id, source, restart):
+    if restart:
+        conn.execute("DELETE FROM batch_plots WHERE run_id = ?", (run_id,))
+        conn.execute("DELETE FROM batch_runs WHERE run_id = ?", (run_id,))
+    conn.execute("INSERT OR IGNORE INTO batch_runs (run_id, source) VALUES (?, ?)", (run_id, source))
+    conn.execute("UPDATE batch_runs SET finished = NULL WHERE run_id = ?", (run_id,))
+
+
+# 💾 Store a batch of results and their checkpoints in one transaction (runs on the writer)
+def _write_results(conn, run_id, results, vocabulary):
+    for plot, values in results:
+        recommendation_id = storage.insert_recommendation(conn, values, vocabulary)
+        conn.execute("INSERT OR REPLACE INTO batch_plots (run_id, plot, recommendation_id) VALUES (?, ?, ?)",
+                     (run_id, plot, recommendation_id))
+    conn.execute("UPDATE batch_runs SET done = done + ?, updated = CURRENT_TIMESTAMP WHERE run_id = ?",
+                 (len(results), run_id))
+    return len(results)
+
+
+def _finish_run(conn, run_id):
+    conn.execute("UPDATE batch_runs SET finished = CURRENT_TIMESTAMP WHERE run_id = ?", (run_id,))
+
+
+# 📦 Collects finished plots and stores them WRITE_BATCH at a time
+class BulkWriter:
+    def __init__(self, db, run_id, vocabulary, batch_size=WRITE_BATCH):
+        self.db = db
+        self.run_id = run_id
+        self.vocabulary = vocabulary
+        self.batch_size = batch_size
+        self.stored = 0
+        self._pending = []
+        self._futures = []
+        self._lock = threading.Lock()
+
+    def add(self, plot, values):
+        with self._lock:
+            self._pending.append((plot, values))
+            if len(self._pending) < self.batch_size:
+                return
+            results, self._pending = self._pending, []
+            self._futures.append(self.db.submit(_write_results, self.run_id, results, self.vocabulary))
+        self._collect(wait=False)
+
+    def _collect(self, wait):
+        with self._lock:
+            futures = [f for f in self._futures if wait or f.done()]
+            self._futures = [f for f in self._futures if f not in futures]
+        for future in futures:
+            stored = future.result()  # Re-raises database errors so the run stops
+            with self._lock:
+                self.stored += stored
+
+    def close(self):
+        with self._lock:
+            results, self._pending = self._pending, []
+            if results:
+                self._futures.append(self.db.submit(_write_results, self.run_id, results, self.vocabulary))
+        self._collect(wait=True)
+
+
+def _fill_weather(frame, weather):
+    conditions = {}
+    missing = frame["temperature"].isna() & frame["city"].notna()
+    if weather is None or not missing.any():
+        return conditions
+    for city, result in weather.get_many(frame.loc[missing, "city"].astype(str).unique()).items():
+        if isinstance(result, Exception):
+            print(f"⚠️ Weather API Error ({city}):", result)
+        elif advisor_engine.weather_is_known(result):
+            frame.loc[missing & (frame["city"] == city), "temperature"] = result["temp"]
+            conditions[city] = result["condition"]
+    return conditions
+
+
+# 🗺️ Seasonal planning run: recommendations for every plot in `path`
+# Plots are streamed in chunks; each chunk is ranked across `workers` processes
+# (the CropScorer is built once from the memory-mapped datasets and only its small
+# per-crop profiles are sent to the workers), explained by at most `llm_concurrency`
+# ollama calls at a time (or with the fallback text when `explain` is False), and
+# stored WRITE_BATCH rows per transaction together with a checkpoint of the plots
+# done. Running the same file again skips the stored plots, so a crash only
+# repeats the unsaved tail of the run.
+def plan_season(app, path, workers=None, llm_concurrency=4, explain=True, weather=None, restart=False,
+                chunk_rows=CHUNK_ROWS, k=TOP_K):
+    workers = workers or os.cpu_count() or 1
+    run_id = run_id_for(path)
+    db = app.db
+    db.write(_start_run, run_id, os.path.abspath(path), restart)
+    done = np.array([row[0] for row in db.query("SELECT plot FROM batch_plots WHERE run_id = ? ORDER BY plot",
+                                                (run_id,))], dtype=np.int64)
+    if len(done):
+        print(f"⏩ Resuming {run_id}: {len(done):,} plots already stored")
+
+    scorer, vocabulary = app.crop_scorer, app.crop_vocabulary
+    app.llm_concurrency = llm_concurrency
+    writer = BulkWriter(db, run_id, vocabulary)
+    scratch_dir = tempfile.mkdtemp(prefix="agri_batch_")
+    scratch = {name: os.path.join(scratch_dir, f"{name}.bin") for name in ("conditions", "codes", "scores")}
+    processes = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"), initializer=_init_worker,
+                                    initargs=(scorer,)) if workers > 1 else None
+    llm_pool = ThreadPoolExecutor(llm_concurrency, thread_name_prefix="batch-llm") if explain else None
+    in_flight = threading.BoundedSemaphore(llm_concurrency * 4)  # Backpressure on the reader
+    errors = []
+    start, seen = time.perf_counter(), 0
+
+    def explain_plot(plot, prompt, values, fallback):
+        try:
+            try:
+                suggestion = app.llm.chat(prompt).text
+            except Exception as ollama_error:
+                print(f"⚠️ Ollama AI Error: {ollama_error}")
+                suggestion = fallback
+            writer.add(plot, (values[0], suggestion) + values[2:])
+        except Exception as e:
+            errors.append(e)
+        finally:
+            in_flight.release()
+
+    try:
+        for first, frame in read_plots(path, chunk_rows):
+            read = first + len(frame)
+            plots = np.arange(first, read, dtype=np.int64)
+            if len(done):
+                keep = ~np.isin(plots, done, assume_unique=True)
+                frame, plots = frame[keep].copy(), plots[keep]
+            seen += len(frame)
+            if not len(frame):
+                continue
+            weather_conditions = _fill_weather(frame, weather)
+            rows = len(frame)
+
+            # Rank the chunk in parallel through the shared scratch files
+            np.memmap(scratch["conditions"], dtype=np.float64, mode="w+", shape=(rows, 4))[:] = \
+                frame[list(CONDITION_COLUMNS)].to_numpy(dtype=np.float64)
+            for name, dtype in (("codes", np.int64), ("scores", np.float64)):
+                np.memmap(scratch[name], dtype=dtype, mode="w+", shape=(rows, k)).flush()
+            if processes is None:
+                _init_worker(scorer)
+                _score_slice(scratch, rows, k, 0, rows)
+            else:
+                step = -(-rows // workers)
+                list(processes.map(_score_slice, *zip(*[(scratch, rows, k, lo, min(lo + step, rows))
+                                                        for lo in range(0, rows, step)])))
+            codes = np.array(np.memmap(scratch["codes"], dtype=np.int64, mode="r", shape=(rows, k)))
+            conditions = frame[list(CONDITION_COLUMNS)].to_numpy(dtype=np.float64)
+
+            names = frame["farmer_name"].astype(str).str.strip()
+            if "plot_id" in frame.columns:
+                names = names + " / " + frame["plot_id"].astype(str)
+            trends = {}
+            for plot, name, city, row, picked in zip(plots.tolist(), names, frame["city"], conditions, codes):
+                city = city if isinstance(city, str) else None
+                ranked = [{"crop": scorer.crops[code], "sustainability": round(float(scorer.sustainability[code]), 2)}
+                          for code in picked]
+                # Unknown conditions are taken from where the best crop is typically grown
+                typical = scorer.typical_conditions(picked[0])
+                soil_ph, soil_moisture, temperature, rainfall = [
+                    round(float(typical[i] if np.isnan(value) else value), 2) for i, value in enumerate(row)]
+                if city is not None and city not in trends:
+                    trends[city] = advisor_engine.weather_trend(app, city)
+                values = (name, None, soil_ph, soil_moisture, temperature, rainfall, ranked[0]["sustainability"],
+                          weather_conditions.get(city, "Unknown"), 0)
+                fallback = advisor_engine.fallback_suggestion([c["crop"] for c in ranked])
+                if llm_pool is None:
+                    writer.add(plot, (name, fallback) + values[2:])
+                    continue
+                prompt = advisor_engine.build_prompt(name, soil_ph, soil_moisture, temperature, rainfall, ranked,
+                                                     trends.get(city))
+                in_flight.acquire()
+                if errors:
+                    raise errors[0]
+                llm_pool.submit(explain_plot, plot, prompt, values, fallback)
+
+            elapsed = time.perf_counter() - start
+            print(f"📦 {read:,} plots read, {writer.stored:,} stored "
+                  f"({seen / elapsed if elapsed else 0:,.0f} plots/s)")
+
+        if llm_pool is not None:
+            llm_pool.shutdown(wait=True)
+        if errors:
+            raise errors[0]
+        writer.close()
+        db.write(_finish_run, run_id)
+    finally:
+        if llm_pool is not None:
+            llm_pool.shutdown(wait=True, cancel_futures=True)
+        if processes is not None:
+            processes.shutdown(cancel_futures=True)
+        shutil.rmtree(scratch_dir, ignore_errors=True)
+
+    elapsed = time.perf_counter() - start
+    print(f"✅ {run_id}: {writer.stored:,} plots stored in {elapsed:.1f}s "
+          f"({writer.stored / elapsed if elapsed else 0:,.1f} plots/s, {len(done):,} skipped from earlier runs)")
+    if explain:
+        print(app.llm.format_stats())
+    return writer.stored
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Seasonal batch recommendations for every plot in a CSV/Parquet file")
+    parser.add_argument("plots", help="CSV or Parquet with farmer_name and optional plot_id, city, soil_ph, "
+                                      "soil_moisture, temperature, rainfall")
+    parser.add_argument("--workers", type=int, help="scoring processes (default: all cores)")
+    parser.add_argument("--llm-concurrency", type=int, default=4, help="ollama calls at once (default: 4)")
+    parser.add_argument("--no-llm", action="store_true", help="store the ranked crops without LLM explanations")
+    parser.add_argument("--weather", action="store_true", help="fill missing temperatures from WeatherAPI by city")
+    parser.add_argument("--restart", action="store_true", help="ignore the checkpoint and process every plot again")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    args = parser.parse_args()
+
+    from app_context import app
+    try:
+        plan_season(app, args.plots, args.workers, args.llm_concurrency, not args.no_llm,
+                    app.weather if args.weather and app.weather.configured else None, args.restart, args.chunk_rows)
+    finally:
+        app.close()
@@ -0,0 +1,518 @@
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import types
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+
+CROPS = ("Wheat", "Rice", "Corn", "Soybean", "Millet", "Sorghum", "Barley", "Cotton", "Sugarcane", "Groundnut",
+         "Mustard", "Chickpea", "Lentil", "Potato", "Tomato", "Onion")
+SEASONS = ("Low", "Medium", "High")
+DEFAULT_ROWS = (10000, 100000)  # Dataset sizes; use --rows 10000 1000000 10000000 for the full sweep
+DB_ROWS = 50000  # Recommendations inserted/exported per size (capped; SQLite cost doesn't depend on dataset rows)
+REPEAT = 5
+REGRESSION_THRESHOLD = 0.10  # Median slower than the baseline by more than this counts as a regression
+NOISE_FLOOR = 0.001  # Seconds; differences smaller than this are never reported as regressions
+
+
+# 🌾 Synthetic farmer_advisor dataset with the real columns and plausible ranges
+def synthetic_farmers(rows, seed=42):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "Farm_ID": np.arange(1, rows + 1),
+        "Soil_pH": rng.uniform(5.5, 7.5, rows),
+        "Soil_Moisture": rng.uniform(10, 45, rows),
+        "Temperature_C": rng.uniform(15, 35, rows),
+        "Rainfall_mm": rng.uniform(50, 300, rows),
+        "Fertilizer_Usage_kg": rng.uniform(50, 300, rows),
+        "Pesticide_Usage_kg": rng.uniform(1, 20, rows),
+        "Crop_Yield_ton": rng.uniform(1, 10, rows),
+        "Crop_Type": pd.Categorical.from_codes(rng.integers(0, len(CROPS), rows), CROPS),
+        "Sustainability_Score": rng.uniform(10, 100, rows),
+    })
+
+
+# 📈 Synthetic market_researcher dataset; Market_ID continues from `first_id` so batches can be appended
+def synthetic_market(rows, seed=42, first_id=1):
+    rng = np.random.default_rng(seed)
+    base_price = rng.uniform(150, 500, len(CROPS))
+    products = rng.integers(0, len(CROPS), rows)
+    return pd.DataFrame({
+        "Market_ID": np.arange(first_id, first_id + rows),
+        "Product": pd.Categorical.from_codes(products, CROPS),
+        "Market_Price_per_ton": base_price[products] * rng.uniform(0.8, 1.2, rows),
+        "Demand_Index": rng.uniform(50, 200, rows),
+        "Supply_Index": rng.uniform(50, 200, rows),
+        "Competitor_Price_per_ton": rng.uniform(150, 500, rows),
+        "Economic_Indicator": rng.uniform(0.5, 2.0, rows),
+        "Weather_Impact_Score": rng.uniform(0, 100, rows),
+        "Seasonal_Factor": pd.Categorical.from_codes(rng.integers(0, len(SEASONS), rows), SEASONS),
+        "Consumer_Trend_Index": rng.uniform(50, 150, rows),
+    })
+
+
+# 📦 Store a frame as the columnar cache of a placeholder workbook
+# Excel can't hold 10M rows (and writing 1M would take minutes), so the benchmark
+# datasets skip the xlsx step and go straight to the cache data_cache.load_dataset reads.
+def write_dataset(frame, directory, file_name):
+    from data_cache import cache_dir_for, write_cache
+    path = os.path.join(directory, file_name)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f"synthetic dataset, {len(frame)} rows\n")
+    write_cache(frame, path, cache_dir_for(path))
+    return path
+
+
+def synthetic_suggestions(rows, seed=42):
+    rng = random.Random(seed)
+    values = []
+    for i in range(rows):
+        crops = rng.sample(CROPS, 3)
+        values.append((f"Farmer {i % 5000}", f"Grow {crops[0]}, then {crops[1]} or {crops[2]} for your soil.",
+                       round(rng.uniform(5.5, 7.5), 2), round(rng.uniform(10, 45), 2), round(rng.uniform(15, 35), 2),
+                       round(rng.uniform(50, 300), 2), round(rng.uniform(10, 100), 2), "Sunny", 0))
+    return values
+
+
+# 🤖 In-process stand-in for ollama.Client: fixed time to first token, then a token rate
+class StubOllama:
+    def __init__(self, latency=0.2, tokens_per_second=50.0, tokens=40):
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.tokens = tokens
+
+    def _words(self, messages):
+        prompt = messages[-1]["content"] if messages else ""
+        rng = random.Random(zlib.crc32(prompt.encode("utf-8")))
+        return [rng.choice(CROPS + ("soil", "rain", "yield", "because", "and", "the")) for _ in range(self.tokens)]
+
+    def chat(self, model=None, messages=(), stream=False, **kwargs):
+        words = self._words(messages)
+        if stream:
+            return self._stream(model, words)
+        time.sleep(self.latency + len(words) / self.tokens_per_second)
+        return {"model": model, "message": {"role": "assistant", "content": " ".join(words)}, "done": True}
+
+    def _stream(self, model, words):
+        time.sleep(self.latency)
+        for i, word in enumerate(words):
+            if i:
+                time.sleep(1 / self.tokens_per_second)
+            yield {"model": model, "message": {"role": "assistant", "content": (" " if i else "") + word}, "done": False}
+        yield {"model": model, "message": {"role": "assistant", "content": ""}, "done": True, "done_reason": "stop"}
+
+
+# 🌦 WeatherAPI current.json payload, stable per city
+def stub_weather(city):
+    seed = zlib.crc32(city.strip().lower().encode("utf-8"))
+    return {"location": {"name": city}, "current": {
+        "temp_c": round(15 + seed % 200 / 10, 1),
+        "condition": {"text": ("Sunny", "Cloudy", "Light rain", "Overcast")[seed % 4]},
+        "humidity": 30 + seed % 60,
+        "wind_kph": round(seed % 300 / 10, 1),
+    }}
+
+
+# 🧪 Local HTTP stand-ins for WeatherAPI (GET /v1/current.json) and ollama (POST /api/chat)
+# Point the app at them with AGRI_WEATHER_URL=http://HOST:PORT/v1/current.json and
+# OLLAMA_HOST=http://HOST:PORT.
+def start_stubs(host="127.0.0.1", port=0, weather_latency=0.05, ollama=None):
+    ollama = ollama or StubOllama()
+
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def _send(self, status, payload):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            city = parse_qs(url.query).get("q", [""])[-1]
+            if url.path != "/v1/current.json" or not city:
+                self._send(400, {"error": {"code": 1006, "message": "No matching location found."}})
+                return
+            time.sleep(weather_latency)
+            self._send(200, stub_weather(city))
+
+        def do_POST(self):
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+            if urlsplit(self.path).path != "/api/chat":
+                self._send(404, {"error": "not found"})
+                return
+            if not request.get("stream", True):
+                self._send(200, ollama.chat(request.get("model"), request.get("messages", [])))
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for chunk in ollama.chat(request.get("model"), request.get("messages", []), stream=True):
+                data = json.dumps(chunk).encode("utf-8") + b"\n"
+                self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+                self.wfile.flush()
+            self.wfile.write(b"0\r\n\r\n")
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), StubHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="benchmark-stubs", daemon=True).start()
+    return server
+
+
+# ⏱️ Run `fn` `repeat` times after `warmup` runs and summarize the wall times
+def measure(fn, repeat=REPEAT, warmup=1, items=None):
+    for _ in range(warmup):
+        fn()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    times.sort()
+    result = {
+        "repeat": repeat,
+        "min_s": times[0],
+        "median_s": times[len(times) // 2],
+        "mean_s": sum(times) / len(times),
+        "max_s": times[-1],
+    }
+    if items:
+        result["items"] = items
+        result["items_per_s"] = items / result["median_s"] if result["median_s"] else 0.0
+    return result
+
+
+def bench_dataset_load(workdir, farmers, market, repeat):
+    from data_cache import load_dataset
+    results = {}
+    for name, frame in (("farmers", farmers), ("market", market)):
+        path = write_dataset(frame, workdir, f"{name}.xlsx")
+        results[f"dataset_load.{name}"] = measure(lambda: load_dataset(path), repeat, items=len(frame))
+    return results
+
+
+def bench_advisor(farmers, market_frame, jobs, repeat):
+    import advisor_engine
+    from advisor_engine import AdvisorJob
+    from crop_index import CropIndex
+    from crop_scoring import CropScorer
+    from market_analytics import MarketAnalytics
+
+    prices = MarketAnalytics(market_frame).summary()["latest_price"].to_dict()
+    results = {
+        "advisor.crop_index_build": measure(lambda: CropIndex(farmers), max(1, repeat // 2), 0, items=len(farmers)),
+        "advisor.crop_scorer_build": measure(lambda: CropScorer(farmers, prices), max(1, repeat // 2), 0,
+                                             items=len(farmers)),
+    }
+    app = types.SimpleNamespace(crop_index=CropIndex(farmers), crop_scorer=CropScorer(farmers, prices))
+    rng = random.Random(7)
+    batch = [AdvisorJob(f"Farmer {i}", None, round(rng.uniform(5.5, 7.5), 2), round(rng.uniform(10, 45), 2),
+                        round(rng.uniform(15, 35), 2), None if i % 4 == 0 else round(rng.uniform(50, 300), 2))
+             for i in range(jobs)]
+    results["advisor.prepare"] = measure(lambda: [advisor_engine.prepare(app, job) for job in batch], repeat,
+                                         items=jobs)
+    conditions = np.array([[job.soil_ph, job.soil_moisture, job.temperature, np.nan if job.rainfall is None
+                            else job.rainfall] for job in batch])
+    results["advisor.rank_many"] = measure(lambda: app.crop_scorer.rank_many(conditions), repeat, items=jobs)
+    return results
+
+
+def bench_market(market, repeat):
+    from market_analytics import MarketAnalytics
+    results = {"market.build": measure(lambda: MarketAnalytics(market), max(1, repeat // 2), 0, items=len(market))}
+    analytics = MarketAnalytics(market)
+    batch_rows = max(10, len(market) // 100)
+    next_id = [int(market["Market_ID"].iloc[-1]) + 1]
+
+    # One market tick: a batch of new rows arrives, then the UI asks for the top crops per season
+    def tick():
+        analytics.append(synthetic_market(batch_rows, seed=next_id[0], first_id=next_id[0]))
+        next_id[0] += batch_rows
+        for season in (None,) + SEASONS:
+            analytics.top_k(5, season=season)
+
+    results["market.tick"] = measure(tick, repeat, items=batch_rows)
+    results["market.top_k_cached"] = measure(lambda: analytics.top_k(5), repeat, items=1)
+    return results
+
+
+def bench_database(workdir, rows, repeat):
+    import exporter
+    import storage
+    values = synthetic_suggestions(rows)
+    prices = [(crop, 200.0 + i * 10) for i, crop in enumerate(CROPS)]
+    db_path = os.path.join(workdir, "benchmark.db")
+    results = {}
+
+    def insert():
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+        db = storage.Database(db_path)
+        try:
+            futures = [db.submit(storage.insert_recommendations, values[start:start + 1000], CROPS)
+                       for start in range(0, rows, 1000)]
+            for future in futures:
+                future.result()
+        finally:
+            db.close()
+
+    results["db.insert"] = measure(insert, max(1, repeat // 2), 0, items=rows)
+    db = storage.Database(db_path)
+    try:
+        step = [0]
+
+        def backfill():
+            step[0] += 1
+            db.write(storage.backfill_market_prices, [(crop, price + step[0]) for crop, price in prices])
+
+        results["db.backfill_market_prices"] = measure(backfill, repeat, items=rows)
+        for suffix in (".csv", ".jsonl.gz"):
+            path = os.path.join(workdir, "export" + suffix)
+            results[f"export{suffix}"] = measure(lambda: exporter.export(db.reader(), path), max(1, repeat // 2),
+                                                 items=rows)
+    finally:
+        db.close()
+    return results
+
+
+# 🗓️ `days` of simulated minute readings for one city, then the trend queries the advisor and UI run
+def bench_weather_history(workdir, days, repeat):
+    import storage
+    import weather_history
+    db_path = os.path.join(workdir, "weather_history.db")
+    db = storage.Database(db_path)
+    rng = random.Random(11)
+    end = int(time.time())
+    readings = [(ts, {"temp": round(rng.uniform(15, 40), 1), "condition": "Sunny", "humidity": rng.randint(30, 90),
+                      "wind": round(rng.uniform(0, 30), 1), "precip": rng.choice((0.0, 0.0, 0.0, 1.5))})
+                for ts in range(end - days * 86400, end, 60)]
+
+    def record(conn):
+        for ts, weather in readings:
+            weather_history.record_sample(conn, "Pune", weather, ts)
+
+    try:
+        results = {"weather_history.record": measure(lambda: db.write(record), 1, 0, items=len(readings))}
+        results["weather_history.record"]["db_bytes"] = sum(
+            os.path.getsize(db_path + suffix) for suffix in ("", "-wal") if os.path.exists(db_path + suffix))
+        conn = db.reader()
+        results["weather_history.summary_7d"] = measure(lambda: weather_history.summary(conn, "Pune"), repeat * 20,
+                                                        items=1)
+        results["weather_history.series_30d"] = measure(
+            lambda: weather_history.series(conn, "Pune", end - 30 * 86400, end), repeat * 20, items=1)
+    finally:
+        db.close()
+    return results
+
+
+def bench_chart(updates, repeat):
+    try:
+        import matplotlib
+        matplotlib.use("Agg")
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from market_chart import MarketChart
+    except ImportError as e:
+        return {"chart.update": {"skipped": str(e)}}
+    chart = MarketChart(FigureCanvasAgg)
+    chart.canvas.draw()
+    rng = random.Random(3)
+
+    def render():
+        for _ in range(updates):
+            chart.update([(crop, round(rng.uniform(200, 500), 2)) for crop in rng.sample(CROPS, 5)])
+
+    return {"chart.update": measure(render, repeat, items=updates)}
+
+
+def bench_llm(requests, concurrency, latency, tokens_per_second):
+    from llm_service import LLMService
+    llm = LLMService(lambda: StubOllama(latency, tokens_per_second), max_concurrency=concurrency)
+    prompts = [f"Explain briefly to Farmer {i} why Wheat is recommended." for i in range(requests)]
+    first_tokens = []
+
+    def stream(prompt):
+        start = time.perf_counter()
+        tokens = llm.stream(prompt)
+        for i, _ in enumerate(tokens):
+            if i == 0:
+                first_tokens.append(time.perf_counter() - start)
+
+    with ThreadPoolExecutor(max_workers=concurrency * 2) as pool:
+        cold = measure(lambda: list(pool.map(stream, prompts)), 1, 0, items=requests)
+        cached = measure(lambda: list(pool.map(llm.chat, prompts)), REPEAT, 0, items=requests)
+    first_tokens.sort()
+    cold["ttft_p50_s"] = first_tokens[len(first_tokens) // 2]
+    cold["ttft_p99_s"] = first_tokens[min(len(first_tokens) - 1, int(len(first_tokens) * 0.99))]
+    return {"llm.stream_cold": cold, "llm.chat_cached": cached}
+
+
+def bench_weather(cities, latency, repeat):
+    from weather_service import WeatherService
+    server = start_stubs(weather_latency=latency)
+    url = f"http://127.0.0.1:{server.server_address[1]}/v1/current.json"
+    names = [f"City {i}" for i in range(cities)]
+    services = []
+
+    def fetch_cold():
+        services.append(WeatherService("benchmark", base_url=url))
+        services[-1].get_many(names)
+
+    try:
+        cold = measure(fetch_cold, repeat, items=cities)
+        warm = measure(lambda: services[-1].get_many(names), repeat, items=cities)
+    finally:
+        for service in services:
+            service.close()
+        server.shutdown()
+        server.server_close()
+    return {"weather.get_many_cold": cold, "weather.get_many_cached": warm}
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=10,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+# 🏁 Run every stage at each dataset size; results are keyed "stage[rows]"
+def run_suite(sizes=DEFAULT_ROWS, db_rows=DB_ROWS, repeat=REPEAT, jobs=2000, chart_updates=60,
+              llm_requests=64, llm_concurrency=2, llm_latency=0.05, tokens_per_second=400.0,
+              weather_cities=64, weather_latency=0.05, history_days=30, stages=None):
+    workdir = tempfile.mkdtemp(prefix="agri_bench_")
+    results = {}
+
+    def record(stage, values, size=None):
+        for name, result in values.items():
+            key = f"{name}[{size}]" if size is not None else name
+            results[key] = result
+            if "median_s" in result:
+                rate = f", {result['items_per_s']:,.0f}/s" if "items_per_s" in result else ""
+                print(f"   {key:40s} {result['median_s'] * 1000:10.2f} ms{rate}")
+            else:
+                print(f"   {key:40s} skipped ({result.get('skipped')})")
+
+    def wanted(stage):
+        return not stages or stage in stages
+
+    try:
+        for size in sizes:
+            print(f"🧪 {size:,} rows")
+            farmers, market = synthetic_farmers(size), synthetic_market(size)
+            if wanted("dataset"):
+                record("dataset", bench_dataset_load(workdir, farmers, market, repeat), size)
+            if wanted("advisor"):
+                record("advisor", bench_advisor(farmers, market, jobs, repeat), size)
+            if wanted("market"):
+                record("market", bench_market(market, repeat), size)
+            del farmers, market
+        print("🧪 services")
+        if wanted("db"):
+            record("db", bench_database(workdir, db_rows, repeat), db_rows)
+        if wanted("history"):
+            record("history", bench_weather_history(workdir, history_days, repeat))
+        if wanted("chart"):
+            record("chart", bench_chart(chart_updates, repeat))
+        if wanted("llm"):
+            record("llm", bench_llm(llm_requests, llm_concurrency, llm_latency, tokens_per_second))
+        if wanted("weather"):
+            record("weather", bench_weather(weather_cities, weather_latency, repeat))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "config": {"sizes": list(sizes), "db_rows": db_rows, "repeat": repeat, "jobs": jobs,
+                   "llm_latency": llm_latency, "tokens_per_second": tokens_per_second,
+                   "llm_concurrency": llm_concurrency, "weather_latency": weather_latency},
+        "results": results,
+    }
+
+
+# 📉 Compare median times with a baseline run; returns the regressed keys
+def compare(baseline, current, threshold=REGRESSION_THRESHOLD):
+    regressions = []
+    print(f"📉 vs {baseline.get('revision') or 'baseline'} ({baseline.get('created')})")
+    for key, result in current["results"].items():
+        old = baseline.get("results", {}).get(key)
+        if not old or "median_s" not in old or "median_s" not in result or not old["median_s"]:
+            continue
+        change = result["median_s"] / old["median_s"] - 1
+        regressed = change > threshold and result["median_s"] - old["median_s"] > NOISE_FLOOR
+        flag = "⚠️ " if regressed else "  "
+        if regressed:
+            regressions.append(key)
+        print(f" {flag}{key:40s} {old['median_s'] * 1000:10.2f} -> {result['median_s'] * 1000:10.2f} ms "
+              f"({change:+.1%})")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the advisor's hot paths")
+    parser.add_argument("--rows", type=int, nargs="+", default=list(DEFAULT_ROWS),
+                        help="synthetic dataset sizes (default: 10000 100000)")
+    parser.add_argument("--db-rows", type=int, default=DB_ROWS, help="recommendations inserted and exported")
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument("--stage", action="append", choices=("dataset", "advisor", "market", "db", "history", "chart",
+                                                             "llm", "weather"), help="only run these stages")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="stub ollama seconds to first token")
+    parser.add_argument("--weather-latency", type=float, default=0.05, help="stub WeatherAPI seconds per request")
+    parser.add_argument("--output", metavar="PATH", help="write results as JSON (default: benchmark-<time>.json)")
+    parser.add_argument("--compare", metavar="BASELINE", help="compare with an earlier results file")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help="slowdown counted as a regression (default: 0.10)")
+    parser.add_argument("--serve-stubs", metavar="PORT", type=int,
+                        help="only run the WeatherAPI/ollama stand-ins on PORT until interrupted")
+    args = parser.parse_args()
+
+    if args.serve_stubs is not None:
+        server = start_stubs(port=args.serve_stubs, weather_latency=args.weather_latency,
+                             ollama=StubOllama(args.llm_latency))
+        address = f"http://127.0.0.1:{server.server_address[1]}"
+        print(f"🧪 Stubs running: AGRI_WEATHER_URL={address}/v1/current.json OLLAMA_HOST={address}")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            server.shutdown()
+        sys.exit(0)
+
+    report = run_suite(args.rows, args.db_rows, args.repeat, llm_latency=args.llm_latency,
+                       weather_latency=args.weather_latency, stages=args.stage)
+    output = args.output or f"benchmark-{datetime.now():%Y%m%d-%H%M%S}.json"
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"💾 Results written to {output}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(json.load(f), report, args.threshold)
+        if regressions:
+            print(f"⚠️ {len(regressions)} regression(s): {', '.join(regressions)}")
+            sys.exit(1)
@@ -0,0 +1,151 @@
+import collections
+import hashlib
+import os
+import re
+import threading
+
+from PIL import Image, ImageDraw, ImageFont
+
+import metrics
+
+BACKGROUND = "#e0f0e0"  # Light green, as in the original placeholder
+TEXT_COLOR = "#1b1b1b"
+DEFAULT_SIZE = (300, 300)
+CACHE_SIZE = 128
+FONT_NAMES = ("DejaVuSans.ttf", "Arial.ttf", "arial.ttf", "Helvetica.ttc")
+ASSET_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp")
+
+
+def _slug(crop_name):
+    slug = re.sub(r"[^a-z0-9]+", "_", crop_name.lower()).strip("_") or "crop"
+    return f"{slug}_{hashlib.sha1(crop_name.encode('utf-8')).hexdigest()[:8]}"
+
+
+def _load_font(size):
+    for name in FONT_NAMES:
+        try:
+            return ImageFont.truetype(name, size)
+        except OSError:
+            continue
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:  # Pillow < 10.1 has a single fixed-size bitmap font
+        return ImageFont.load_default()
+
+
+# 🖼️ Crop image tiles for the recommendations panel
+# A real photo from `asset_dir` (e.g. crop_images/wheat.png) is used when present,
+# otherwise the crop name is drawn on a plain tile with PIL. Images are kept in an
+# LRU keyed by (crop, size), optionally saved as PNG thumbnails in `cache_dir`, and
+# the Tk PhotoImage wrappers are cached too so redrawing a card does no image work.
+class CropImageService:
+    def __init__(self, asset_dir=None, cache_dir=None, max_entries=CACHE_SIZE):
+        self.asset_dir = asset_dir
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self._images = collections.OrderedDict()
+        self._photos = collections.OrderedDict()
+        self._fonts = {}
+        self._lock = threading.Lock()
+        self.stats = collections.Counter()
+
+    def _remember(self, cache, key, value):
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > self.max_entries:
+            cache.popitem(last=False)
+
+    def _font(self, size):
+        font = self._fonts.get(size)
+        if font is None:
+            font = self._fonts[size] = _load_font(size)
+        return font
+
+    def _find_asset(self, crop_name):
+        if not self.asset_dir:
+            return None
+        base = re.sub(r"\s+", "_", crop_name.strip().lower())
+        for ext in ASSET_EXTENSIONS:
+            path = os.path.join(self.asset_dir, base + ext)
+            if os.path.exists(path):
+                return path
+        return None
+
+    # ✏️ Draw the crop name centered on a tile, shrinking the font for long names
+    def render(self, crop_name, size=DEFAULT_SIZE):
+        image = Image.new("RGB", size, BACKGROUND)
+        draw = ImageDraw.Draw(image)
+        font_size = max(10, size[1] // 10)
+        while True:
+            font = self._font(font_size)
+            left, top, right, bottom = draw.textbbox((0, 0), crop_name, font=font)
+            if right - left <= size[0] * 0.9 or font_size <= 10:
+                break
+            font_size -= 2
+        x = (size[0] - (right - left)) / 2 - left
+        y = (size[1] - (bottom - top)) / 2 - top
+        draw.text((x, y), crop_name, fill=TEXT_COLOR, font=font)
+        return image
+
+    # Thumbnails are keyed by the asset's path and mtime (or "placeholder" when there is
+    # none), so adding or editing a photo in asset_dir replaces the cached tile
+    def _cache_path(self, crop_name, size, asset):
+        if asset:
+            version = hashlib.sha1(f"{asset}\0{os.stat(asset).st_mtime_ns}".encode("utf-8")).hexdigest()[:8]
+        else:
+            version = "placeholder"
+        return os.path.join(self.cache_dir, f"{_slug(crop_name)}_{size[0]}x{size[1]}_{version}.png")
+
+    def _load_or_render(self, crop_name, size):
+        asset = self._find_asset(crop_name)
+        cache_path = None
+        if self.cache_dir:
+            cache_path = self._cache_path(crop_name, size, asset)
+            if os.path.exists(cache_path):
+                self.stats["disk_hits"] += 1
+                with Image.open(cache_path) as cached:
+                    return cached.convert("RGB")
+
+        if asset:
+            with Image.open(asset) as photo:
+                image = photo.convert("RGB")
+            image.thumbnail(size)
+        else:
+            image = self.render(crop_name, size)
+        self.stats["rendered"] += 1
+
+        if cache_path:
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                image.save(cache_path + ".tmp", format="PNG")
+                os.replace(cache_path + ".tmp", cache_path)
+            except OSError as e:
+                print("⚠️ Crop Image Cache Error:", e)
+        return image
+
+    # 🌾 PIL image for a crop (safe to call from any thread)
+    def get_image(self, crop_name="Generic", size=DEFAULT_SIZE):
+        key = (crop_name, tuple(size))
+        with self._lock:
+            image = self._images.get(key)
+            if image is not None:
+                self._images.move_to_end(key)
+                self.stats["hits"] += 1
+                return image
+        with metrics.timer("crop_image_load_seconds"):
+            image = self._load_or_render(crop_name, tuple(size))
+        with self._lock:
+            self._remember(self._images, key, image)
+        return image
+
+    # 🪟 Tk PhotoImage for a crop (Tk thread only, like every other Tk call)
+    def get_photo(self, crop_name="Generic", size=DEFAULT_SIZE):
+        from PIL import ImageTk
+        key = (crop_name, tuple(size))
+        photo = self._photos.get(key)
+        if photo is None:
+            photo = ImageTk.PhotoImage(self.get_image(crop_name, size))
+            self._remember(self._photos, key, photo)
+        else:
+            self._photos.move_to_end(key)
+        return photo
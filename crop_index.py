@@ -0,0 +1,216 @@
+import itertools
+import threading
+import numpy as np
+import pandas as pd
+
+# 🌱 Columns used to find crops grown under similar conditions
+INDEX_FEATURES = ("Soil_pH", "Soil_Moisture", "Temperature_C", "Rainfall_mm")
+SCORE_COLUMN = "Sustainability_Score"
+CROP_COLUMN = "Crop_Type"
+
+# Bins per feature in the condition grid (8 bins -> 4096 cells for 4 features)
+GRID_BINS = 8
+
+# Appended rows are merged into the sorted arrays once the delta grows past this share
+MERGE_FRACTION = 0.05
+MIN_MERGE_ROWS = 1024
+
+
+# 🗂️ In-memory index over the farmer advisor dataset
+# Rows are kept sorted by (grid cell, -score) with a per-cell list of the best row of
+# each crop, plus a permutation sorted by score for global "best" lookups.
+# Appended rows go to a small unsorted delta that is scanned vectorized and merged
+# into the sorted arrays when it grows too large.
+class CropIndex:
+    def __init__(self, frame, bins=GRID_BINS):
+        self.bins = bins
+        self.columns = list(frame.columns)
+        self._lock = threading.Lock()
+        self._crop_codes = {}
+        self._crop_names = []
+        self._build(self._to_arrays(frame))
+
+    def __len__(self):
+        return self._main_size + self._delta_size
+
+    # 🔢 Convert a frame to plain NumPy columns plus encoded crop codes
+    def _to_arrays(self, frame):
+        frame = frame[frame[CROP_COLUMN].notna()]  # Rows without a crop name can't be recommended
+        arrays = {col: frame[col].to_numpy() for col in self.columns}
+        inverse, uniques = pd.factorize(frame[CROP_COLUMN].astype(str))
+        lookup = np.array([self._code_for(name) for name in uniques], dtype=np.int32)
+        arrays["__crop_code"] = lookup[inverse] if len(inverse) else np.empty(0, dtype=np.int32)
+        score = pd.to_numeric(frame[SCORE_COLUMN], errors="coerce").to_numpy(dtype=np.float64)
+        arrays["__score"] = np.where(np.isnan(score), -np.inf, score)
+        return arrays
+
+    def _code_for(self, name):
+        code = self._crop_codes.get(name)
+        if code is None:
+            code = len(self._crop_names)
+            self._crop_codes[name] = code
+            self._crop_names.append(name)
+        return code
+
+    def _features(self, arrays):
+        return np.column_stack([
+            np.asarray(pd.to_numeric(arrays[col], errors="coerce"), dtype=np.float64)
+            for col in INDEX_FEATURES
+        ])
+
+    def _bin_values(self, values):
+        scaled = (values - self._low) / self._width
+        scaled = np.nan_to_num(scaled, nan=0.0, posinf=self.bins - 1, neginf=0.0)
+        return np.clip(scaled.astype(np.int64), 0, self.bins - 1)
+
+    def _cells(self, features):
+        binned = self._bin_values(features)
+        return np.ravel_multi_index(binned.T, (self.bins,) * len(INDEX_FEATURES))
+
+    # 🏗️ Full (re)build of the sorted arrays and grid offsets
+    def _build(self, arrays):
+        features = self._features(arrays)
+        with np.errstate(all="ignore"):
+            low = np.nanmin(features, axis=0) if len(features) else np.zeros(len(INDEX_FEATURES))
+            high = np.nanmax(features, axis=0) if len(features) else np.ones(len(INDEX_FEATURES))
+        low = np.nan_to_num(low)
+        width = (np.nan_to_num(high) - low) / self.bins
+        width[width <= 0] = 1.0
+        self._low, self._width = low, width
+
+        cells = self._cells(features)
+        order = np.lexsort((-arrays["__score"], cells))
+        self._main = {name: values[order] for name, values in arrays.items()}
+        self._main_cells = cells[order]
+        self._main_size = len(order)
+        n_cells = self.bins ** len(INDEX_FEATURES)
+
+        # Only the best row of each (cell, crop) pair can win a distinct-crop query, so
+        # queries scan these leaders instead of every row in the selected cells.
+        codes = self._main["__crop_code"]
+        by_crop = np.lexsort((-self._main["__score"], codes, self._main_cells))
+        first = np.ones(len(by_crop), dtype=bool)
+        first[1:] = (np.diff(self._main_cells[by_crop]) != 0) | (np.diff(codes[by_crop]) != 0)
+        leaders = by_crop[first]
+        self._leader_starts = np.searchsorted(self._main_cells[leaders], np.arange(n_cells + 1))
+        self._leaders = leaders
+
+        # Queries that leave some conditions open use a coarser grid over just the given
+        # features, so they scan a few cells rather than every cell along the open axes.
+        # The best row of a coarse (cell, crop) pair is one of the fine leaders above.
+        all_axes = tuple(range(len(INDEX_FEATURES)))
+        self._projections = {all_axes: (leaders, self._leader_starts)}
+        binned = np.array(np.unravel_index(self._main_cells[leaders], (self.bins,) * len(INDEX_FEATURES)))
+        leader_codes, leader_scores = codes[leaders], self._main["__score"][leaders]
+        for size in range(1, len(INDEX_FEATURES)):
+            for axes in itertools.combinations(all_axes, size):
+                coarse = np.ravel_multi_index(binned[list(axes)], (self.bins,) * size)
+                by_coarse = np.lexsort((-leader_scores, leader_codes, coarse))
+                first = np.ones(len(by_coarse), dtype=bool)
+                first[1:] = (np.diff(coarse[by_coarse]) != 0) | (np.diff(leader_codes[by_coarse]) != 0)
+                picked = by_coarse[first]
+                self._projections[axes] = (leaders[picked],
+                                           np.searchsorted(coarse[picked], np.arange(self.bins ** size + 1)))
+        self._score_order = np.argsort(-self._main["__score"], kind="stable")
+        self._reset_delta()
+
+    def _reset_delta(self):
+        self._delta = {name: values[:0] for name, values in self._main.items()}
+        self._delta_cells = np.empty(0, dtype=np.int64)
+        self._delta_size = 0
+
+    # ➕ Append new dataset rows without re-sorting the whole index
+    def append(self, frame):
+        if frame is None or len(frame) == 0:
+            return
+        with self._lock:
+            arrays = self._to_arrays(frame[self.columns])
+            cells = self._cells(self._features(arrays))
+            self._delta = {name: np.concatenate([self._delta[name], arrays[name]]) for name in self._delta}
+            self._delta_cells = np.concatenate([self._delta_cells, cells])
+            self._delta_size += len(frame)
+            if self._delta_size > max(MIN_MERGE_ROWS, MERGE_FRACTION * self._main_size):
+                merged = {name: np.concatenate([self._main[name], self._delta[name]]) for name in self._main}
+                self._build(merged)
+
+    def _record(self, arrays, pos):
+        record = {}
+        for col in self.columns:
+            value = arrays[col][pos]
+            if isinstance(value, np.float32):
+                value = float(str(value))  # Shortest float32 repr, e.g. 6.5 rather than 6.5000000953
+            record[col] = value.item() if isinstance(value, np.generic) else value
+        return record
+
+    # 🔎 Pick the best-scoring row per distinct crop among candidate positions
+    def _distinct_top(self, k, main_pos, delta_pos):
+        scores = np.concatenate([self._main["__score"][main_pos], self._delta["__score"][delta_pos]])
+        codes = np.concatenate([self._main["__crop_code"][main_pos], self._delta["__crop_code"][delta_pos]])
+        order = np.argsort(-scores, kind="stable")
+        _, first = np.unique(codes[order], return_index=True)
+        picked = order[np.sort(first)[:k]]
+        results = []
+        for i in picked:
+            if i < len(main_pos):
+                results.append(self._record(self._main, main_pos[i]))
+            else:
+                results.append(self._record(self._delta, delta_pos[i - len(main_pos)]))
+        return results
+
+    # 🏆 Top-k most sustainable distinct crops in the whole dataset
+    def best(self, k=1):
+        with self._lock:
+            window = max(64 * k, 256)
+            while True:
+                main_pos = self._score_order[:window]
+                delta_pos = np.arange(self._delta_size)
+                results = self._distinct_top(k, main_pos, delta_pos)
+                if len(results) >= k or window >= self._main_size:
+                    return results
+                window *= 4
+
+    def best_row(self):
+        results = self.best(1)
+        return results[0] if results else None
+
+    # 📍 Top-k most sustainable distinct crops grown near the given conditions
+    # Any condition left as None matches every bin of that feature.
+    def top_k(self, k=5, soil_ph=None, soil_moisture=None, temperature=None, rainfall=None):
+        query = (soil_ph, soil_moisture, temperature, rainfall)
+        if all(value is None for value in query):
+            return self.best(k)
+        with self._lock:
+            centers = [
+                None if value is None
+                else int(np.clip((float(value) - self._low[i]) // self._width[i], 0, self.bins - 1))
+                for i, value in enumerate(query)
+            ]
+            axes = tuple(i for i, center in enumerate(centers) if center is not None)
+            leaders, starts = self._projections[axes]
+            shape = (self.bins,) * len(axes)
+            delta_cells = self._delta_cells
+            if self._delta_size and len(axes) < len(INDEX_FEATURES):
+                binned = np.array(np.unravel_index(delta_cells, (self.bins,) * len(INDEX_FEATURES)))
+                delta_cells = np.ravel_multi_index(binned[list(axes)], shape)
+            for radius in range(self.bins):
+                ranges = [
+                    np.arange(max(0, centers[axis] - radius), min(self.bins, centers[axis] + radius + 1))
+                    for axis in axes
+                ]
+                cells = np.ravel_multi_index(np.ix_(*ranges), shape).ravel()
+                main_pos = self._gather(cells, leaders, starts)
+                delta_pos = np.flatnonzero(np.isin(delta_cells, cells)) if self._delta_size else np.empty(0, dtype=np.int64)
+                results = self._distinct_top(k, main_pos, delta_pos)
+                if len(results) >= k or radius >= self.bins - 1:
+                    return results
+        return []
+
+    # 📦 Concatenate the contiguous (cell, crop) leader slices of the given grid cells
+    def _gather(self, cells, leaders, leader_starts):
+        starts = leader_starts[cells]
+        lengths = leader_starts[cells + 1] - starts
+        total = int(lengths.sum())
+        if total == 0:
+            return np.empty(0, dtype=np.int64)
+        offsets = np.repeat(starts - np.concatenate([[0], np.cumsum(lengths)[:-1]]), lengths)
+        return leaders[offsets + np.arange(total)]
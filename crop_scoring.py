@@ -0,0 +1,178 @@
+import argparse
+import time
+import numpy as np
+import pandas as pd
+
+from crop_index import INDEX_FEATURES, SCORE_COLUMN, CROP_COLUMN
+
+# ⚖️ How much each signal contributes to a crop's score (the three add up to 1)
+DEFAULT_WEIGHTS = {"similarity": 0.5, "sustainability": 0.3, "market": 0.2}
+
+# Farmers scored per NumPy pass in rank_many (bounds the farmers x crops x features temporaries)
+BATCH_SIZE = 65536
+
+
+# 🧮 Deterministic crop scoring for one or many farmers
+# Every crop type gets a profile of the conditions it is grown under, weighted by
+# sustainability, so rows where it did well count more. A farmer's score for a
+# crop combines:
+#   similarity     - exp(-z²/2) of the farmer's known conditions vs the crop profile
+#   sustainability - the crop's mean Sustainability_Score relative to the best crop's
+#   market         - the crop's market price relative to the best-paid crop's (0 if unknown)
+# Missing conditions (None/NaN) are simply left out of the similarity.
+class CropScorer:
+    def __init__(self, farmer_data, prices=None, weights=None):
+        self.weights = dict(DEFAULT_WEIGHTS, **(weights or {}))
+        self._build_profiles(farmer_data)
+        self.set_prices(prices or {})
+
+    def _build_profiles(self, frame):
+        frame = frame[frame[CROP_COLUMN].notna()]  # Rows without a crop name can't be recommended
+        crops = frame[CROP_COLUMN].astype(str).to_numpy()
+        codes, names = pd.factorize(crops)
+        features = np.column_stack([
+            pd.to_numeric(frame[col], errors="coerce").to_numpy(dtype=np.float64) for col in INDEX_FEATURES
+        ])
+        score = pd.to_numeric(frame[SCORE_COLUMN], errors="coerce").to_numpy(dtype=np.float64)
+        score = np.nan_to_num(score, nan=0.0)
+        weight = np.clip(score, 0, None) + 1e-9  # Weight rows by how sustainable they were
+
+        n_crops = len(names)
+        known = ~np.isnan(features)
+        values = np.where(known, features, 0.0)
+        w = weight[:, None] * known
+        total = np.zeros((n_crops, len(INDEX_FEATURES)))
+        np.add.at(total, codes, w)
+        mean = np.zeros_like(total)
+        np.add.at(mean, codes, w * values)
+        mean /= np.maximum(total, 1e-12)
+        var = np.zeros_like(total)
+        np.add.at(var, codes, w * (values - mean[codes]) ** 2)
+        std = np.sqrt(var / np.maximum(total, 1e-12))
+        # Floor the spread so a crop seen under a single condition does not dominate
+        std = np.maximum(std, 0.05 * np.nanstd(features, axis=0) + 1e-9)
+
+        counts = np.bincount(codes, minlength=n_crops)
+        sustainability = np.bincount(codes, weights=score, minlength=n_crops) / np.maximum(counts, 1)
+        high = sustainability.max() if n_crops else 0.0
+
+        self.crops = [str(name) for name in names]
+        self._crop_codes = {name: i for i, name in enumerate(self.crops)}
+        self._mean = mean
+        self._std = std
+        self.sustainability = sustainability
+        self._sustainability_norm = np.clip(sustainability / high, 0, 1) if high > 0 else np.zeros(n_crops)
+
+    # 🌱 Sustainability-weighted mean conditions a crop is grown under, in INDEX_FEATURES order
+    def typical_conditions(self, code):
+        return tuple(float(value) for value in self._mean[code])
+
+    # 💰 Market prices per crop, as a dict or (crop, price) pairs
+    def set_prices(self, prices):
+        items = prices.items() if isinstance(prices, dict) else prices
+        self.prices = np.full(len(self.crops), np.nan)
+        for crop, price in items:
+            code = self._crop_codes.get(str(crop))
+            if code is not None:
+                self.prices[code] = float(price)
+        top = np.nanmax(self.prices) if np.isfinite(self.prices).any() else 0.0
+        self._market_norm = np.nan_to_num(self.prices / top, nan=0.0) if top > 0 else np.zeros(len(self.crops))
+
+    # 📐 Scores for an (n_farmers, 4) array of conditions in INDEX_FEATURES order
+    # Returns (score, similarity), both shaped (n_farmers, n_crops).
+    def score(self, conditions):
+        conditions = np.atleast_2d(np.asarray(conditions, dtype=np.float64))
+        z = (conditions[:, None, :] - self._mean[None, :, :]) / self._std[None, :, :]
+        known = ~np.isnan(z)
+        squared = np.where(known, z * z, 0.0).sum(axis=2)
+        n_known = known.sum(axis=2)
+        similarity = np.exp(-0.5 * squared / np.maximum(n_known, 1))
+        score = (self.weights["similarity"] * similarity
+                 + self.weights["sustainability"] * self._sustainability_norm[None, :]
+                 + self.weights["market"] * self._market_norm[None, :])
+        return score, similarity
+
+    # 🏆 Indices of the k best crops per farmer, best first
+    def top_k(self, score, k=3):
+        k = min(k, score.shape[1])
+        if k < score.shape[1]:
+            picked = np.argpartition(-score, k - 1, axis=1)[:, :k]
+        else:
+            picked = np.tile(np.arange(score.shape[1]), (score.shape[0], 1))
+        order = np.argsort(-np.take_along_axis(score, picked, axis=1), axis=1, kind="stable")
+        return np.take_along_axis(picked, order, axis=1)
+
+    def _records(self, score, similarity, picked):
+        return [
+            {
+                "crop": self.crops[code],
+                "score": round(float(score[code]), 4),
+                "similarity": round(float(similarity[code]), 4),
+                "sustainability": round(float(self.sustainability[code]), 2),
+                "market_price": None if np.isnan(self.prices[code]) else round(float(self.prices[code]), 2),
+            }
+            for code in picked
+        ]
+
+    # 🌾 Ranked crops for one farmer, as a list of dicts (best first)
+    def rank(self, soil_ph=None, soil_moisture=None, temperature=None, rainfall=None, k=3):
+        conditions = [np.nan if value is None else float(value) for value in (soil_ph, soil_moisture, temperature, rainfall)]
+        score, similarity = self.score([conditions])
+        return self._records(score[0], similarity[0], self.top_k(score, k)[0])
+
+    # 👨‍🌾👨‍🌾 Ranked crops for many farmers in a few NumPy passes
+    # `conditions` is an (n, 4) array (NaN = unknown); returns an (n, k) array of crop
+    # codes (see .crops) and the matching (n, k) scores.
+    def rank_many(self, conditions, k=3, batch_size=BATCH_SIZE):
+        conditions = np.atleast_2d(np.asarray(conditions, dtype=np.float64))
+        k = min(k, len(self.crops))
+        codes = np.empty((len(conditions), k), dtype=np.int64)
+        scores = np.empty((len(conditions), k))
+        for start in range(0, len(conditions), batch_size):
+            score, _ = self.score(conditions[start:start + batch_size])
+            picked = self.top_k(score, k)
+            codes[start:start + batch_size] = picked
+            scores[start:start + batch_size] = np.take_along_axis(score, picked, axis=1)
+        return codes, scores
+
+
+# ⏱️ Farmers/second for batch scoring vs one rank() call per farmer
+def benchmark(farmers=100000, crops=20, rows=100000, k=3, seed=42):
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame({
+        "Soil_pH": rng.uniform(5.5, 7.5, rows),
+        "Soil_Moisture": rng.uniform(10, 45, rows),
+        "Temperature_C": rng.uniform(15, 35, rows),
+        "Rainfall_mm": rng.uniform(50, 300, rows),
+        CROP_COLUMN: rng.choice([f"Crop{i}" for i in range(crops)], rows),
+        SCORE_COLUMN: rng.uniform(0, 100, rows),
+    })
+    start = time.perf_counter()
+    scorer = CropScorer(frame, prices={f"Crop{i}": rng.uniform(200, 500) for i in range(crops)})
+    print(f"🧮 Profiles for {crops} crops from {rows:,} rows in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    conditions = np.column_stack([
+        rng.uniform(5.5, 7.5, farmers), rng.uniform(10, 45, farmers),
+        rng.uniform(15, 35, farmers), rng.uniform(50, 300, farmers),
+    ])
+    conditions[rng.random(conditions.shape) < 0.1] = np.nan  # Some farmers leave fields blank
+
+    start = time.perf_counter()
+    scorer.rank_many(conditions, k)
+    elapsed = time.perf_counter() - start
+    print(f"   batch:   {farmers:,} farmers in {elapsed:.3f}s ({farmers / elapsed:,.0f} farmers/s)")
+
+    singles = min(farmers, 5000)
+    start = time.perf_counter()
+    for row in conditions[:singles]:
+        scorer.rank(*[None if np.isnan(v) else v for v in row], k=k)
+    elapsed = time.perf_counter() - start
+    print(f"   rank():  {singles:,} farmers in {elapsed:.3f}s ({singles / elapsed:,.0f} farmers/s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Crop scoring throughput benchmark")
+    parser.add_argument("--farmers", type=int, default=100000)
+    parser.add_argument("--crops", type=int, default=20)
+    args = parser.parse_args()
+    benchmark(args.farmers, args.crops)
@@ -0,0 +1,167 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+import numpy as np
+import pandas as pd
+
+CACHE_DIR_NAME = ".agri_cache"
+CACHE_VERSION = 1
+
+
+# 🔑 Content hash of the source workbook (used when the mtime no longer matches)
+def file_digest(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_dir_for(source_path, cache_root=None):
+    cache_root = cache_root or os.path.join(os.path.dirname(os.path.abspath(source_path)), CACHE_DIR_NAME)
+    stem = os.path.splitext(os.path.basename(source_path))[0]
+    return os.path.join(cache_root, stem)
+
+
+# 📉 Downcast a column for the cache: text -> categorical codes, floats -> float32
+def _encode_column(series):
+    if pd.api.types.is_bool_dtype(series):
+        return series.to_numpy(dtype=np.bool_), {"kind": "bool"}
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series.to_numpy(dtype="datetime64[ns]").view(np.int64), {"kind": "datetime"}
+    if pd.api.types.is_integer_dtype(series):
+        values = pd.to_numeric(series, downcast="integer").to_numpy()
+        return values, {"kind": "int"}
+    if pd.api.types.is_float_dtype(series):
+        return series.to_numpy(dtype=np.float32), {"kind": "float"}
+    categorical = series.astype("category")
+    codes = categorical.cat.codes.to_numpy()
+    categories = [str(c) for c in categorical.cat.categories]
+    return codes, {"kind": "category", "categories": categories}
+
+
+def _decode_column(values, info):
+    if info["kind"] == "category":
+        return pd.Categorical.from_codes(values, categories=info["categories"])
+    if info["kind"] == "datetime":
+        return values.view("datetime64[ns]")
+    return values
+
+
+def _read_meta(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        return meta if meta.get("version") == CACHE_VERSION else None
+    except (OSError, ValueError):
+        return None
+
+
+def _write_meta(cache_dir, meta):
+    tmp_path = os.path.join(cache_dir, "meta.json.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp_path, os.path.join(cache_dir, "meta.json"))
+
+
+# 🧱 Convert a workbook once into one .npy file per column
+def build_cache(source_path, cache_dir, digest=None):
+    start = time.perf_counter()
+    frame = pd.read_excel(source_path)
+    return write_cache(frame, source_path, cache_dir, time.perf_counter() - start, digest)
+
+
+# Cache an already parsed frame as the columnar copy of `source_path`
+def write_cache(frame, source_path, cache_dir, parse_seconds=0.0, digest=None):
+    tmp_dir = cache_dir + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    columns = []
+    for i, name in enumerate(frame.columns):
+        values, info = _encode_column(frame[name])
+        info.update({"name": str(name), "file": f"col_{i}.npy"})
+        np.save(os.path.join(tmp_dir, info["file"]), np.ascontiguousarray(values))
+        columns.append(info)
+
+    stat = os.stat(source_path)
+    meta = {
+        "version": CACHE_VERSION,
+        "source": os.path.abspath(source_path),
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "sha256": digest or file_digest(source_path),
+        "rows": len(frame),
+        "columns": columns,
+        "xlsx_parse_seconds": parse_seconds,
+        "xlsx_memory_bytes": int(frame.memory_usage(deep=True).sum()),
+    }
+    _write_meta(tmp_dir, meta)
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    os.replace(tmp_dir, cache_dir)
+    return meta
+
+
+# ✅ Decide whether the cache still matches the workbook (mtime first, hash as fallback)
+def _cache_is_fresh(source_path, cache_dir, meta):
+    stat = os.stat(source_path)
+    if meta["mtime_ns"] == stat.st_mtime_ns and meta["size"] == stat.st_size:
+        return True, None
+    digest = file_digest(source_path)
+    if digest == meta["sha256"]:
+        # Touched but unchanged: remember the new mtime so the next start skips hashing
+        meta.update({"mtime_ns": stat.st_mtime_ns, "size": stat.st_size})
+        _write_meta(cache_dir, meta)
+        return True, None
+    return False, digest
+
+
+def _load_from_cache(cache_dir, meta):
+    data = {}
+    for info in meta["columns"]:
+        values = np.load(os.path.join(cache_dir, info["file"]), mmap_mode="r")
+        data[info["name"]] = _decode_column(values, info)
+    return pd.DataFrame(data, copy=False)
+
+
+# 📂 Load an Excel dataset through the columnar cache
+# Returns the frame and a small report of the time and memory saved.
+def load_dataset(source_path, cache_root=None):
+    cache_dir = cache_dir_for(source_path, cache_root)
+    start = time.perf_counter()
+    meta = _read_meta(cache_dir)
+    digest = None
+    if meta is not None:
+        fresh, digest = _cache_is_fresh(source_path, cache_dir, meta)
+        if not fresh:
+            meta = None
+    from_cache = meta is not None
+    if meta is None:
+        meta = build_cache(source_path, cache_dir, digest)
+    frame = _load_from_cache(cache_dir, meta)
+    load_seconds = time.perf_counter() - start
+
+    memory_bytes = int(frame.memory_usage(deep=True).sum())
+    report = {
+        "source": os.path.basename(source_path),
+        "rows": meta["rows"],
+        "from_cache": from_cache,
+        "load_seconds": load_seconds,
+        "xlsx_parse_seconds": meta["xlsx_parse_seconds"],
+        "seconds_saved": meta["xlsx_parse_seconds"] - load_seconds if from_cache else 0.0,
+        "memory_bytes": memory_bytes,
+        "xlsx_memory_bytes": meta["xlsx_memory_bytes"],
+        "memory_saved_bytes": meta["xlsx_memory_bytes"] - memory_bytes,
+    }
+    return frame, report
+
+
+def format_report(report):
+    source = "cache" if report["from_cache"] else "xlsx (cache built)"
+    return (
+        f"📦 {report['source']}: {report['rows']} rows from {source} in {report['load_seconds']:.2f}s "
+        f"(xlsx parse {report['xlsx_parse_seconds']:.2f}s, saved {report['seconds_saved']:.2f}s; "
+        f"memory {report['memory_bytes'] / 1e6:.1f} MB vs {report['xlsx_memory_bytes'] / 1e6:.1f} MB, "
+        f"saved {report['memory_saved_bytes'] / 1e6:.1f} MB)"
+    )
@@ -0,0 +1,179 @@
+import heapq
+import itertools
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import metrics
+
+UI_PUMP_MS = 33  # How often the Tk thread drains posted UI updates (~30 fps)
+
+
+class _Subscription:
+    def __init__(self, handler, topics, debounce, name):
+        self.handler = handler
+        self.topics = topics
+        self.debounce = debounce
+        self.name = name
+        self.pending = {}  # topic -> latest payload, coalesced until the handler runs
+        self.due = None
+        self.running = False
+
+
+# 📣 Event bus and scheduler for the agents
+# Handlers subscribe to one or more topics and are called as handler(events), where
+# `events` maps each topic published since the last call to its latest payload:
+#   - coalescing: any number of publishes before a run become a single call
+#   - debouncing: a run starts `debounce` seconds after the first unhandled publish,
+#     so a burst of changes is handled once (a steady stream can't postpone it forever)
+#   - a handler never runs concurrently with itself; publishes during a run queue
+#     exactly one follow-up run
+# every() publishes a topic on a fixed interval. Handlers run on a small thread pool
+# so a slow LLM call never holds up a weather fetch. Nothing runs when nothing is
+# published, and close() stops the timers and waits for running handlers.
+class EventBus:
+    def __init__(self, workers=4):
+        self._subscriptions = []
+        self._timers = []  # heap of (due, seq, kind, item)
+        self._seq = itertools.count()
+        self._lock = threading.Condition()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="agent")
+        self._futures = set()
+        self._closed = False
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="event-bus", daemon=True)
+        self._thread.start()
+        return self
+
+    def subscribe(self, handler, *topics, debounce=0.0):
+        subscription = _Subscription(handler, set(topics), debounce, getattr(handler, "__name__", repr(handler)))
+        with self._lock:
+            self._subscriptions.append(subscription)
+        return subscription
+
+    def publish(self, topic, payload=None):
+        with self._lock:
+            if self._closed:
+                return
+            now = time.monotonic()
+            for subscription in self._subscriptions:
+                if topic in subscription.topics:
+                    subscription.pending[topic] = payload
+                    if not subscription.running and subscription.due is None:
+                        self._schedule(subscription, now + subscription.debounce)
+            self._lock.notify()
+
+    # ⏰ Publish `topic` every `interval` seconds (first publish after `delay`, default now)
+    def every(self, interval, topic, payload=None, delay=0.0):
+        with self._lock:
+            heapq.heappush(self._timers, (time.monotonic() + delay, next(self._seq), "timer", (interval, topic, payload)))
+            self._lock.notify()
+
+    def _schedule(self, subscription, due):
+        subscription.due = due
+        heapq.heappush(self._timers, (due, next(self._seq), "run", subscription))
+
+    def _run(self):
+        while True:
+            fire = []
+            with self._lock:
+                while not self._closed:
+                    now = time.monotonic()
+                    if self._timers and self._timers[0][0] <= now:
+                        break
+                    self._lock.wait(self._timers[0][0] - now if self._timers else None)
+                if self._closed:
+                    return
+                now = time.monotonic()
+                while self._timers and self._timers[0][0] <= now:
+                    due, _, kind, item = heapq.heappop(self._timers)
+                    if kind == "timer":
+                        interval, topic, payload = item
+                        heapq.heappush(self._timers, (max(due + interval, now), next(self._seq), "timer", item))
+                        fire.append((topic, payload))
+                    elif item.due == due and not item.running:
+                        item.running = True
+                        item.due = None
+                        events, item.pending = item.pending, {}
+                        future = self._executor.submit(self._call, item, events)
+                        self._futures.add(future)
+                        future.add_done_callback(self._futures.discard)
+            for topic, payload in fire:
+                self.publish(topic, payload)
+
+    def _call(self, subscription, events):
+        try:
+            with metrics.timer("agent_seconds", agent=subscription.name):
+                subscription.handler(events)
+        except Exception as e:
+            print(f"⚠️ Agent Error ({subscription.name}):", e)
+        finally:
+            with self._lock:
+                subscription.running = False
+                if subscription.pending and not self._closed:
+                    self._schedule(subscription, time.monotonic() + subscription.debounce)
+                    self._lock.notify()
+
+    # 🛑 Stop timers and new runs, then wait up to `timeout` seconds for running handlers
+    def close(self, timeout=5.0):
+        with self._lock:
+            self._closed = True
+            self._timers = []
+            self._lock.notify()
+        if self._thread is not None:
+            self._thread.join()
+        futures = list(self._futures)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        wait(futures, timeout=timeout)
+
+
+# 🪟 Single root.after pump for UI updates posted from any thread
+# post() queues a Tk callback; the Tk thread drains the queue every UI_PUMP_MS, so
+# background threads never call into Tk. Repeated posts of the same callback and
+# arguments before a drain run only once, in the place of the last post, so the
+# final state of a stateful update (e.g. set_generating) always wins.
+class UiPump:
+    def __init__(self, root, interval_ms=UI_PUMP_MS):
+        self.root = root
+        self.interval_ms = interval_ms
+        self._queue = queue.SimpleQueue()
+        self._after_id = None
+
+    def post(self, callback, *args):
+        self._queue.put((callback, args))
+
+    def start(self):
+        self._after_id = self.root.after(self.interval_ms, self._drain)
+        return self
+
+    def _drain(self):
+        calls = {}
+        while True:
+            try:
+                call = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            key = call
+            try:
+                hash(key)
+            except TypeError:  # Unhashable arguments are never merged
+                key = object()
+            calls.pop(key, None)
+            calls[key] = call
+        if calls:
+            metrics.observe("ui_pump_batch_size", len(calls))
+            with metrics.timer("ui_pump_seconds"):
+                for callback, args in calls.values():
+                    try:
+                        callback(*args)
+                    except Exception as e:
+                        print("⚠️ UI Update Error:", e)
+        self._after_id = self.root.after(self.interval_ms, self._drain)
+
+    def stop(self):
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
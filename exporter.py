@@ -0,0 +1,201 @@
+import collections
+import csv
+import gzip
+import json
+import os
+
+import storage
+
+EXPORT_COLUMNS = (
+    ("farmer_name", "Farmer Name"),
+    ("suggested_crop", "Suggested Crops"),
+    ("soil_ph", "Soil pH"),
+    ("soil_moisture", "Soil Moisture"),
+    ("temperature", "Temperature (°C)"),
+    ("rainfall", "Rainfall (mm)"),
+    ("sustainability_score", "Sustainability Score"),
+    ("weather_condition", "Weather Condition"),
+    ("market_price", "Market Price (₹/ton)"),
+)
+HEADERS = [label for _, label in EXPORT_COLUMNS]
+CHUNK_SIZE = 5000
+EXCEL_MAX_ROWS = 1048576
+
+ExportFilters = collections.namedtuple("ExportFilters", "farmer since until crop", defaults=(None, None, None, None))
+
+
+class ExportCancelled(Exception):
+    pass
+
+
+# 🔎 WHERE clause for the filters, evaluated by SQLite (farmer/timestamp and crop are indexed)
+def _where(filters):
+    clauses, params = [], []
+    if filters is None:
+        return "", params
+    if filters.farmer:
+        clauses.append("farmer_name = ? COLLATE NOCASE")
+        params.append(filters.farmer)
+    if filters.since:
+        clauses.append("timestamp >= ?")
+        params.append(filters.since)
+    if filters.until:
+        clauses.append("timestamp < date(?, '+1 day')")  # Inclusive end date
+        params.append(filters.until)
+    if filters.crop:
+        clauses.append("id IN (SELECT recommendation_id FROM recommendation_crops WHERE crop = ?)")
+        params.append(filters.crop)
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+def count_rows(conn, filters=None):
+    where, params = _where(filters)
+    return conn.execute(f"SELECT COUNT(*) FROM farmer_recommendations{where}", params).fetchone()[0]
+
+
+# 📜 Stream matching rows in chunks from one read transaction
+def iter_chunks(conn, filters=None, chunk_size=CHUNK_SIZE):
+    where, params = _where(filters)
+    # Rows carry the suggestion id; each distinct text is read and decompressed once
+    columns = ", ".join("suggestion_id" if name == "suggested_crop" else name for name, _ in EXPORT_COLUMNS)
+    text_at = [name for name, _ in EXPORT_COLUMNS].index("suggested_crop")
+    texts = {}
+    cursor = conn.execute(f"SELECT {columns} FROM farmer_recommendations{where} ORDER BY id", params)
+    try:
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            storage.load_suggestions(conn, (row[text_at] for row in rows), texts)
+            yield [row[:text_at] + (texts.get(row[text_at]),) + row[text_at + 1:] for row in rows]
+    finally:
+        cursor.close()
+
+
+# ✍️ Streaming writers; each accepts row chunks and keeps memory bounded
+class CsvWriter:
+    def __init__(self, path):
+        self._file = open(path, "w", newline="", encoding="utf-8-sig")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(HEADERS)
+
+    def write(self, rows):
+        self._writer.writerows(rows)
+
+    def close(self):
+        self._file.close()
+
+
+class JsonlGzipWriter:
+    def __init__(self, path):
+        self._file = gzip.open(path, "wt", encoding="utf-8")
+
+    def write(self, rows):
+        self._file.writelines(json.dumps(dict(zip(HEADERS, row)), ensure_ascii=False) + "\n" for row in rows)
+
+    def close(self):
+        self._file.close()
+
+
+class ExcelWriter:
+    def __init__(self, path):
+        from openpyxl import Workbook
+        self._path = path
+        self._workbook = Workbook(write_only=True)  # Rows are streamed to disk, not kept in memory
+        self._sheet = None
+        self._rows_in_sheet = 0
+        self._sheets = 0
+
+    def _new_sheet(self):
+        self._sheets += 1
+        self._sheet = self._workbook.create_sheet(
+            "Recommendations" if self._sheets == 1 else f"Recommendations {self._sheets}"
+        )
+        self._sheet.append(HEADERS)
+        self._rows_in_sheet = 1
+
+    def write(self, rows):
+        for row in rows:
+            if self._sheet is None or self._rows_in_sheet >= EXCEL_MAX_ROWS:
+                self._new_sheet()
+            self._sheet.append(row)
+            self._rows_in_sheet += 1
+
+    def close(self):
+        if self._sheet is None:
+            self._new_sheet()
+        self._workbook.save(self._path)
+
+
+class ParquetWriter:
+    def __init__(self, path):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow)")
+        self._pa = pa
+        self._schema = pa.schema(
+            [(label, pa.string() if name in ("farmer_name", "suggested_crop", "weather_condition") else pa.float64())
+             for name, label in EXPORT_COLUMNS]
+        )
+        self._writer = pq.ParquetWriter(path, self._schema, compression="zstd")
+
+    def write(self, rows):
+        columns = list(zip(*rows))
+        arrays = [self._pa.array(values, type=field.type) for values, field in zip(columns, self._schema)]
+        self._writer.write_table(self._pa.Table.from_arrays(arrays, schema=self._schema))
+
+    def close(self):
+        self._writer.close()
+
+
+WRITERS = {
+    ".xlsx": ExcelWriter,
+    ".csv": CsvWriter,
+    ".parquet": ParquetWriter,
+    ".jsonl.gz": JsonlGzipWriter,
+}
+
+
+def writer_for(path):
+    lowered = path.lower()
+    for suffix, writer_class in WRITERS.items():
+        if lowered.endswith(suffix):
+            return writer_class
+    raise ValueError(f"Unsupported export format: {path} (use {', '.join(WRITERS)})")
+
+
+# 📤 Export matching recommendations to `path`, chunk by chunk
+# progress(done, total) is called once the total is known and after every chunk;
+# setting `cancel` (a threading.Event) stops the export and removes the partial file.
+# Pass `total` when the matching rows were already counted.
+def export(conn, path, filters=None, progress=None, cancel=None, chunk_size=CHUNK_SIZE, total=None):
+    writer_class = writer_for(path)
+    if total is None:
+        total = count_rows(conn, filters)
+    if progress:
+        progress(0, total)
+    suffix = next(s for s in WRITERS if path.lower().endswith(s))
+    tmp_path = path[:-len(suffix)] + ".part" + suffix
+    writer = writer_class(tmp_path)
+    done = 0
+    try:
+        for rows in iter_chunks(conn, filters, chunk_size):
+            if cancel is not None and cancel.is_set():
+                raise ExportCancelled()
+            writer.write(rows)
+            done += len(rows)
+            if progress:
+                progress(done, total)
+        writer.close()
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            writer.close()
+        except Exception:
+            pass
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return done
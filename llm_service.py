@@ -0,0 +1,304 @@
+import collections
+import hashlib
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+import metrics
+
+DEFAULT_MODEL = "tinyllama"
+CACHE_SIZE = 512
+CACHE_TTL = 24 * 3600  # Seconds a generated answer is reused for the same prompt
+
+LLMResponse = collections.namedtuple("LLMResponse", "text cached latency")
+
+
+class LLMCancelled(Exception):
+    pass
+
+
+# 💽 Optional SQLite backing so cached answers survive restarts
+class DiskCache:
+    def __init__(self, path, ttl):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                model TEXT,
+                prompt TEXT,
+                response TEXT,
+                latency REAL,
+                created REAL
+            )
+        ''')
+        self._conn.execute("DELETE FROM llm_cache WHERE created < ?", (time.time() - ttl,))
+
+    def get(self, key):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT response, latency, created FROM llm_cache WHERE key = ? AND created >= ?",
+                (key, time.time() - self.ttl)
+            ).fetchone()
+
+    def put(self, key, model, prompt, response, latency, created):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, model, prompt, response, latency, created) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, prompt, response, latency, created)
+            )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# 🤖 Prompt-keyed cache in front of ollama.chat
+# Answers are kept in an LRU with a TTL (optionally backed by SQLite), concurrent
+# requests for the same prompt share one in-flight generation, and at most
+# `max_concurrency` generations run against ollama at once (None = unbounded).
+class LLMService:
+    def __init__(self, client_factory, model=DEFAULT_MODEL, max_entries=CACHE_SIZE, ttl=CACHE_TTL, cache_path=None,
+                 max_concurrency=None):
+        self.model = model
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._client_factory = client_factory
+        self._entries = collections.OrderedDict()  # key -> (text, latency, created)
+        self._in_flight = {}
+        self._waiters = collections.Counter()  # key -> callers waiting on someone else's generation
+        self._lock = threading.Lock()
+        self._disk = DiskCache(cache_path, ttl) if cache_path else None
+        self._stats = collections.Counter()
+        self._latency_total = 0.0
+        self._saved_seconds = 0.0
+        self._slots = threading.BoundedSemaphore(max_concurrency) if max_concurrency else None
+        self._waiting = 0
+        metrics.gauge("llm_in_flight", lambda: len(self._in_flight))
+        metrics.gauge("llm_waiting_for_slot", lambda: self._waiting)
+        for kind in ("hits", "disk_hits", "coalesced", "misses", "errors", "cancelled"):
+            metrics.gauge("llm_cache_total", lambda kind=kind: self._stats[kind], kind=kind)
+
+    def cache_key(self, prompt, model=None):
+        return hashlib.sha256(f"{model or self.model}\0{prompt}".encode("utf-8")).hexdigest()
+
+    def _lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is not None:
+            if time.time() - entry[2] <= self.ttl:
+                self._entries.move_to_end(key)
+                return entry, "hits"
+            del self._entries[key]
+        if self._disk is not None:
+            row = self._disk.get(key)
+            if row is not None:
+                self._remember(key, row)
+                return row, "disk_hits"
+        return None, None
+
+    def _remember(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    # Cached entry, or the in-flight future and whether this caller owns the generation
+    def _begin(self, key):
+        with self._lock:
+            entry, kind = self._lookup(key)
+            if entry is not None:
+                self._stats[kind] += 1
+                self._saved_seconds += entry[1]
+                return entry, None, False
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._in_flight[key] = future
+                self._stats["misses"] += 1
+            else:
+                self._stats["coalesced"] += 1
+                self._waiters[key] += 1
+            return None, future, owner
+
+    def _wait(self, key, future):
+        try:
+            text, latency = future.result()
+        finally:
+            with self._lock:
+                self._waiters[key] -= 1
+                if not self._waiters[key]:
+                    del self._waiters[key]
+        with self._lock:
+            self._saved_seconds += latency
+        return text
+
+    def _failed(self, key, future, error):
+        with self._lock:
+            self._stats["errors"] += 1
+            del self._in_flight[key]
+        future.set_exception(error)
+
+    # The owner cancelled: drop the generation unless other callers are waiting for it
+    def _abandon(self, key, future):
+        with self._lock:
+            if self._waiters[key]:
+                return False
+            self._stats["cancelled"] += 1
+            del self._in_flight[key]
+        future.set_exception(LLMCancelled("Generation cancelled"))
+        return True
+
+    def _finish(self, key, future, model, prompt, text, latency):
+        created = time.time()
+        with self._lock:
+            self._remember(key, (text, latency, created))
+            self._latency_total += latency
+            del self._in_flight[key]
+        if self._disk is not None:
+            try:
+                self._disk.put(key, model, prompt, text, latency, created)
+            except sqlite3.Error as e:
+                print("⚠️ LLM Cache Error:", e)
+        future.set_result((text, latency))
+
+    def _acquire_slot(self):
+        if self._slots is not None:
+            self._waiting += 1
+            with metrics.timer("llm_slot_wait_seconds"):
+                self._slots.acquire()
+            self._waiting -= 1
+
+    def _release_slot(self):
+        if self._slots is not None:
+            self._slots.release()
+
+    # 💬 Return the answer for a prompt, generating it at most once per TTL
+    def chat(self, prompt, model=None):
+        model = model or self.model
+        key = self.cache_key(prompt, model)
+        entry, future, owner = self._begin(key)
+        if entry is not None:
+            return LLMResponse(entry[0], True, 0.0)
+        if not owner:
+            return LLMResponse(self._wait(key, future), True, 0.0)
+
+        self._acquire_slot()
+        start = time.perf_counter()
+        try:
+            with metrics.timer("llm_generation_seconds", mode="chat"):
+                response = self._client_factory().chat(model=model, messages=[{"role": "user", "content": prompt}])
+            text = response["message"]["content"]
+        except Exception as e:
+            self._failed(key, future, e)
+            raise
+        finally:
+            self._release_slot()
+        latency = time.perf_counter() - start
+        self._finish(key, future, model, prompt, text, latency)
+        return LLMResponse(text, False, latency)
+
+    # 🌊 Yield the answer piece by piece as ollama generates it
+    # Cached answers (and answers another caller is already generating) arrive as a
+    # single piece. Setting `cancel` (a threading.Event) or closing the generator stops
+    # the generation; nothing partial is cached. If other callers are waiting for the
+    # same prompt, the generation finishes in the background for them instead.
+    def stream(self, prompt, model=None, cancel=None):
+        model = model or self.model
+        key = self.cache_key(prompt, model)
+        entry, future, owner = self._begin(key)
+        if entry is not None:
+            yield entry[0]
+            return
+        if not owner:
+            yield self._wait(key, future)
+            return
+
+        pieces = []
+        chunks = None
+        handed_off = False
+        self._acquire_slot()
+        start = time.perf_counter()
+        try:
+            chunks = self._client_factory().chat(model=model, messages=[{"role": "user", "content": prompt}], stream=True)
+            for chunk in chunks:
+                piece = chunk["message"]["content"]
+                if piece:
+                    if not pieces:
+                        metrics.observe("llm_first_token_seconds", time.perf_counter() - start)
+                    pieces.append(piece)
+                if cancel is not None and cancel.is_set():
+                    raise LLMCancelled("Generation cancelled")
+                if piece:
+                    yield piece
+        except (LLMCancelled, GeneratorExit):
+            if not self._abandon(key, future):
+                handed_off = True
+                threading.Thread(target=self._complete_stream, args=(key, future, model, prompt, chunks, pieces, start),
+                                 name="llm-stream", daemon=True).start()
+            raise
+        except BaseException as e:
+            self._failed(key, future, e if isinstance(e, Exception) else LLMCancelled("Generation cancelled"))
+            raise
+        finally:
+            if not handed_off:
+                self._release_slot()
+                if hasattr(chunks, "close"):
+                    chunks.close()
+        latency = time.perf_counter() - start
+        metrics.observe("llm_generation_seconds", latency, mode="stream")
+        self._finish(key, future, model, prompt, "".join(pieces), latency)
+
+    # Finish a stream its owner cancelled, for the callers coalesced onto it
+    def _complete_stream(self, key, future, model, prompt, chunks, pieces, start):
+        try:
+            for chunk in chunks:
+                piece = chunk["message"]["content"]
+                if piece:
+                    pieces.append(piece)
+        except Exception as e:
+            self._failed(key, future, e)
+            return
+        finally:
+            self._release_slot()
+            if hasattr(chunks, "close"):
+                chunks.close()
+        latency = time.perf_counter() - start
+        metrics.observe("llm_generation_seconds", latency, mode="stream")
+        self._finish(key, future, model, prompt, "".join(pieces), latency)
+
+    # 📈 Hit/miss/latency counters
+    def stats(self):
+        with self._lock:
+            misses = self._stats["misses"]
+            generated = misses - self._stats["errors"] - self._stats["cancelled"]
+            lookups = sum(self._stats[kind] for kind in ("hits", "disk_hits", "coalesced")) + misses
+            return {
+                "hits": self._stats["hits"],
+                "disk_hits": self._stats["disk_hits"],
+                "coalesced": self._stats["coalesced"],
+                "misses": misses,
+                "errors": self._stats["errors"],
+                "cancelled": self._stats["cancelled"],
+                "hit_rate": (lookups - misses) / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "in_flight": len(self._in_flight),
+                "avg_generation_seconds": self._latency_total / generated if generated else 0.0,
+                "model_seconds_saved": self._saved_seconds,
+            }
+
+    def format_stats(self):
+        stats = self.stats()
+        return (
+            f"🤖 LLM cache: {stats['hits']} hits, {stats['disk_hits']} disk hits, {stats['coalesced']} coalesced, "
+            f"{stats['misses']} misses ({stats['hit_rate']:.0%} hit rate), avg generation "
+            f"{stats['avg_generation_seconds']:.2f}s, {stats['model_seconds_saved']:.1f}s of model time saved"
+        )
+
+    def close(self):
+        if self._disk is not None:
+            self._disk.close()
@@ -0,0 +1,119 @@
+import argparse
+import http.client
+import json
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+# Reads up to the first generated token of an NDJSON stream (skipping the ranked
+# crops line), or the first body bytes of any other response
+def _read_first_piece(response):
+    if response.getheader("Content-Type", "").startswith("application/x-ndjson"):
+        while True:
+            line = response.readline()
+            if not line or line.startswith((b'{"token"', b'{"done"')):
+                return
+    else:
+        response.read1(64 * 1024)
+
+
+# 🔨 Fire `requests` requests at `url` from `concurrency` keep-alive connections
+# Returns a dict with requests/s and p50/p90/p99 latency (time to the full body) and
+# time to first token (first body bytes for non-streamed responses), which is what
+# matters for streamed recommendations.
+def run(url, requests=1000, concurrency=8, method="GET", body=None, timeout=120):
+    target = urlsplit(url)
+    path = (target.path or "/") + (f"?{target.query}" if target.query else "")
+    payload = json.dumps(body).encode("utf-8") if body is not None else None
+    headers = {"Content-Type": "application/json"} if payload is not None else {}
+    latencies, first_bytes, statuses = [], [], {}
+    lock = threading.Lock()
+    remaining = [requests]
+
+    def worker():
+        conn = http.client.HTTPConnection(target.hostname, target.port or 80, timeout=timeout)
+        while True:
+            with lock:
+                if remaining[0] <= 0:
+                    break
+                remaining[0] -= 1
+            start = time.perf_counter()
+            try:
+                conn.request(method, path, body=payload, headers=headers)
+                response = conn.getresponse()
+                _read_first_piece(response)
+                first_byte = time.perf_counter() - start
+                response.read()
+                status = response.status
+            except (OSError, http.client.HTTPException) as e:
+                conn.close()
+                conn = http.client.HTTPConnection(target.hostname, target.port or 80, timeout=timeout)
+                first_byte, status = None, type(e).__name__
+            elapsed = time.perf_counter() - start
+            with lock:
+                statuses[status] = statuses.get(status, 0) + 1
+                if status == 200:
+                    latencies.append(elapsed)
+                    first_bytes.append(first_byte)
+        conn.close()
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+
+    latencies.sort()
+    first_bytes.sort()
+    return {
+        "url": url,
+        "method": method,
+        "requests": requests,
+        "concurrency": concurrency,
+        "statuses": {str(status): count for status, count in statuses.items()},
+        "seconds": wall,
+        "requests_per_second": requests / wall if wall else 0.0,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p90_ms": percentile(latencies, 0.90) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "max_ms": (latencies[-1] if latencies else 0.0) * 1000,
+        "ttfb_p50_ms": percentile(first_bytes, 0.50) * 1000,
+        "ttfb_p99_ms": percentile(first_bytes, 0.99) * 1000,
+    }
+
+
+def format_result(result):
+    statuses = ", ".join(f"{status}: {count}" for status, count in sorted(result["statuses"].items()))
+    return (
+        f"🔨 {result['method']} {result['url']} x{result['requests']} @ {result['concurrency']} connections\n"
+        f"   {result['requests_per_second']:.1f} req/s over {result['seconds']:.2f}s ({statuses})\n"
+        f"   latency p50 {result['p50_ms']:.1f} ms, p90 {result['p90_ms']:.1f} ms, p99 {result['p99_ms']:.1f} ms, "
+        f"max {result['max_ms']:.1f} ms\n"
+        f"   first token p50 {result['ttfb_p50_ms']:.1f} ms, p99 {result['ttfb_p99_ms']:.1f} ms"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test for server.py")
+    parser.add_argument("url", nargs="?", default="http://127.0.0.1:8000/market/top?k=5")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--json", metavar="BODY", help="POST this JSON body (e.g. to /recommend)")
+    parser.add_argument("--output", metavar="PATH", help="also write the result as JSON")
+    args = parser.parse_args()
+
+    body = json.loads(args.json) if args.json else None
+    result = run(args.url, args.requests, args.concurrency, "POST" if body is not None else "GET", body)
+    print(format_result(result))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
@@ -0,0 +1,159 @@
+import threading
+import numpy as np
+import pandas as pd
+
+# 📈 Columns of the market researcher dataset
+PRODUCT_COLUMN = "Product"
+PRICE_COLUMN = "Market_Price_per_ton"
+DEMAND_COLUMN = "Demand_Index"  # Optional, like the columns below; demand_supply is 0 without them
+SUPPLY_COLUMN = "Supply_Index"
+ORDER_COLUMN = "Market_ID"  # Rows arrive in Market_ID order, so it doubles as time
+SEASON_COLUMN = "Seasonal_Factor"  # Optional; used when the dataset has it
+REGION_COLUMN = "Region"  # Optional; used when the dataset has it
+
+# Rows per product kept for the rolling statistics
+ROLLING_WINDOW = 30
+
+METRICS = ("latest_price", "rolling_mean", "mean_price", "volatility", "demand_supply")
+
+
+# 📊 Per-product market aggregates, refreshed incrementally
+# For every segment (all rows, each season, each region) only the last ROLLING_WINDOW
+# rows per product plus running price sums are kept, so appending rows costs
+# O(new rows + products x window) no matter how long the history is. Top-k answers
+# are ranked with argpartition and cached until the next append changes `version`.
+class MarketAnalytics:
+    def __init__(self, frame, window=ROLLING_WINDOW):
+        self.window = window
+        self.version = 0
+        self._lock = threading.Lock()
+        self._dimensions = [None] + [column for column in (SEASON_COLUMN, REGION_COLUMN) if column in frame.columns]
+        self._tails = {}
+        self._totals = {}
+        self._aggregates = {}
+        self._top_cache = {}
+        self._last_order = -np.inf
+        self._apply(self._prepare(frame))
+
+    # 🔢 Keep only the columns we aggregate, with plain strings and float64 prices
+    def _prepare(self, frame):
+        def numeric(column):
+            if column not in frame.columns:
+                return np.full(len(frame), np.nan)
+            return pd.to_numeric(frame[column], errors="coerce").to_numpy(dtype=np.float64)
+
+        prepared = pd.DataFrame({
+            PRODUCT_COLUMN: frame[PRODUCT_COLUMN].astype(str).to_numpy(),
+            "price": numeric(PRICE_COLUMN),
+            "demand": numeric(DEMAND_COLUMN),
+            "supply": numeric(SUPPLY_COLUMN),
+            "order": (pd.to_numeric(frame[ORDER_COLUMN], errors="coerce").to_numpy(dtype=np.float64)
+                      if ORDER_COLUMN in frame.columns else np.arange(len(frame), dtype=np.float64)),
+        })
+        for column in self._dimensions[1:]:
+            prepared[column] = frame[column].astype(str).to_numpy()
+        prepared = prepared[~np.isnan(prepared["price"].to_numpy())]
+        return prepared.sort_values("order", kind="stable")
+
+    def _keys(self, dimension):
+        return [PRODUCT_COLUMN] if dimension is None else [dimension, PRODUCT_COLUMN]
+
+    def _apply(self, rows):
+        for dimension in self._dimensions:
+            keys = self._keys(dimension)
+            tail = rows if dimension not in self._tails else pd.concat([self._tails[dimension], rows], ignore_index=True)
+            self._tails[dimension] = tail.groupby(keys, sort=False).tail(self.window)
+
+            totals = rows.groupby(keys, sort=False)["price"].agg(["sum", "count"])
+            if dimension in self._totals:
+                totals = self._totals[dimension].add(totals, fill_value=0)
+            self._totals[dimension] = totals
+
+            self._aggregates[dimension] = self._aggregate(dimension)
+        if len(rows):
+            self._last_order = max(self._last_order, rows["order"].iloc[-1])
+        self._top_cache = {}
+        self.version += 1
+
+    # 🧮 Latest price, rolling mean, volatility and demand-vs-supply per product
+    def _aggregate(self, dimension):
+        tail = self._tails[dimension]
+        grouped = tail.assign(balance=tail["demand"] - tail["supply"]).groupby(self._keys(dimension), sort=False)
+        aggregates = grouped.agg(
+            latest_price=("price", "last"),
+            rolling_mean=("price", "mean"),
+            rolling_std=("price", "std"),
+            demand_supply=("balance", "mean"),
+        )
+        totals = self._totals[dimension].reindex(aggregates.index)
+        aggregates["mean_price"] = totals["sum"] / totals["count"]
+        aggregates["rows"] = totals["count"].astype(np.int64)
+        # Coefficient of variation, so cheap and expensive crops compare fairly
+        aggregates["volatility"] = (aggregates.pop("rolling_std") / aggregates["rolling_mean"]).fillna(0.0)
+        aggregates["demand_supply"] = aggregates["demand_supply"].fillna(0.0)
+        return aggregates
+
+    # ➕ Fold newly arrived market rows into the aggregates
+    def append(self, frame):
+        if len(frame) == 0:
+            return False
+        with self._lock:
+            self._apply(self._prepare(frame))
+        return True
+
+    # 🔁 Append only the rows of `frame` newer than anything seen so far (by Market_ID)
+    def extend(self, frame):
+        if ORDER_COLUMN not in frame.columns:
+            return False
+        order = pd.to_numeric(frame[ORDER_COLUMN], errors="coerce").to_numpy(dtype=np.float64)
+        return self.append(frame[order > self._last_order])
+
+    def _segment(self, dimension, value):
+        aggregates = self._aggregates.get(dimension)
+        if aggregates is None:
+            raise ValueError(f"Market data has no {dimension} column")
+        if dimension is None:
+            return aggregates
+        try:
+            return aggregates.xs(str(value), level=dimension)
+        except KeyError:
+            return aggregates.iloc[0:0].droplevel(dimension)
+
+    # 🏆 Top-k products by `by`, optionally within one season or region
+    # Returns a list of (product, value) pairs; repeated calls are served from a cache.
+    def top_k(self, k=5, season=None, region=None, by="latest_price"):
+        if by not in METRICS:
+            raise ValueError(f"Unknown metric {by!r} (use one of {', '.join(METRICS)})")
+        if season is not None and region is not None:
+            raise ValueError("Filter by season or by region, not both")
+        dimension, value = (SEASON_COLUMN, season) if season is not None else (REGION_COLUMN, region) if region is not None else (None, None)
+        key = (dimension, value, k, by)
+        with self._lock:
+            cached = self._top_cache.get(key)
+            if cached is not None:
+                return cached
+            segment = self._segment(dimension, value)
+            scores = segment[by].to_numpy(dtype=np.float64)
+            products = segment.index.to_numpy()
+            if k < len(scores):
+                picked = np.argpartition(-scores, k - 1)[:k]
+            else:
+                picked = np.arange(len(scores))
+            picked = picked[np.argsort(-scores[picked], kind="stable")]
+            result = [(str(products[i]), round(float(scores[i]), 2)) for i in picked]
+            self._top_cache[key] = result
+            return result
+
+    # 📋 All aggregates for one segment as a DataFrame indexed by product
+    def summary(self, season=None, region=None):
+        with self._lock:
+            if season is not None:
+                return self._segment(SEASON_COLUMN, season).copy()
+            if region is not None:
+                return self._segment(REGION_COLUMN, region).copy()
+            return self._segment(None, None).copy()
+
+    def seasons(self):
+        if SEASON_COLUMN not in self._aggregates:
+            return []
+        return sorted(self._aggregates[SEASON_COLUMN].index.get_level_values(SEASON_COLUMN).unique())
@@ -0,0 +1,155 @@
+import argparse
+import os
+import random
+import time
+
+from matplotlib.figure import Figure
+
+import metrics
+
+BAR_COLOR = "#4CAF50"
+FACE_COLOR = "#f0f0f0"
+
+
+# 📊 Persistent "Top 5 Most Profitable Crops" chart
+# The Figure, axes and bars are created once (object-oriented API, nothing registered
+# with pyplot). Each update changes bar heights and tick labels in place: when only
+# heights change the bars are blitted over a cached background, otherwise the canvas
+# is redrawn with draw_idle().
+class MarketChart:
+    def __init__(self, canvas_class, master=None, n_bars=5, figsize=(8, 4)):
+        self.n_bars = n_bars
+        self.figure = Figure(figsize=figsize, facecolor=FACE_COLOR)
+        self.ax = self.figure.add_subplot()
+        self.bars = list(self.ax.bar(range(n_bars), [0] * n_bars, color=BAR_COLOR, animated=True))
+        self.ax.set_ylabel('Price (₹/ton)')
+        self.ax.set_title('Top 5 Most Profitable Crops')
+        self.ax.set_xticks(range(n_bars))
+        self.ax.set_xticklabels(["No Data"] + [""] * (n_bars - 1), rotation=45, ha='right')
+        self.figure.tight_layout()
+
+        self.canvas = canvas_class(self.figure, master=master) if master is not None else canvas_class(self.figure)
+        self._background = None
+        self._labels = None
+        self._values = None
+        self.canvas.mpl_connect("draw_event", self._on_draw)
+        self._canvas_draw = self.canvas.draw
+        self.canvas.draw = self._timed_draw  # draw_idle() ends up here too
+
+    def get_tk_widget(self):
+        return self.canvas.get_tk_widget()
+
+    def _timed_draw(self, *args, **kwargs):
+        with metrics.timer("chart_draw_seconds"):
+            return self._canvas_draw(*args, **kwargs)
+
+    # Full redraws skip the animated bars, so cache the background and paint them on top
+    def _on_draw(self, event):
+        metrics.increment("chart_full_redraws_total")
+        self._background = self.canvas.copy_from_bbox(self.figure.bbox)
+        self._draw_bars()
+
+    def _draw_bars(self):
+        for bar in self.bars:
+            self.ax.draw_artist(bar)
+
+    def _blit(self):
+        self.canvas.restore_region(self._background)
+        self._draw_bars()
+        self.canvas.blit(self.figure.bbox)
+
+    # 🔄 Show new (crop, price) pairs; returns False when nothing changed
+    def update(self, items):
+        items = list(items)[:self.n_bars]
+        labels = [str(crop) for crop, _ in items]
+        values = [float(price) for _, price in items]
+        if labels == self._labels and values == self._values:
+            return False
+
+        for i, bar in enumerate(self.bars):
+            bar.set_height(values[i] if i < len(values) else 0)
+            bar.set_visible(i < len(values))
+
+        layout_changed = labels != self._labels
+        if layout_changed:
+            self.ax.set_xticklabels(labels + [""] * (self.n_bars - len(labels)), rotation=45, ha='right')
+        top = max(values, default=0) * 1.1 or 1
+        low, high = self.ax.get_ylim()
+        if not (top <= high <= top * 1.5):  # Keep the axis steady for small moves
+            self.ax.set_ylim(0, top)
+            layout_changed = True
+
+        self._labels, self._values = labels, values
+        if layout_changed or self._background is None:
+            self.canvas.draw_idle()
+        else:
+            with metrics.timer("chart_blit_seconds"):
+                self._blit()
+        return True
+
+    def close(self):
+        self.get_tk_widget().destroy()
+
+
+# 🧠 Current resident set size in MB (Linux /proc, falling back to peak RSS)
+def current_rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except (OSError, ValueError):
+        import resource  # Unix only
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3
+
+
+def _simulated_prices(rng, crops):
+    picked = rng.sample(crops, 5) if rng.random() < 0.1 else crops[:5]
+    return [(crop, round(rng.uniform(200, 500), 2)) for crop in picked]
+
+
+# ⏱️ Compare the old recreate-per-tick chart with MarketChart over simulated updates
+# 1440 updates = 24 hours of one market tick per minute. Runs headless on Agg.
+def benchmark(updates=1440, report_every=240):
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    plt.rcParams["figure.max_open_warning"] = 0
+
+    crops = ["Wheat", "Rice", "Corn", "Soybean", "Millet", "Sorghum", "Barley", "Cotton"]
+
+    def old_tick(items):
+        fig, ax = plt.subplots(figsize=(8, 4))
+        fig.patch.set_facecolor(FACE_COLOR)
+        ax.bar([c for c, _ in items], [p for _, p in items], color=BAR_COLOR)
+        ax.set_ylabel('Price (₹/ton)')
+        ax.set_title('Top 5 Most Profitable Crops')
+        plt.xticks(rotation=45, ha='right')
+        plt.tight_layout()
+        FigureCanvasAgg(fig).draw()  # Like the old code, the figure is never closed
+
+    chart = MarketChart(FigureCanvasAgg)
+    chart.canvas.draw()
+
+    for name, tick in (("MarketChart (in place)", chart.update), ("recreate per tick (old)", old_tick)):
+        rng = random.Random(42)
+        latencies = []
+        print(f"📊 {name}")
+        start_rss = current_rss_mb()
+        for i in range(1, updates + 1):
+            items = _simulated_prices(rng, crops)
+            start = time.perf_counter()
+            tick(items)
+            latencies.append(time.perf_counter() - start)
+            if i % report_every == 0:
+                print(f"   {i:5d} updates ({i / 60:4.1f} h simulated): RSS {current_rss_mb():7.1f} MB")
+        latencies.sort()
+        print(f"   RSS growth {current_rss_mb() - start_rss:+.1f} MB, latency p50 "
+              f"{latencies[len(latencies) // 2] * 1000:.2f} ms, p99 {latencies[int(len(latencies) * 0.99)] * 1000:.2f} ms")
+    plt.close("all")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Market chart memory/latency benchmark")
+    parser.add_argument("--updates", type=int, default=1440, help="simulated market ticks (default: 24 h)")
+    args = parser.parse_args()
+    benchmark(args.updates, report_every=max(1, args.updates // 6))
@@ -0,0 +1,299 @@
+import collections
+import json
+import os
+import sys
+import threading
+import time
+
+PREFIX = "agri_"
+RESERVOIR_SIZE = 2048  # Recent samples kept per timer for p50/p95/p99
+QUANTILES = (0.5, 0.95, 0.99)
+
+enabled = os.environ.get("AGRI_METRICS", "").lower() in ("1", "true", "yes")
+
+
+class _NoopTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NOOP_TIMER = _NoopTimer()
+
+
+# ⏱️ Count, sum and a reservoir of recent values for one timer or histogram
+class Summary:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent = collections.deque(maxlen=RESERVOIR_SIZE)
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        self.recent.append(value)
+
+    def quantiles(self):
+        values = sorted(self.recent)
+        if not values:
+            return {q: 0.0 for q in QUANTILES}
+        return {q: values[min(len(values) - 1, int(len(values) * q))] for q in QUANTILES}
+
+
+class _Timer:
+    def __init__(self, key):
+        self.key = key
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _observe(self.key, time.perf_counter() - self.start)
+        if exc_type is not None:
+            _increment((self.key[0] + "_errors_total", self.key[1]), 1)
+        return False
+
+
+_lock = threading.Lock()
+_summaries = {}
+_counters = collections.Counter()
+_gauges = {}
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def _observe(key, value):
+    with _lock:
+        summary = _summaries.get(key)
+        if summary is None:
+            summary = _summaries[key] = Summary()
+        summary.add(value)
+
+
+def _increment(key, amount):
+    with _lock:
+        _counters[key] += amount
+
+
+# 📏 Instrumentation API; every call is a cheap no-op unless metrics are enabled
+def timer(name, **labels):
+    if not enabled:
+        return NOOP_TIMER
+    return _Timer(_key(name, labels))
+
+
+def observe(name, value, **labels):
+    if enabled:
+        _observe(_key(name, labels), value)
+
+
+def increment(name, amount=1, **labels):
+    if enabled:
+        _increment(_key(name, labels), amount)
+
+
+# Gauges are read when metrics are exported, e.g. gauge("db_write_queue_depth", db.queue_depth)
+def gauge(name, read, **labels):
+    with _lock:
+        _gauges[_key(name, labels)] = read
+
+
+def enable(on=True):
+    global enabled
+    enabled = on
+
+
+def reset():
+    with _lock:
+        _summaries.clear()
+        _counters.clear()
+
+
+def _read_gauges():
+    with _lock:
+        gauges = list(_gauges.items())
+    values = {}
+    for key, read in gauges:
+        try:
+            values[key] = float(read())
+        except Exception:
+            continue
+    return values
+
+
+# 📊 All metrics as a dict, e.g. for the periodic JSON log
+def snapshot():
+    with _lock:
+        summaries = {key: (s.count, s.total, s.max, s.quantiles()) for key, s in _summaries.items()}
+        counters = dict(_counters)
+
+    def label(key):
+        name, labels = key
+        return name + ("{" + ",".join(f"{k}={v}" for k, v in labels) + "}" if labels else "")
+
+    return {
+        "time": time.time(),
+        "timers": {
+            label(key): {"count": count, "sum": round(total, 6), "max": round(peak, 6),
+                         **{f"p{int(q * 100)}": round(value, 6) for q, value in quantiles.items()}}
+            for key, (count, total, peak, quantiles) in sorted(summaries.items())
+        },
+        "counters": {label(key): value for key, value in sorted(counters.items())},
+        "gauges": {label(key): value for key, value in sorted(_read_gauges().items())},
+    }
+
+
+def _labels_text(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{str(v)}"' for k, v in pairs) + "}"
+
+
+# 📜 Prometheus text exposition format (timers are summaries with p50/p95/p99)
+def prometheus_text():
+    with _lock:
+        summaries = {key: (s.count, s.total, s.quantiles()) for key, s in _summaries.items()}
+        counters = dict(_counters)
+    lines = []
+    typed = set()
+    for (name, labels), (count, total, quantiles) in sorted(summaries.items()):
+        metric = PREFIX + name
+        if metric not in typed:
+            lines.append(f"# TYPE {metric} summary")
+            typed.add(metric)
+        for q, value in quantiles.items():
+            lines.append(f"{metric}{_labels_text(labels, [('quantile', q)])} {value:.6f}")
+        lines.append(f"{metric}_sum{_labels_text(labels)} {total:.6f}")
+        lines.append(f"{metric}_count{_labels_text(labels)} {count}")
+    for (name, labels), value in sorted(counters.items()):
+        metric = PREFIX + name
+        if metric not in typed:
+            lines.append(f"# TYPE {metric} counter")
+            typed.add(metric)
+        lines.append(f"{metric}{_labels_text(labels)} {value}")
+    for (name, labels), value in sorted(_read_gauges().items()):
+        metric = PREFIX + name
+        if metric not in typed:
+            lines.append(f"# TYPE {metric} gauge")
+            typed.add(metric)
+        lines.append(f"{metric}{_labels_text(labels)} {value}")
+    return "\n".join(lines) + "\n"
+
+
+# 🌐 Serve /metrics (Prometheus text) and /metrics.json on a local port
+def serve(port, host="127.0.0.1"):
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.startswith("/metrics.json"):
+                body, content_type = json.dumps(snapshot()).encode("utf-8"), "application/json"
+            elif self.path.startswith("/metrics"):
+                body, content_type = prometheus_text().encode("utf-8"), "text/plain; version=0.0.4"
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    enable()
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    print(f"📈 Metrics on http://{host}:{server.server_address[1]}/metrics")
+    return server
+
+
+# 📝 Append a JSON snapshot to `path` every `interval` seconds
+def log_periodically(path, interval=60.0):
+    enable()
+    stop = threading.Event()
+
+    def run():
+        while not stop.wait(interval):
+            try:
+                with open(path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(snapshot()) + "\n")
+            except OSError as e:
+                print("⚠️ Metrics Log Error:", e)
+
+    threading.Thread(target=run, name="metrics-log", daemon=True).start()
+    return stop
+
+
+# 🔬 Opt-in profiling: a stack sampler over every thread, plus tracemalloc
+# The sampler looks at sys._current_frames() every `interval` seconds, so agents,
+# pool workers and the Tk thread all show up, and costs nothing once stopped.
+# cProfile is available for the thread that calls start() (usually the Tk thread).
+class Profiler:
+    def __init__(self, interval=0.005, memory=True, cprofile=False):
+        self.interval = interval
+        self.memory = memory
+        self.cprofile = cprofile
+        self.samples = collections.Counter()
+        self.total_samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self._profile = None
+
+    def start(self):
+        if self.memory:
+            import tracemalloc
+            tracemalloc.start(10)
+        if self.cprofile:
+            import cProfile
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        self._thread = threading.Thread(target=self._sample, name="profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def _sample(self):
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == me:
+                    continue
+                self.total_samples += 1
+                self.samples[(frame.f_code.co_filename, frame.f_code.co_name, frame.f_lineno)] += 1
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self._profile is not None:
+            self._profile.disable()
+
+    def report(self, top=20):
+        lines = [f"🔬 {self.total_samples} stack samples (every {self.interval * 1000:.0f} ms, all threads)"]
+        for (filename, function, line), count in self.samples.most_common(top):
+            lines.append(f"   {count / max(self.total_samples, 1):6.1%}  {function} ({os.path.basename(filename)}:{line})")
+        if self.memory:
+            import tracemalloc
+            if tracemalloc.is_tracing():
+                current, peak = tracemalloc.get_traced_memory()
+                lines.append(f"🧠 Python allocations: {current / 1e6:.1f} MB now, {peak / 1e6:.1f} MB peak")
+                for stat in tracemalloc.take_snapshot().statistics("lineno")[:top // 2]:
+                    lines.append(f"   {stat.size / 1e6:8.2f} MB  {stat.traceback[0]}")
+                tracemalloc.stop()
+        if self._profile is not None:
+            import io
+            import pstats
+            out = io.StringIO()
+            pstats.Stats(self._profile, stream=out).sort_stats("cumulative").print_stats(top)
+            lines.append(out.getvalue())
+        return "\n".join(lines)
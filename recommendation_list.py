@@ -0,0 +1,268 @@
+import collections
+import queue
+import threading
+import tkinter as tk
+from tkinter import ttk
+
+import storage
+
+CARD_HEIGHT = 150  # Every card has the same height, so row i always sits at i * CARD_HEIGHT
+PAGE_SIZE = 100
+MAX_PAGES = 64  # Pages kept in memory (LRU)
+SUGGESTION_CHARS = 240  # Longer suggestions are shortened to fit the fixed card height
+IMAGE_SIZE = (96, 96)
+
+
+# 📄 Recommendation history read lazily from SQLite in pages, newest first
+# Offsets are taken against a snapshot (id <= top_id) so rows saved while scrolling
+# don't shift the pages; refresh() moves the snapshot to the newest row. Pages next to
+# a cached page are read by id (keyset), others with OFFSET. Counting and loading happen
+# on a background thread; on_loaded() is called after each page or new count arrives.
+class RecommendationPages:
+    def __init__(self, connect, page_size=PAGE_SIZE, max_pages=MAX_PAGES, on_loaded=None):
+        self.connect = connect  # Returns a connection usable on the calling thread
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.on_loaded = on_loaded
+        self.count = 0
+        self.generation = 0  # Bumped whenever a refresh finds new rows
+        self._top_id = 0
+        self._refresh_queued = False
+        self._pages = collections.OrderedDict()
+        self._requested = set()
+        self._lock = threading.Lock()
+        self._requests = queue.Queue()
+        self._thread = None
+
+    # 🔄 Re-read the row count and drop cached pages (call after new rows were saved)
+    # The count is read on the loader thread; on_loaded() fires once it is in.
+    def refresh(self):
+        with self._lock:
+            if self._refresh_queued:
+                return
+            self._refresh_queued = True
+        self._requests.put((None, "refresh"))
+        self._start()
+
+    def _recount(self, conn):
+        with self._lock:
+            self._refresh_queued = False
+        count, top_id = conn.execute(
+            "SELECT COUNT(*), COALESCE(MAX(id), 0) FROM farmer_recommendations"
+        ).fetchone()
+        with self._lock:
+            changed = (count, top_id) != (self.count, self._top_id)
+            if changed:
+                self.count, self._top_id = count, top_id
+                self.generation += 1
+                self._pages.clear()
+                self._requested.clear()
+        return changed
+
+    # The row at `index` (0 = newest), or None while its page is loading
+    def get(self, index):
+        page, offset = divmod(index, self.page_size)
+        with self._lock:
+            rows = self._pages.get(page)
+            if rows is not None:
+                self._pages.move_to_end(page)
+                return rows[offset] if offset < len(rows) else None
+            if page not in self._requested:
+                self._requested.add(page)
+                self._requests.put((self.generation, page))
+        self._start()
+        return None
+
+    def _start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._load_pages, name="recommendation-pages", daemon=True)
+            self._thread.start()
+
+    def _read(self, conn, page, top_id, newer, older):
+        columns = f"id, farmer_name, {storage.SUGGESTION_TEXT}, sustainability_score, timestamp"
+        if newer is not None:  # Continue below the previous page
+            return conn.execute(
+                f"SELECT {columns} FROM farmer_recommendations WHERE id < ? ORDER BY id DESC LIMIT ?",
+                (newer[-1][0], self.page_size)
+            ).fetchall()
+        if older is not None:  # Continue above the next page
+            rows = conn.execute(
+                f"SELECT {columns} FROM farmer_recommendations WHERE id > ? AND id <= ? ORDER BY id LIMIT ?",
+                (older[0][0], top_id, self.page_size)
+            ).fetchall()
+            return rows[::-1]
+        return conn.execute(
+            f"SELECT {columns} FROM farmer_recommendations WHERE id <= ? ORDER BY id DESC LIMIT ? OFFSET ?",
+            (top_id, self.page_size, page * self.page_size)
+        ).fetchall()
+
+    def _load_pages(self):
+        while True:
+            generation, page = self._requests.get()
+            if page == "refresh":
+                try:
+                    changed = self._recount(self.connect())
+                except Exception as e:
+                    print("⚠️ Recommendation History Error:", e)
+                    continue
+                if changed and self.on_loaded:
+                    self.on_loaded()
+                continue
+            with self._lock:
+                if generation != self.generation:
+                    continue
+                top_id = self._top_id
+                newer = self._pages.get(page - 1)
+                older = self._pages.get(page + 1)
+            try:
+                rows = self._read(self.connect(), page, top_id, newer, older)
+            except Exception as e:
+                print("⚠️ Recommendation History Error:", e)
+                with self._lock:
+                    self._requested.discard(page)
+                continue
+            with self._lock:
+                if generation != self.generation:
+                    continue
+                self._pages[page] = rows
+                while len(self._pages) > self.max_pages:
+                    self._pages.popitem(last=False)
+                self._requested.discard(page)
+            if self.on_loaded:
+                self.on_loaded()
+
+
+# 🗂️ Virtualized recommendations panel
+# Only the cards needed to fill the visible window exist; scrolling moves them and
+# rebinds the ones whose row changed, so the cost of a scroll or an update doesn't
+# depend on how much history there is. An optional "pending" card (the answer being
+# streamed) is shown above the newest row.
+class RecommendationList(tk.Frame):
+    def __init__(self, master, pages, photo_for=None, card_height=CARD_HEIGHT, **kwargs):
+        kwargs.setdefault("bg", "white")
+        super().__init__(master, **kwargs)
+        self.pages = pages
+        self.photo_for = photo_for
+        self.card_height = card_height
+        self._offset = 0
+        self._generation = pages.generation
+        self._wraplength = None
+        self._pending = None
+        self._cards = []
+
+        self._viewport = tk.Frame(self, bg=self["bg"])
+        self._scrollbar = ttk.Scrollbar(self, orient="vertical", command=self._on_scrollbar)
+        self._viewport.pack(side="left", fill="both", expand=True)
+        self._scrollbar.pack(side="right", fill="y")
+        self._viewport.bind("<Configure>", lambda e: self.redraw())
+        for widget in (self._viewport, self):
+            widget.bind("<MouseWheel>", self._on_wheel)
+            widget.bind("<Button-4>", lambda e: self.scroll(-1, "units"))
+            widget.bind("<Button-5>", lambda e: self.scroll(1, "units"))
+
+    def _make_card(self):
+        card = tk.Frame(self._viewport, bg="white", relief="ridge", bd=1)
+        card.image_label = tk.Label(card, bg="white")
+        card.image_label.pack(side="left", padx=10, pady=5)
+        card.text_label = tk.Label(card, font=("Graphik", 10), bg="white", justify="left", anchor="nw",
+                                   wraplength=self._wraplength or 300)
+        card.text_label.pack(side="left", fill="both", expand=True, padx=(0, 10), pady=5)
+        for widget in (card, card.image_label, card.text_label):
+            widget.bind("<MouseWheel>", self._on_wheel)
+            widget.bind("<Button-4>", lambda e: self.scroll(-1, "units"))
+            widget.bind("<Button-5>", lambda e: self.scroll(1, "units"))
+        card.bound = None
+        card.y = None
+        return card
+
+    @property
+    def total(self):
+        return self.pages.count + (1 if self._pending is not None else 0)
+
+    def _max_offset(self):
+        return max(0, self.total * self.card_height - self._viewport.winfo_height())
+
+    # 🔁 New rows were saved: re-read the count (off the Tk thread), then show the newest rows
+    def refresh(self):
+        self.pages.refresh()
+
+    # 🌊 Show (or with None, remove) the card for an answer still being generated
+    def set_pending(self, text):
+        self._pending = text
+        self.redraw()
+
+    def scroll(self, amount, what="units"):
+        step = self.card_height // 3 if what == "units" else self._viewport.winfo_height()
+        self._offset = min(max(0, self._offset + int(amount) * step), self._max_offset())
+        self.redraw()
+
+    def _on_wheel(self, event):
+        self.scroll(-1 if event.delta > 0 else 1, "units")
+
+    def _on_scrollbar(self, action, amount, what=None):
+        if action == "moveto":
+            self._offset = min(max(0, int(float(amount) * self.total * self.card_height)), self._max_offset())
+            self.redraw()
+        else:
+            self.scroll(amount, what)
+
+    def _card_content(self, index):
+        if self._pending is not None:
+            if index == 0:
+                return ("pending", self._pending), self._pending, None
+            index -= 1
+        row = self.pages.get(index)
+        if row is None:
+            return ("loading", index), "Loading...", None
+        record_id, farmer, suggestion, score, timestamp = row
+        suggestion = suggestion or ""
+        if len(suggestion) > SUGGESTION_CHARS:
+            suggestion = suggestion[:SUGGESTION_CHARS].rstrip() + "…"
+        text = f"Farmer: {farmer}\nSuggestion: {suggestion}\nSustainability Score: {score}\n{timestamp}"
+        return ("row", record_id), text, row
+
+    # 🖌️ Place and bind just enough cards to cover the visible window
+    def redraw(self):
+        height = self._viewport.winfo_height()
+        width = self._viewport.winfo_width()
+        if height <= 1:
+            return
+        needed = height // self.card_height + 2
+        while len(self._cards) < needed:
+            self._cards.append(self._make_card())
+        wraplength = max(100, width - IMAGE_SIZE[0] - 50)
+        if wraplength != self._wraplength:  # Resized: rewrap the cards that are already bound
+            self._wraplength = wraplength
+            for card in self._cards:
+                card.text_label.config(wraplength=wraplength)
+        if self.pages.generation != self._generation:  # New rows arrived: jump to the newest
+            self._generation = self.pages.generation
+            self._offset = 0
+
+        self._offset = min(self._offset, self._max_offset())
+        first = self._offset // self.card_height
+        # Row i always uses card i % pool size, so scrolling rebinds only the cards that enter
+        visible = {}
+        for index in range(first, min(first + needed, self.total)):
+            visible[index % len(self._cards)] = index
+        for slot, card in enumerate(self._cards):
+            index = visible.get(slot)
+            if index is None:
+                if card.y is not None:
+                    card.place_forget()
+                    card.y = None
+                continue
+            key, text, row = self._card_content(index)
+            if card.bound != key or key[0] == "pending":
+                card.text_label.config(text=text)
+                photo = self.photo_for(row) if (row is not None and self.photo_for) else ""
+                card.image_label.config(image=photo)
+                card.image_label.image = photo  # Keep reference
+                card.bound = key
+            y = index * self.card_height - self._offset
+            if card.y != y:
+                card.place(x=5, y=y, relwidth=1, width=-10, height=self.card_height - 8)
+                card.y = y
+
+        total_height = max(1, self.total * self.card_height)
+        self._scrollbar.set(self._offset / total_height, min(1.0, (self._offset + height) / total_height))
@@ -0,0 +1,328 @@
+import argparse
+import json
+import math
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import advisor_engine
+import exporter
+import metrics
+import storage
+from advisor_engine import AdvisorJob
+from app_context import app, canonical_crop, MARKET_INTERVAL
+from event_bus import EventBus
+from weather_service import WeatherError
+
+MAX_BODY_BYTES = 64 * 1024
+EXPORT_CONTENT_TYPES = {
+    ".csv": "text/csv; charset=utf-8",
+    ".jsonl.gz": "application/gzip",
+    ".xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    ".parquet": "application/vnd.apache.parquet",
+}
+
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _number(body, name):
+    value = body.get(name)
+    if value in (None, ""):
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise HttpError(400, f"{name} must be a number")
+    if not math.isfinite(number):
+        raise HttpError(400, f"{name} must be a finite number")
+    return number
+
+
+def _weather_for(city):
+    if not city or not app.weather.configured:
+        return None
+    try:
+        return app.weather.get(city)
+    except Exception as e:
+        print("⚠️ Weather API Error:", e)
+        return None
+
+
+# 🌐 JSON endpoints over the same AppContext the desktop app uses
+#   GET  /health
+#   GET  /weather?city=Pune
+#   GET  /market/top?k=5&season=High&by=latest_price
+#   POST /recommend      {"farmer_name": ..., "city": ..., "soil_ph": ..., "stream": true}
+#   GET  /export?format=csv&farmer=&since=&until=&crop=
+#   GET  /metrics        Prometheus text (/metrics.json for the JSON snapshot)
+# Streaming recommendations are sent as chunked NDJSON: the ranked crops first, then
+# one {"token": ...} line per generated piece, then {"done": true, ...}.
+class AgriRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive and chunked responses
+    disable_nagle_algorithm = True  # Headers and body are separate writes; don't wait 40 ms between them
+    server_version = "AgriVision"
+    quiet = True
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_response(self, code, message=None):
+        self.response_started = True
+        super().send_response(code, message)
+
+    def _start_chunked(self, content_type):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+
+    def _write_chunk(self, data):
+        self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def _write_line(self, payload):
+        self._write_chunk(json.dumps(payload, ensure_ascii=False).encode("utf-8") + b"\n")
+
+    def _end_chunked(self):
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    def _read_json(self):
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            raise HttpError(400, "Content-Length must be a non-negative integer")
+        if length > MAX_BODY_BYTES:
+            raise HttpError(413, "Request body too large")
+        data = self.rfile.read(length)
+        self.body_read = True
+        try:
+            body = json.loads(data or b"{}")
+        except ValueError:
+            raise HttpError(400, "Request body must be JSON")
+        if not isinstance(body, dict):
+            raise HttpError(400, "Request body must be a JSON object")
+        return body
+
+    def _dispatch(self, routes):
+        url = urlsplit(self.path)
+        route = routes.get(url.path.rstrip("/") or "/")
+        self.response_started = False
+        self.body_read = False
+        try:
+            if route is None:
+                raise HttpError(404, f"No endpoint {url.path}")
+            with metrics.timer("http_request_seconds", path=url.path):
+                route(self, {key: values[-1] for key, values in parse_qs(url.query).items()})
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+        except Exception as e:
+            if not isinstance(e, HttpError):
+                print(f"⚠️ Server Error ({url.path}):", e)
+            if self.response_started:
+                # Headers (and maybe part of a chunked body) are already out; a new
+                # status line would corrupt the stream, so cut the connection instead
+                self.close_connection = True
+            else:
+                self._send_json(getattr(e, "status", 500), {"error": str(e)})
+        finally:
+            # An unread body would be parsed as the next request on this connection
+            if not self.body_read and (self.headers.get("Content-Length", "0") not in ("", "0")
+                                       or "Transfer-Encoding" in self.headers):
+                self.close_connection = True
+            # Handler threads come and go with connections; don't keep their readers open
+            app.db.release_reader()
+
+    def do_GET(self):
+        self._dispatch(GET_ROUTES)
+
+    def do_POST(self):
+        self._dispatch(POST_ROUTES)
+
+    def health(self, query):
+        self._send_json(200, {"status": "ok", "llm": app.llm.stats()})
+
+    def weather(self, query):
+        city = query.get("city")
+        if not city:
+            raise HttpError(400, "city is required")
+        if not app.weather.configured:
+            raise HttpError(503, "Weather API is not configured")
+        try:
+            weather = app.weather.get(city)
+        except WeatherError as e:
+            raise HttpError(502, str(e))
+        self._send_json(200, {"city": city, **weather})
+
+    def market_top(self, query):
+        try:
+            k = int(query.get("k", 5))
+            if k < 1:
+                raise ValueError("k must be at least 1")
+            by = query.get("by", "latest_price")
+            items = app.market.top_k(k, season=query.get("season"), region=query.get("region"), by=by)
+        except ValueError as e:
+            raise HttpError(400, str(e))
+        self._send_json(200, {"by": by, "items": [{"crop": crop, "value": value} for crop, value in items]})
+
+    def recommend(self, query):
+        body = self._read_json()
+        farmer_name = str(body.get("farmer_name") or "").strip()
+        if not farmer_name:
+            raise HttpError(400, "farmer_name is required")
+        job = AdvisorJob(farmer_name, body.get("city") or None, _number(body, "soil_ph"), _number(body, "soil_moisture"),
+                         _number(body, "temperature"), _number(body, "rainfall"))
+        weather = _weather_for(job.city)
+        if not (body.get("stream") or query.get("stream") in ("1", "true")):
+            result = advisor_engine.recommend(app, job, weather)
+            if result.error is not None:
+                raise HttpError(500, str(result.error))
+            self._send_json(200, {
+                "farmer_name": farmer_name, "suggestion": result.suggestion, "cached": result.cached,
+                "sustainability_score": result.sustainability_score, "record_id": result.record_id,
+                "seconds": round(result.seconds, 3),
+            })
+            return
+
+        # 🌊 Stream tokens as TinyLlama generates them; a client disconnect stops generation
+        start = time.perf_counter()
+        plan = advisor_engine.prepare(app, job, weather)
+        self._start_chunked("application/x-ndjson")
+        self._write_line({"farmer_name": farmer_name, "ranked": plan.ranked})
+        pieces = []
+        tokens = app.llm.stream(plan.prompt)
+        try:
+            for piece in tokens:
+                pieces.append(piece)
+                self._write_line({"token": piece})
+            suggestion = "".join(pieces)
+        except (BrokenPipeError, ConnectionResetError):
+            raise
+        except Exception as ollama_error:
+            print(f"⚠️ Ollama AI Error: {ollama_error}")
+            suggestion = plan.fallback
+            self._write_line({"token": suggestion})
+        finally:
+            tokens.close()
+        try:
+            record_id = app.db.write(storage.insert_recommendation, advisor_engine.plan_values(plan, suggestion),
+                                     app.crop_vocabulary)
+        except sqlite3.Error as e:
+            print("⚠️ Database Error:", e)
+            record_id = None
+        self._write_line({"done": True, "record_id": record_id, "sustainability_score": plan.sustainability_score,
+                          "seconds": round(time.perf_counter() - start, 3)})
+        self._end_chunked()
+
+    def metrics_text(self, query):
+        body = metrics.prometheus_text().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def metrics_json(self, query):
+        self._send_json(200, metrics.snapshot())
+
+    def export(self, query):
+        suffix = "." + query.get("format", "csv").lstrip(".").lower()
+        if suffix not in EXPORT_CONTENT_TYPES:
+            raise HttpError(400, f"format must be one of {', '.join(s.lstrip('.') for s in EXPORT_CONTENT_TYPES)}")
+        filters = exporter.ExportFilters(query.get("farmer"), query.get("since"), query.get("until"),
+                                         canonical_crop(query.get("crop")))
+        # Written to a temporary file first (xlsx and parquet can't be produced as a stream)
+        tmp_dir = tempfile.mkdtemp(prefix="agri_export_")
+        path = os.path.join(tmp_dir, "recommendations" + suffix)
+        try:
+            try:
+                exporter.export(app.db.reader(), path, filters)
+            except RuntimeError as e:
+                raise HttpError(501, str(e))
+            self.send_response(200)
+            self.send_header("Content-Type", EXPORT_CONTENT_TYPES[suffix])
+            self.send_header("Content-Length", str(os.path.getsize(path)))
+            self.send_header("Content-Disposition", f'attachment; filename="recommendations{suffix}"')
+            self.end_headers()
+            with open(path, "rb") as f:
+                shutil.copyfileobj(f, self.wfile, 64 * 1024)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+GET_ROUTES = {
+    "/health": AgriRequestHandler.health,
+    "/weather": AgriRequestHandler.weather,
+    "/market/top": AgriRequestHandler.market_top,
+    "/export": AgriRequestHandler.export,
+    "/metrics": AgriRequestHandler.metrics_text,
+    "/metrics.json": AgriRequestHandler.metrics_json,
+}
+POST_ROUTES = {
+    "/recommend": AgriRequestHandler.recommend,
+}
+
+
+class AgriServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+# 🚀 Load the shared resources, keep market prices fresh, and serve until interrupted
+def serve(host="127.0.0.1", port=8000, llm_concurrency=None, verbose=False):
+    if llm_concurrency:
+        app.llm_concurrency = llm_concurrency
+    start = time.perf_counter()
+    for load in (lambda: app.market, lambda: app.crop_index, lambda: app.crop_scorer, lambda: app.db, lambda: app.llm):
+        load()
+    print(f"📦 Resources ready in {time.perf_counter() - start:.2f}s")
+
+    bus = EventBus(workers=1)
+    bus.subscribe(lambda events: app.refresh_market(), "market.tick")
+    bus.every(MARKET_INTERVAL, "market.tick", delay=MARKET_INTERVAL)
+    bus.start()
+
+    AgriRequestHandler.quiet = not verbose
+    server = AgriServer((host, port), AgriRequestHandler)
+    print(f"🌐 Serving on http://{host}:{server.server_address[1]} (ollama concurrency {app.llm_concurrency})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        bus.close()
+        app.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless Agriculture AI Advisor HTTP service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--llm-concurrency", type=int, help="generations sent to ollama at once")
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+    parser.add_argument("--metrics", action="store_true", help="record timings for GET /metrics")
+    args = parser.parse_args()
+    if args.metrics:
+        metrics.enable()
+    serve(args.host, args.port, args.llm_concurrency, args.verbose)
@@ -0,0 +1,486 @@
+import functools
+import hashlib
+import os
+import queue
+import re
+import sqlite3
+import threading
+import weakref
+import zlib
+from concurrent.futures import Future
+
+import metrics
+import weather_history
+
+# 📂 Recommendation tables
+# Each LLM suggestion is parsed once at insert time into recommendation_crops, so
+# market price backfills join on an indexed crop column instead of running
+# LIKE '%product%' scans over the free-text suggestion. The text itself is stored
+# once per distinct suggestion in `suggestions` (content-addressed, compressed).
+SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS suggestions (
+        id INTEGER PRIMARY KEY,
+        hash BLOB NOT NULL UNIQUE,  -- First 16 bytes of the SHA-256 of the text
+        body BLOB NOT NULL  -- zlib-compressed UTF-8, or plain TEXT when that is smaller
+    );
+    CREATE TABLE IF NOT EXISTS farmer_recommendations (
+        id INTEGER PRIMARY KEY,
+        farmer_name TEXT,
+        suggestion_id INTEGER REFERENCES suggestions(id),
+        soil_ph REAL,
+        soil_moisture REAL,
+        temperature REAL,
+        rainfall REAL,
+        sustainability_score REAL,
+        weather_condition TEXT,
+        market_price REAL,
+        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE IF NOT EXISTS recommendation_crops (
+        recommendation_id INTEGER NOT NULL REFERENCES farmer_recommendations(id) ON DELETE CASCADE,
+        crop TEXT NOT NULL,
+        PRIMARY KEY (recommendation_id, crop)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_recommendation_crops_crop
+        ON recommendation_crops (crop, recommendation_id);
+    CREATE INDEX IF NOT EXISTS idx_recommendations_farmer
+        ON farmer_recommendations (farmer_name COLLATE NOCASE, timestamp);
+    CREATE INDEX IF NOT EXISTS idx_recommendations_timestamp
+        ON farmer_recommendations (timestamp);
+    CREATE TABLE IF NOT EXISTS schema_meta (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    );
+    CREATE TABLE IF NOT EXISTS batch_runs (
+        run_id TEXT PRIMARY KEY,
+        source TEXT,
+        done INTEGER NOT NULL DEFAULT 0,
+        started DATETIME DEFAULT CURRENT_TIMESTAMP,
+        updated DATETIME,
+        finished DATETIME
+    );
+    CREATE TABLE IF NOT EXISTS batch_plots (  -- Checkpoint: plots of a batch run that are already stored
+        run_id TEXT NOT NULL,
+        plot INTEGER NOT NULL,
+        recommendation_id INTEGER,
+        PRIMARY KEY (run_id, plot)
+    ) WITHOUT ROWID;
+'''
+
+RECOMMENDATION_COLUMNS = (
+    "farmer_name", "suggestion_id", "soil_ph", "soil_moisture", "temperature",
+    "rainfall", "sustainability_score", "weather_condition", "market_price",
+)
+
+INSERT_RECOMMENDATION = (
+    f"INSERT INTO farmer_recommendations ({', '.join(RECOMMENDATION_COLUMNS)}) "
+    f"VALUES ({', '.join('?' for _ in RECOMMENDATION_COLUMNS)})"
+)
+
+
+# Suggestion text of a farmer_recommendations row, for use in SELECT lists
+SUGGESTION_TEXT = (
+    "(SELECT suggestion_text(body) FROM suggestions WHERE suggestions.id = farmer_recommendations.suggestion_id)"
+)
+MIGRATION_BATCH = 5000
+SUGGESTION_CACHE_SIZE = 20000  # Distinct texts kept while streaming an export
+
+
+# 🗜️ Suggestions are stored compressed unless compressing doesn't make them smaller
+def _pack_suggestion(text):
+    packed = zlib.compress(text.encode("utf-8"), 9)
+    return packed if len(packed) < len(text.encode("utf-8")) else text
+
+
+# Registered as the SQL function suggestion_text(body); most rows share a few texts
+@functools.lru_cache(maxsize=4096)
+def _unpack_suggestion(body):
+    if body is None or isinstance(body, str):
+        return body
+    return zlib.decompress(body).decode("utf-8")
+
+
+# 📚 Texts for suggestion ids, read once per distinct suggestion into `texts` (id -> text)
+def load_suggestions(conn, ids, texts, max_cached=SUGGESTION_CACHE_SIZE):
+    ids = {i for i in ids if i is not None}
+    missing = [i for i in ids if i not in texts]
+    if len(texts) + len(missing) > max_cached:
+        texts.clear()
+        missing = list(ids)
+    for start in range(0, len(missing), 500):
+        batch = missing[start:start + 500]
+        texts.update(
+            (i, _unpack_suggestion(body)) for i, body in conn.execute(
+                f"SELECT id, body FROM suggestions WHERE id IN ({', '.join('?' for _ in batch)})", batch
+            )
+        )
+    return texts
+
+
+# 🔑 Id of the stored suggestion with this text, adding it if it is new
+def suggestion_id(conn, text):
+    if text is None:
+        return None
+    digest = hashlib.sha256(text.encode("utf-8")).digest()[:16]
+    row = conn.execute("SELECT id FROM suggestions WHERE hash = ?", (digest,)).fetchone()
+    if row is not None:
+        return row[0]
+    return conn.execute("INSERT INTO suggestions (hash, body) VALUES (?, ?)", (digest, _pack_suggestion(text))).lastrowid
+
+
+# 🔄 Move inline suggested_crop texts into `suggestions` (databases from before it existed)
+# Runs once, in one transaction; the freed space is returned to the OS by compact().
+def _migrate_suggestions(conn):
+    total = conn.execute("SELECT COUNT(*) FROM farmer_recommendations").fetchone()[0]
+    print(f"🗜️ Moving {total:,} suggestion texts into the suggestions table...")
+    conn.execute("ALTER TABLE farmer_recommendations ADD COLUMN suggestion_id INTEGER REFERENCES suggestions(id)")
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            "SELECT id, suggested_crop FROM farmer_recommendations WHERE id > ? ORDER BY id LIMIT ?",
+            (last_id, MIGRATION_BATCH)
+        ).fetchall()
+        if not rows:
+            break
+        conn.executemany("UPDATE farmer_recommendations SET suggestion_id = ? WHERE id = ?",
+                         [(suggestion_id(conn, text), recommendation_id) for recommendation_id, text in rows])
+        last_id = rows[-1][0]
+    try:
+        conn.execute("ALTER TABLE farmer_recommendations DROP COLUMN suggested_crop")
+    except sqlite3.OperationalError:  # SQLite before 3.35 can't drop columns; empty it instead
+        conn.execute("UPDATE farmer_recommendations SET suggested_crop = NULL")
+
+
+# 🏗️ Create the tables, migrate old layouts and remember which rows still need their crops parsed
+def ensure_schema(conn):
+    had_crop_table = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'recommendation_crops'"
+    ).fetchone()
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(farmer_recommendations)")}
+    with conn:
+        conn.executescript(SCHEMA + weather_history.SCHEMA)
+        if not had_crop_table:
+            conn.execute(
+                "INSERT OR REPLACE INTO schema_meta (key, value) "
+                "SELECT 'crops_pending_upto', COALESCE(MAX(id), 0) FROM farmer_recommendations"
+            )
+    if "suggested_crop" in columns and "suggestion_id" not in columns:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            _migrate_suggestions(conn)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+
+# 🔤 Case-insensitive, whole-word matcher for the known crop names
+@functools.lru_cache(maxsize=8)
+def _crop_pattern(vocabulary):
+    names = sorted(vocabulary, key=len, reverse=True)  # Prefer "Sweet Corn" over "Corn"
+    canonical = {name.lower(): name for name in names}
+    pattern = re.compile(r"\b(" + "|".join(re.escape(name) for name in names) + r")\b", re.IGNORECASE)
+    return pattern, canonical
+
+
+def parse_crops(text, vocabulary):
+    if not text or not vocabulary:
+        return []
+    pattern, canonical = _crop_pattern(tuple(vocabulary))
+    crops = []
+    for match in pattern.finditer(text):
+        crop = canonical[match.group(1).lower()]
+        if crop not in crops:
+            crops.append(crop)
+    return crops
+
+
+def _insert_crops(conn, recommendation_id, crops):
+    conn.executemany(
+        "INSERT OR IGNORE INTO recommendation_crops (recommendation_id, crop) VALUES (?, ?)",
+        [(recommendation_id, crop) for crop in crops]
+    )
+
+
+# 💾 Insert a recommendation and its parsed crops
+# Like the other write helpers below this runs inside the caller's transaction
+# (normally a Database writer batch) and never commits by itself.
+def insert_recommendation(conn, values, vocabulary):
+    text = values[1]
+    cursor = conn.execute(INSERT_RECOMMENDATION, (values[0], suggestion_id(conn, text)) + tuple(values[2:]))
+    recommendation_id = cursor.lastrowid
+    _insert_crops(conn, recommendation_id, parse_crops(text, vocabulary))
+    return recommendation_id
+
+
+def insert_recommendations(conn, rows, vocabulary):
+    return [insert_recommendation(conn, values, vocabulary) for values in rows]
+
+
+# 🔁 Parse crops for rows written before recommendation_crops existed (runs once)
+def index_pending_recommendations(conn, vocabulary, batch_size=5000):
+    row = conn.execute("SELECT value FROM schema_meta WHERE key = 'crops_pending_upto'").fetchone()
+    if row is None:
+        return 0
+    pending_upto = int(row[0])
+    last_id, indexed = 0, 0
+    while True:
+        rows = conn.execute(
+            f"SELECT id, {SUGGESTION_TEXT} FROM farmer_recommendations WHERE id > ? AND id <= ? ORDER BY id LIMIT ?",
+            (last_id, pending_upto, batch_size)
+        ).fetchall()
+        if not rows:
+            break
+        for recommendation_id, suggestion in rows:
+            _insert_crops(conn, recommendation_id, parse_crops(suggestion, vocabulary))
+        last_id = rows[-1][0]
+        indexed += len(rows)
+    conn.execute("DELETE FROM schema_meta WHERE key = 'crops_pending_upto'")
+    return indexed
+
+
+# 💰 Set-based market price backfill
+# Matches the old per-product UPDATE loop, where the last (cheapest) matching product of
+# the price-sorted list won, but only touches rows whose price actually changes.
+def backfill_market_prices(conn, prices):
+    lowest = {}
+    for crop, price in prices:
+        crop, price = str(crop), float(price)
+        lowest[crop] = min(price, lowest.get(crop, price))
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS market_prices (crop TEXT PRIMARY KEY, price REAL)")
+    conn.execute("DELETE FROM temp.market_prices")
+    conn.executemany("INSERT INTO temp.market_prices (crop, price) VALUES (?, ?)", lowest.items())
+    cursor = conn.execute('''
+        UPDATE farmer_recommendations
+        SET market_price = matched.price
+        FROM (
+            SELECT c.recommendation_id AS id, MIN(p.price) AS price
+            FROM temp.market_prices AS p
+            CROSS JOIN recommendation_crops AS c ON c.crop = p.crop  -- Drive from the few prices via the crop index
+            GROUP BY c.recommendation_id
+        ) AS matched
+        WHERE farmer_recommendations.id = matched.id
+          AND farmer_recommendations.market_price IS NOT matched.price
+    ''')
+    return cursor.rowcount
+
+
+# ⚙️ Connection tuning: WAL lets readers run while the writer commits, and
+# synchronous=NORMAL is durable across application crashes in WAL mode.
+PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA cache_size = -65536",  # 64 MiB page cache per connection
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA mmap_size = 268435456",
+    "PRAGMA foreign_keys = ON",
+)
+
+WRITE_BATCH_SIZE = 1000
+
+
+# ⏱️ Connection that times every statement; only used when metrics are enabled
+class TimedConnection(sqlite3.Connection):
+    role = "write"
+
+    def execute(self, sql, parameters=()):
+        with metrics.timer("db_query_seconds", role=self.role):
+            return super().execute(sql, parameters)
+
+    def executemany(self, sql, parameters):
+        with metrics.timer("db_query_seconds", role=self.role, kind="many"):
+            return super().executemany(sql, parameters)
+
+    def executescript(self, script):
+        with metrics.timer("db_query_seconds", role=self.role, kind="script"):
+            return super().executescript(script)
+
+
+class _ReaderHandle:
+    def __init__(self, conn):
+        self.conn = conn
+        self.release = None
+
+
+# 🗄️ SQLite storage with per-thread read connections and a single writer thread
+# Writes are queued as callables fn(conn, *args) and executed by the writer, which
+# drains whatever is queued and commits it as one transaction (group commit). Each
+# job runs in its own savepoint so one failing job does not roll back the others.
+# Prepared statements are reused through sqlite3's per-connection statement cache.
+class Database:
+    def __init__(self, path, batch_size=WRITE_BATCH_SIZE, busy_timeout=30.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        self._readers = set()
+        self._readers_lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._closed = False
+        self._closing_lock = threading.Lock()  # Orders submit() against close()'s stop marker
+
+        self._writer_conn = self._connect()
+        ensure_schema(self._writer_conn)
+        metrics.gauge("db_write_queue_depth", self.queue_depth)
+        metrics.gauge("db_read_connections", self.reader_count)
+        self._writer = threading.Thread(target=self._writer_loop, name="db-writer", daemon=True)
+        self._writer.start()
+
+    def _connect(self, read_only=False):
+        conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None,
+                               check_same_thread=False, cached_statements=256,
+                               factory=TimedConnection if metrics.enabled else sqlite3.Connection)
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        conn.create_function("suggestion_text", 1, _unpack_suggestion, deterministic=True)
+        if read_only:
+            conn.execute("PRAGMA query_only = ON")
+            if metrics.enabled:
+                conn.role = "read"
+        return conn
+
+    # 📖 Connection owned by the calling thread, for reads only
+    # It is closed when the thread exits (its thread-local handle is collected) or on
+    # release_reader(), so short-lived threads such as HTTP handlers don't leak connections.
+    def reader(self):
+        handle = getattr(self._local, "reader", None)
+        if handle is None:
+            conn = self._connect(read_only=True)
+            with self._readers_lock:
+                self._readers.add(conn)
+            handle = self._local.reader = _ReaderHandle(conn)
+            handle.release = weakref.finalize(handle, self._drop_reader, conn)
+        return handle.conn
+
+    # 🚪 Close the calling thread's reader now; the next reader() opens a fresh one
+    def release_reader(self):
+        handle = getattr(self._local, "reader", None)
+        if handle is not None:
+            del self._local.reader
+            handle.release()
+
+    def _drop_reader(self, conn):
+        with self._readers_lock:
+            self._readers.discard(conn)
+        conn.close()
+
+    def reader_count(self):
+        with self._readers_lock:
+            return len(self._readers)
+
+    def query(self, sql, params=()):
+        return self.reader().execute(sql, params).fetchall()
+
+    # ✍️ Queue a write job; the returned Future resolves once its batch has committed
+    def submit(self, fn, *args):
+        future = Future()
+        with self._closing_lock:
+            if self._closed:
+                raise sqlite3.ProgrammingError("Database is closed")
+            self._queue.put((fn, args, future))
+        return future
+
+    def write(self, fn, *args, timeout=None):
+        return self.submit(fn, *args).result(timeout)
+
+    def execute(self, sql, params=()):
+        return self.write(lambda conn: conn.execute(sql, params).lastrowid)
+
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def _writer_loop(self):
+        running = True
+        while running:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if None in batch:
+                running = False
+                batch = [job for job in batch if job is not None]
+            if batch:
+                metrics.observe("db_write_batch_size", len(batch))
+                with metrics.timer("db_write_batch_seconds"):
+                    self._commit_batch(batch)
+        self._writer_conn.close()
+        # Nothing should be left behind the stop marker, but never leave a caller waiting
+        while True:
+            try:
+                job = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if job is not None and job[2].set_running_or_notify_cancel():
+                job[2].set_exception(sqlite3.ProgrammingError("Database is closed"))
+
+    def _commit_batch(self, batch):
+        conn = self._writer_conn
+        done = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+        except sqlite3.Error as e:
+            for _, _, future in batch:
+                future.set_exception(e)
+            return
+        for fn, args, future in batch:
+            if not future.set_running_or_notify_cancel():
+                continue
+            conn.execute("SAVEPOINT job")
+            try:
+                with metrics.timer("db_write_job_seconds", job=getattr(fn, "__name__", "job")):
+                    result = fn(conn, *args)
+                conn.execute("RELEASE job")
+                done.append((future, result))
+            except Exception as e:
+                conn.execute("ROLLBACK TO job")
+                conn.execute("RELEASE job")
+                future.set_exception(e)
+        try:
+            conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            for future, _ in done:
+                future.set_exception(e)
+            return
+        for future, result in done:
+            future.set_result(result)
+
+    # 🔒 Flush queued writes, stop the writer and close every connection
+    def close(self):
+        with self._closing_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+        self._writer.join()
+        with self._readers_lock:
+            readers, self._readers = self._readers, set()
+        for conn in readers:
+            conn.close()
+
+
+def database_size(path):
+    return sum(os.path.getsize(path + suffix) for suffix in ("", "-wal") if os.path.exists(path + suffix))
+
+
+# 🧹 Compact the database file: drop unused suggestions, VACUUM and refresh statistics
+# Needs exclusive access, so run it while the app is closed. Opening a Database first
+# applies any pending migration. Returns the file size (bytes) before and after.
+def compact(path):
+    Database(path).close()
+    before = database_size(path)
+    conn = sqlite3.connect(path, isolation_level=None)
+    try:
+        conn.execute(
+            "DELETE FROM suggestions WHERE id NOT IN "
+            "(SELECT suggestion_id FROM farmer_recommendations WHERE suggestion_id IS NOT NULL)"
+        )
+        conn.execute("VACUUM")
+        conn.execute("PRAGMA optimize")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    finally:
+        conn.close()
+    return before, database_size(path)
@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+from crop_index import CropIndex
+
+
+# Wheat holds the 1,000 best scores; three more crops only appear further down
+def skewed_frame(rows=5000, seed=0):
+    rng = np.random.default_rng(seed)
+    crops = np.array(["Wheat"] * 1000 + ["Rice", "Corn", "Soybean"] * ((rows - 1000) // 3 + 1))[:rows]
+    scores = np.concatenate([np.linspace(100, 90, 1000), rng.uniform(0, 50, rows - 1000)])
+    return pd.DataFrame({
+        "Farm_ID": np.arange(rows),
+        "Soil_pH": rng.uniform(5.5, 7.5, rows),
+        "Soil_Moisture": rng.uniform(10, 45, rows),
+        "Temperature_C": rng.uniform(15, 35, rows),
+        "Rainfall_mm": rng.uniform(50, 300, rows),
+        "Crop_Type": crops,
+        "Sustainability_Score": scores,
+    })
+
+
+def test_len_counts_rows():
+    assert len(CropIndex(skewed_frame())) == 5000
+
+
+def test_best_widens_past_a_single_crop_window():
+    frame = skewed_frame()
+    frame[["Soil_pH", "Soil_Moisture", "Temperature_C", "Rainfall_mm"]] = 6.5, 30.0, 25.0, 150.0  # One grid cell
+    index = CropIndex(frame)
+    assert len(index) == 5000
+    crops = [row["Crop_Type"] for row in index.best(4)]
+    assert crops[0] == "Wheat"
+    assert sorted(crops) == ["Corn", "Rice", "Soybean", "Wheat"]
+
+
+def test_small_appends_do_not_rebuild():
+    frame = skewed_frame(100_000)
+    index = CropIndex(frame)
+    builds = []
+    build = index._build
+    index._build = lambda arrays: (builds.append(len(arrays["__score"])), build(arrays))
+    for start in range(0, 4000, 1000):
+        index.append(frame.iloc[start:start + 1000])
+    assert builds == []
+    assert len(index) == 104_000
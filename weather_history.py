@@ -0,0 +1,142 @@
+import time
+
+from weather_service import city_key
+
+# 🗓️ Resolutions kept per city, in seconds, with how long each is retained
+# Every sample updates its minute, hour and day bucket at once, so downsampling
+# needs no background job; older fine-grained buckets are pruned as new ones arrive.
+# One city-year is about 2,880 minute + 2,160 hour + 365 day rows (~0.5 MB on disk).
+MINUTE, HOUR, DAY = 60, 3600, 86400
+RETENTION = {MINUTE: 2 * DAY, HOUR: 90 * DAY, DAY: None}  # None = kept forever
+HEAT_STRESS_C = 35.0  # Samples at or above this temperature count as heat stress
+MAX_POINTS = 500  # series() picks the finest resolution that returns at most this many points
+
+# Aggregates are stored as sums, so buckets merge with plain arithmetic and means are exact
+SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS weather_history (
+        city TEXT NOT NULL,
+        resolution INTEGER NOT NULL,
+        bucket INTEGER NOT NULL,  -- Unix time of the bucket start
+        samples INTEGER NOT NULL,
+        temp_sum REAL NOT NULL,
+        temp_min REAL NOT NULL,
+        temp_max REAL NOT NULL,
+        humidity_sum REAL NOT NULL,
+        wind_max REAL NOT NULL,
+        precip_sum REAL NOT NULL,  -- Sum of precipitation rates (mm/h)
+        heat_samples INTEGER NOT NULL,
+        condition TEXT,  -- Latest condition in the bucket
+        PRIMARY KEY (city, resolution, bucket)
+    ) WITHOUT ROWID;
+'''
+
+UPSERT_BUCKET = '''
+    INSERT INTO weather_history (city, resolution, bucket, samples, temp_sum, temp_min, temp_max,
+                                 humidity_sum, wind_max, precip_sum, heat_samples, condition)
+    VALUES (?, ?, ?, 1, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (city, resolution, bucket) DO UPDATE SET
+        samples = samples + 1,
+        temp_sum = temp_sum + excluded.temp_sum,
+        temp_min = MIN(temp_min, excluded.temp_min),
+        temp_max = MAX(temp_max, excluded.temp_max),
+        humidity_sum = humidity_sum + excluded.humidity_sum,
+        wind_max = MAX(wind_max, excluded.wind_max),
+        precip_sum = precip_sum + excluded.precip_sum,
+        heat_samples = heat_samples + excluded.heat_samples,
+        condition = excluded.condition
+'''
+
+# Per-bucket values: precipitation and heat samples are scaled by the bucket length
+BUCKET_COLUMNS = '''
+    bucket, samples, temp_sum / samples, temp_min, temp_max, humidity_sum / samples, wind_max,
+    precip_sum / samples * resolution / 3600.0, heat_samples * 1.0 / samples * resolution / 3600.0, condition
+'''
+
+
+# 💾 Record one weather reading (runs on the Database writer like storage's helpers)
+# A second reading in the same minute is ignored, so repeated polls of a cached
+# answer don't count twice. Returns whether the reading was stored.
+def record_sample(conn, city, weather, timestamp=None):
+    timestamp = int(time.time() if timestamp is None else timestamp)
+    city = city_key(city)
+    temp = float(weather["temp"])
+    values = (temp, temp, temp, float(weather.get("humidity") or 0), float(weather.get("wind") or 0),
+              float(weather.get("precip") or 0), 1 if temp >= HEAT_STRESS_C else 0, weather.get("condition"))
+    cursor = conn.execute(
+        "INSERT OR IGNORE INTO weather_history VALUES (?, ?, ?, 1, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (city, MINUTE, timestamp - timestamp % MINUTE) + values
+    )
+    if cursor.rowcount == 0:
+        return False
+    conn.executemany(UPSERT_BUCKET, [(city, resolution, timestamp - timestamp % resolution) + values
+                                     for resolution in (HOUR, DAY)])
+    for resolution, keep in RETENTION.items():
+        if keep is not None:  # A primary-key range delete; free when nothing has expired
+            conn.execute("DELETE FROM weather_history WHERE city = ? AND resolution = ? AND bucket < ?",
+                         (city, resolution, timestamp - keep))
+    return True
+
+
+def _resolution_for(start, end, now):
+    for resolution, keep in RETENTION.items():
+        if (keep is None or start >= now - keep) and (end - start) / resolution <= MAX_POINTS:
+            return resolution
+    return DAY
+
+
+# 📈 Buckets for `city` between `start` and `end` (Unix times), oldest first
+# Each point is (time, samples, temp_mean, temp_min, temp_max, humidity_mean, wind_max,
+# rainfall_mm, heat_stress_hours, condition).
+def series(conn, city, start, end=None, resolution=None):
+    now = time.time()
+    end = now if end is None else end
+    resolution = resolution or _resolution_for(start, end, now)
+    return conn.execute(
+        f"SELECT {BUCKET_COLUMNS} FROM weather_history "
+        "WHERE city = ? AND resolution = ? AND bucket > ? - resolution AND bucket <= ? ORDER BY bucket",
+        (city_key(city), resolution, start, end)
+    ).fetchall()
+
+
+# 🌡️ Trend over `days` days: mean/min/max temperature, rainfall and heat stress hours
+# Uses the finest resolution still retained for the whole window (hourly for a week).
+def summary(conn, city, days=7, now=None):
+    now = time.time() if now is None else now
+    start = now - days * DAY
+    resolution = next(res for res, keep in RETENTION.items() if keep is None or keep >= days * DAY)
+    row = conn.execute(
+        "SELECT SUM(samples), SUM(temp_sum) / SUM(samples), MIN(temp_min), MAX(temp_max), "
+        "SUM(humidity_sum) / SUM(samples), SUM(precip_sum / samples * resolution / 3600.0), "
+        "SUM(heat_samples * 1.0 / samples * resolution / 3600.0) "
+        "FROM weather_history WHERE city = ? AND resolution = ? AND bucket > ? - resolution AND bucket <= ?",
+        (city_key(city), resolution, start, now)
+    ).fetchone()
+    if not row[0]:
+        return None
+    samples, temp_mean, temp_min, temp_max, humidity_mean, rainfall, heat_hours = row
+    return {
+        "days": days,
+        "samples": samples,
+        "temp_mean": round(temp_mean, 1),
+        "temp_min": round(temp_min, 1),
+        "temp_max": round(temp_max, 1),
+        "humidity_mean": round(humidity_mean, 1),
+        "rainfall_mm": round(rainfall, 1),
+        "heat_stress_hours": round(heat_hours, 1),
+    }
+
+
+# 🧊 Trend over the last `days` completed (UTC) days, in whole units
+# Meant for LLM prompts: the prompt is the answer cache key, so it must not change with
+# every new reading. This only changes once a day (or when a day's history is filled in).
+def completed_days_summary(conn, city, days=7, now=None):
+    now = time.time() if now is None else now
+    trend = summary(conn, city, days, now=now - now % DAY - 1)
+    if trend is None:
+        return None
+    return {key: value if key in ("days", "samples") else round(value) for key, value in trend.items()}
+
+
+def format_summary(trend):
+    return (f"{trend['days']}-day trend: avg {trend['temp_mean']}°C ({trend['temp_min']}–{trend['temp_max']}°C), "
+            f"{trend['rainfall_mm']} mm rain, {trend['heat_stress_hours']} h above {HEAT_STRESS_C:.0f}°C")
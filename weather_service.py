@@ -0,0 +1,182 @@
+import json
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import metrics
+
+WEATHER_API_URL = "https://api.weatherapi.com/v1/current.json"
+WEATHER_TTL = 60  # Seconds a city's weather is reused before it is fetched again
+REQUEST_TIMEOUT = (3.05, 10)  # (connect, read) seconds
+MAX_RETRIES = 3
+RETRY_BACKOFF = 0.5
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class WeatherError(Exception):
+    pass
+
+
+# 🌦 Normalize a WeatherAPI current.json payload to the fields the app shows
+def parse_current(payload):
+    current = payload["current"]
+    return {
+        "temp": current["temp_c"],
+        "condition": current["condition"]["text"],
+        "humidity": current["humidity"],
+        "wind": current["wind_kph"],
+        "precip": current.get("precip_mm", 0.0),
+    }
+
+
+def city_key(city):
+    return city.strip().lower()
+
+
+# 🧪 Canned WeatherAPI responses for running without the network
+# A JSON object mapping city names to current.json payloads; "*" is used for any
+# city that is not listed.
+def load_fixtures(path):
+    with open(path, encoding="utf-8") as f:
+        return {city_key(city): payload for city, payload in json.load(f).items()}
+
+
+# 🌍 Weather service shared by the agents, the UI and the advisor engine
+# One pooled requests.Session (keep-alive, timeouts, retries with jittered backoff),
+# a per-city TTL cache, and a single in-flight fetch per city no matter how many
+# threads ask for it.
+class WeatherService:
+    def __init__(self, api_key, ttl=WEATHER_TTL, base_url=WEATHER_API_URL, fixtures=None,
+                 timeout=REQUEST_TIMEOUT, retries=MAX_RETRIES, backoff=RETRY_BACKOFF, max_workers=8):
+        self.api_key = api_key
+        self.ttl = ttl
+        self.base_url = base_url
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_workers = max_workers
+        self.fixtures = load_fixtures(fixtures) if isinstance(fixtures, str) else fixtures
+        self._cache = {}  # city key -> (weather, fetched_at)
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self._session = None
+        self._executor = None
+
+    @property
+    def configured(self):
+        if self.fixtures is not None or self.base_url != WEATHER_API_URL:  # Local stand-ins need no key
+            return True
+        return bool(self.api_key) and self.api_key != "YOUR_API_KEY"
+
+    def _get_session(self):
+        if self._session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            self._session = session
+        return self._session
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="weather")
+            return self._executor
+
+    # 📡 One HTTP fetch with retries on timeouts, connection errors and 429/5xx
+    def _fetch(self, city):
+        if self.fixtures is not None:
+            payload = self.fixtures.get(city_key(city), self.fixtures.get("*"))
+            if payload is None:
+                raise WeatherError(f"No weather fixture for {city}")
+            return parse_current(payload)
+
+        import requests
+        session = self._get_session()
+        for attempt in range(self.retries + 1):
+            try:
+                with metrics.timer("weather_fetch_seconds"):
+                    response = session.get(self.base_url, params={"key": self.api_key, "q": city}, timeout=self.timeout)
+                if response.status_code not in RETRY_STATUSES:
+                    if response.status_code >= 400:
+                        raise WeatherError(f"Weather API returned {response.status_code} for {city}: {response.text[:200]}")
+                    return parse_current(response.json())
+                error = WeatherError(f"Weather API returned {response.status_code} for {city}")
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+            if attempt < self.retries:
+                metrics.increment("weather_retries_total")
+                time.sleep(self.backoff * (2 ** attempt) * random.uniform(0.5, 1.5))
+        raise error
+
+    # 👀 Cached weather for a city without ever touching the network
+    def peek(self, city, max_age=None):
+        entry = self._cache.get(city_key(city))
+        if entry is None:
+            return None
+        weather, fetched_at = entry
+        if time.monotonic() - fetched_at > (self.ttl if max_age is None else max_age):
+            return None
+        return weather
+
+    # 🔁 Weather for a city, fetched at most once per TTL and shared by concurrent callers
+    def get(self, city, max_age=None):
+        weather = self.peek(city, max_age)
+        if weather is not None:
+            metrics.increment("weather_cache_hits_total")
+            return weather
+        key = city_key(city)
+        with self._lock:
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._in_flight[key] = future
+        if not owner:
+            return future.result()
+        try:
+            weather = self._fetch(city)
+        except Exception as e:
+            with self._lock:
+                del self._in_flight[key]
+            future.set_exception(e)
+            raise
+        with self._lock:
+            self._cache[key] = (weather, time.monotonic())
+            del self._in_flight[key]
+        future.set_result(weather)
+        return weather
+
+    # 🧵 Fetch in the background; callback(city, weather, error) runs on the worker thread
+    def get_async(self, city, callback=None):
+        def run():
+            try:
+                weather = self.get(city)
+            except Exception as e:
+                if callback:
+                    callback(city, None, e)
+                raise
+            if callback:
+                callback(city, weather, None)
+            return weather
+        return self._get_executor().submit(run)
+
+    # 🗺️ Fetch many cities in parallel; failed cities map to their exception
+    def get_many(self, cities):
+        futures = {city: self._get_executor().submit(self.get, city) for city in dict.fromkeys(cities)}
+        results = {}
+        for city, future in futures.items():
+            try:
+                results[city] = future.result()
+            except Exception as e:
+                results[city] = e
+        return results
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+        if self._session is not None:
+            self._session.close()